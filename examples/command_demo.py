@@ -87,7 +87,7 @@ class CommandDemoApp:
             self.window.update()
 
             # clear grid
-            self.grid.fill(0.0)
+            vector_calculator.clear_grid(self.grid)
 
             try:
                 self.ui_manager.process_mouse_drag()
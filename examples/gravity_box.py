@@ -66,7 +66,7 @@ def main():
         window.update()
 
         #clear grid
-        grid.fill(0.0)
+        vector_calculator.clear_grid(grid)
 
         try:
             ui_manager.process_mouse_drag()
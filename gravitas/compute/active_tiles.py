@@ -0,0 +1,203 @@
+# Active tiles - coarse dirty bitmap so clears and stencil passes skip quiet regions of the grid
+import threading
+import weakref
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from ..core.config import config_manager
+
+Region = Tuple[int, int, int, int]  # y0, y1, x0, x1 in cells, half-open
+
+class ActiveTiles:
+    
+
+    def __init__(self, height: int, width: int, tile_size: int = 32):
+        if height <= 0 or width <= 0:
+            raise ValueError(f"invalid grid size: {width}x{height}")
+        if tile_size <= 0:
+            raise ValueError(f"invalid tile size: {tile_size}")
+
+        self._height = int(height)
+        self._width = int(width)
+        self._tile = int(tile_size)
+        rows = -(-self._height // self._tile)
+        cols = -(-self._width // self._tile)
+
+        # invariant: every cell outside a dirty tile is zero. A new map starts
+        # all dirty because nothing is known about the grid's current contents
+        self._mask = np.ones((rows, cols), dtype=bool)
+        # bumped by every mark, clear and touch, i.e. every announced host write to
+        # the grid; a device copy taken at one count is current while it is unchanged
+        self._writes = 0
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return (self._height, self._width)
+
+    @property
+    def tile_size(self) -> int:
+        return self._tile
+
+    @property
+    def mask(self) -> np.ndarray:
+        return self._mask
+
+    @property
+    def writes(self) -> int:
+        return self._writes
+
+    def count(self) -> int:
+        
+        return int(np.count_nonzero(self._mask))
+
+    def fraction(self) -> float:
+        
+        return self.count() / self._mask.size
+
+    def active_cells(self) -> int:
+        
+        return min(self.count() * self._tile * self._tile, self._height * self._width)
+
+    def touch(self) -> None:
+        
+        # a host write that changes no tile bits, e.g. a stencil pass inside the dirty runs
+        self._writes += 1
+
+    def mark_all(self) -> None:
+        
+        self._mask[...] = True
+        self._writes += 1
+
+    def reset(self) -> None:
+        
+        self._mask[...] = False
+        self._writes += 1
+
+    def mark_rect(self, y0: int, y1: int, x0: int, x1: int) -> None:
+        
+        y0, y1 = max(0, int(y0)), min(self._height, int(y1))
+        x0, x1 = max(0, int(x0)), min(self._width, int(x1))
+        if y0 >= y1 or x0 >= x1:
+            return
+        t = self._tile
+        self._mask[y0 // t:(y1 - 1) // t + 1, x0 // t:(x1 - 1) // t + 1] = True
+        self._writes += 1
+
+    def mark_points(self, x, y, radius: int = 0) -> None:
+        
+        # bilinear footprint of a write at (x, y) plus `radius` cells each way
+        x = np.clip(np.asarray(x, dtype=np.float64).reshape(-1), 0.0, self._width - 1.0)
+        y = np.clip(np.asarray(y, dtype=np.float64).reshape(-1), 0.0, self._height - 1.0)
+        if x.size == 0:
+            return
+
+        t = self._tile
+        x0 = x.astype(np.intp)
+        y0 = y.astype(np.intp)
+        tx0 = np.maximum(x0 - radius, 0) // t
+        tx1 = np.minimum(x0 + radius + 1, self._width - 1) // t
+        ty0 = np.maximum(y0 - radius, 0) // t
+        ty1 = np.minimum(y0 + radius + 1, self._height - 1) // t
+
+        # radius < tile size, so a footprint spans at most two tiles per axis
+        self._mask[ty0, tx0] = True
+        self._mask[ty0, tx1] = True
+        self._mask[ty1, tx0] = True
+        self._mask[ty1, tx1] = True
+        self._writes += 1
+
+    def mark_cells(self, y, x) -> None:
+        
+        # exact integer cells, already inside the grid
+        t = self._tile
+        self._mask[np.asarray(y, dtype=np.intp) // t, np.asarray(x, dtype=np.intp) // t] = True
+        self._writes += 1
+
+    def mark_border(self) -> None:
+        
+        self._mask[0, :] = True
+        self._mask[-1, :] = True
+        self._mask[:, 0] = True
+        self._mask[:, -1] = True
+        self._writes += 1
+
+    def mark_regions(self, regions: List[Region]) -> None:
+        
+        for y0, y1, x0, x1 in regions:
+            self.mark_rect(y0, y1, x0, x1)
+
+    def refresh(self, grid: np.ndarray, regions: List[Region]) -> None:
+        
+        # re-derive the bits of every tile overlapping the regions from the grid's
+        # contents: spreading by one cell only dirties a neighbour tile if values landed there
+        t = self._tile
+        for y0, y1, x0, x1 in regions:
+            tx0, tx1 = x0 // t, (x1 - 1) // t + 1
+            offsets = np.arange(0, (tx1 - tx0) * t, t)
+            for ty in range(y0 // t, (y1 - 1) // t + 1):
+                block = grid[ty * t:(ty + 1) * t, tx0 * t:min(tx1 * t, self._width)]
+                columns = np.any(block != 0, axis=(0, 2))
+                self._mask[ty, tx0:tx1] = np.logical_or.reduceat(columns, offsets)
+
+    def regions(self, halo: int = 0) -> List[Region]:
+        
+        # horizontal runs of dirty tiles, one rectangle per run, grown by `halo` cells
+        t = self._tile
+        result: List[Region] = []
+        for row in np.flatnonzero(self._mask.any(axis=1)):
+            edges = np.diff(np.concatenate(([0], self._mask[row].view(np.int8), [0])))
+            starts = np.flatnonzero(edges == 1)
+            stops = np.flatnonzero(edges == -1)
+            y0 = max(0, row * t - halo)
+            y1 = min(self._height, (row + 1) * t + halo)
+            for start, stop in zip(starts, stops):
+                result.append((y0, y1, max(0, start * t - halo), min(self._width, stop * t + halo)))
+        return result
+
+    def clear(self, grid: np.ndarray) -> None:
+        
+        if tuple(grid.shape[:2]) != self.shape:
+            raise ValueError(f"grid shape {grid.shape[:2]} does not match tile map {self.shape}")
+        for y0, y1, x0, x1 in self.regions():
+            grid[y0:y1, x0:x1] = 0
+        self.reset()
+
+# grids are tracked by identity; the weakref drops the entry when the array is freed
+_tracked: Dict[int, Tuple["weakref.ref", ActiveTiles]] = {}
+_tracked_lock = threading.Lock()
+
+def track_activity(grid: np.ndarray, tile_size: Optional[int] = None) -> ActiveTiles:
+    
+    if tile_size is None:
+        tile_size = config_manager.get("grid_tile_size", 32)
+    key = id(grid)
+
+    # re-tracking keeps the existing map: replacing it would orphan the one
+    # that other holders (GridManager, the stencil) already mark and read
+    existing = active_tiles_for(grid)
+    if existing is not None and existing.tile_size == int(tile_size):
+        return existing
+    tiles = ActiveTiles(grid.shape[0], grid.shape[1], tile_size)
+
+    def forget(_ref, key=key):
+        with _tracked_lock:
+            entry = _tracked.get(key)
+            if entry is not None and entry[0] is _ref:
+                del _tracked[key]
+
+    with _tracked_lock:
+        _tracked[key] = (weakref.ref(grid, forget), tiles)
+    return tiles
+
+def active_tiles_for(grid: np.ndarray) -> Optional[ActiveTiles]:
+    
+    entry = _tracked.get(id(grid))
+    if entry is None or entry[0]() is not grid:
+        return None
+    return entry[1]
+
+def untrack_activity(grid: np.ndarray) -> None:
+    
+    with _tracked_lock:
+        entry = _tracked.get(id(grid))
+        if entry is not None and entry[0]() is grid:
+            del _tracked[id(grid)]
@@ -0,0 +1,101 @@
+# Compute backend registry - backends are created on first use, never at import time
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+class BackendRegistry:
+    
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._errors: Dict[str, str] = {}
+        self._init_times: Dict[str, float] = {}
+
+    def register(self, name: str, factory: Callable[[], Any]) -> None:
+        
+        with self._lock:
+            self._factories[name] = factory
+            self._instances.pop(name, None)
+            self._errors.pop(name, None)
+            self._init_times.pop(name, None)
+
+    def names(self) -> List[str]:
+        
+        with self._lock:
+            return list(self._factories)
+
+    def get(self, name: str) -> Optional[Any]:
+        
+        # first call runs the factory; failures are remembered so a missing
+        # driver is probed once per process, not once per frame
+        with self._lock:
+            if name in self._instances:
+                return self._instances[name]
+            if name in self._errors:
+                return None
+            factory = self._factories.get(name)
+            if factory is None:
+                return None
+
+            start = time.perf_counter()
+            try:
+                instance = factory()
+            except Exception as e:
+                self._errors[name] = str(e)
+                print(f"[vector fieldcompute] {name} backend initializefail: {e}")
+                return None
+            finally:
+                self._init_times[name] = time.perf_counter() - start
+
+            self._instances[name] = instance
+            return instance
+
+    def is_loaded(self, name: str) -> bool:
+        
+        with self._lock:
+            return name in self._instances
+
+    def error(self, name: str) -> Optional[str]:
+        
+        with self._lock:
+            return self._errors.get(name)
+
+    def init_time(self, name: str) -> Optional[float]:
+        
+        with self._lock:
+            return self._init_times.get(name)
+
+    def loaded(self) -> Dict[str, Any]:
+        
+        with self._lock:
+            return dict(self._instances)
+
+    def reset(self, name: Optional[str] = None) -> None:
+        
+        # drop cached instances (and remembered failures) so the next get() retries
+        with self._lock:
+            names = [name] if name is not None else list(self._factories)
+            for key in names:
+                instance = self._instances.pop(key, None)
+                self._errors.pop(key, None)
+                self._init_times.pop(key, None)
+                if instance is not None and hasattr(instance, "cleanup"):
+                    instance.cleanup()
+
+def _create_cpu_backend():
+    from .cpu_vector_field import CPUVectorFieldCalculator
+    return CPUVectorFieldCalculator()
+
+def _create_gpu_backend():
+    # pyopencl is imported here, so CPU-only processes never load it
+    from .gpu_vector_field import GPUVectorFieldCalculator
+    calculator = GPUVectorFieldCalculator()
+    if not calculator._initialized:
+        raise RuntimeError("OpenCL initialization failed")
+    return calculator
+
+backend_registry = BackendRegistry()
+backend_registry.register("cpu", _create_cpu_backend)
+backend_registry.register("gpu", _create_gpu_backend)
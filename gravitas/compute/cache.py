@@ -0,0 +1,43 @@
+# Cache files - per-user cache directory and atomic writes shared by the kernel, calibration and tuning caches
+import json
+import os
+import tempfile
+from typing import Any, Dict, Optional
+
+def cache_dir(name: Optional[str] = None) -> str:
+    
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    root = os.path.join(base, "gravitas")
+    return os.path.join(root, name) if name else root
+
+def atomic_write(path: str, data: bytes) -> None:
+    
+    # write-then-rename so concurrent processes never read a partial file
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def load_json(path: str) -> Dict[str, Any]:
+    
+    # a missing, unreadable or malformed file reads as empty
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return entries if isinstance(entries, dict) else {}
+
+def save_json_entry(path: str, key: str, value: Any) -> None:
+    
+    # read-modify-write of one entry; OSError is left to the caller to report
+    entries = load_json(path)
+    entries[key] = value
+    atomic_write(path, json.dumps(entries, indent=2).encode("utf-8"))
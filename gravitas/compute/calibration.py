@@ -0,0 +1,205 @@
+# Device calibration - measured CPU/GPU crossover sizes for the "auto" compute device
+import math
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Sequence, Union
+import numpy as np
+from .cache import cache_dir, load_json, save_json_entry
+
+# operation -> what its size argument counts
+CALIBRATED_OPERATIONS = {
+    "update_grid_with_adjacent_sum": "cells",
+    "fit_vectors_at_positions_batch": "markers",
+    "create_tiny_vectors_batch": "markers",
+}
+
+# a cell-sized operation has one crossover; a marker operation has one per grid
+# area (keyed by the cell count as a string, for JSON), because its GPU cost is
+# dominated by moving the whole grid across the bus rather than by the markers
+Crossover = Union[None, float, Dict[str, Optional[float]]]
+
+def default_calibration_path() -> str:
+    
+    return os.environ.get("GRAVITAS_CALIBRATION_FILE") or os.path.join(cache_dir(), "calibration.json")
+
+def find_crossover(sizes: Sequence[int], cpu_times: Sequence[float], gpu_times: Sequence[float]) -> Optional[float]:
+    
+    # smallest size from which the GPU wins at every larger measured size;
+    # placed at the geometric midpoint between the last loss and the first win
+    crossover = None
+    for i in range(len(sizes) - 1, -1, -1):
+        if gpu_times[i] < cpu_times[i]:
+            crossover = i
+        else:
+            break
+
+    if crossover is None:
+        return None
+    if crossover == 0:
+        return float(sizes[0])
+    return math.sqrt(sizes[crossover - 1] * sizes[crossover])
+
+class DeviceCalibrator:
+    
+
+    def __init__(self, path: Optional[str] = None,
+                 grid_sides: Sequence[int] = (32, 64, 128, 256, 512),
+                 marker_counts: Sequence[int] = (16, 256, 4096, 65536),
+                 marker_grid_sides: Sequence[int] = (64, 256, 1024), repeats: int = 3):
+        self._path = path
+        self._lock = threading.RLock()
+        self._grid_sides = tuple(grid_sides)
+        self._marker_counts = tuple(marker_counts)
+        self._marker_grid_sides = tuple(int(side) for side in marker_grid_sides)
+        self._repeats = max(1, int(repeats))
+        self._crossovers: Optional[Dict[str, Crossover]] = None
+        self._key: Optional[str] = None
+
+    @property
+    def path(self) -> str:
+        return self._path or default_calibration_path()
+
+    @property
+    def crossovers(self) -> Optional[Dict[str, Crossover]]:
+        with self._lock:
+            return None if self._crossovers is None else dict(self._crossovers)
+
+    @staticmethod
+    def device_key(gpu: Any) -> str:
+        
+        # one entry per GPU/driver and host core count
+        try:
+            device = gpu._ctx.devices[0]
+            gpu_id = f"{device.platform.name}|{device.name}|{device.driver_version}"
+        except Exception:
+            gpu_id = type(gpu).__name__
+        return f"{gpu_id}|cpus={os.cpu_count()}"
+
+    def choose(self, operation: str, size: int, cpu: Any, gpu: Any, cells: Optional[int] = None) -> str:
+        
+        # `cells` is the grid area a marker operation works on; it picks the table row
+        crossovers = self.ensure(cpu, gpu)
+        crossover = crossovers.get(operation)
+        if isinstance(crossover, dict):
+            crossover = self._row_for(crossover, cells)
+        if crossover is not None and size >= crossover:
+            return "gpu"
+        return "cpu"
+
+    @staticmethod
+    def _row_for(table: Dict[str, Optional[float]], cells: Optional[int]) -> Optional[float]:
+        if not table:
+            return None
+        if cells is None:
+            # without a grid size, the largest measured grid is the conservative row
+            return table[max(table, key=int)]
+        # nearest calibrated grid area on a log scale
+        target = math.log(max(int(cells), 1))
+        return table[min(table, key=lambda key: abs(math.log(int(key)) - target))]
+
+    def ensure(self, cpu: Any, gpu: Any) -> Dict[str, Crossover]:
+        
+        key = self.device_key(gpu)
+        with self._lock:
+            if self._crossovers is not None and self._key == key:
+                return self._crossovers
+
+            cached = self._load(key)
+            if cached is not None:
+                self._crossovers, self._key = cached, key
+                return cached
+
+        return self.calibrate(cpu, gpu)
+
+    def calibrate(self, cpu: Any, gpu: Any) -> Dict[str, Crossover]:
+        
+        key = self.device_key(gpu)
+        start = time.perf_counter()
+        crossovers: Dict[str, Crossover] = {}
+
+        for operation, unit in CALIBRATED_OPERATIONS.items():
+            try:
+                if unit == "cells":
+                    crossovers[operation] = self._crossover(cpu, gpu, operation, self._grid_workloads())
+                else:
+                    crossovers[operation] = {
+                        str(side * side): self._crossover(cpu, gpu, operation, self._marker_workloads(side))
+                        for side in self._marker_grid_sides
+                    }
+            except Exception as e:
+                # a backend that cannot run the operation never gets routed to
+                print(f"[vector fieldcompute] calibration of {operation} failed: {e}")
+                crossovers[operation] = None
+
+        print(f"[vector fieldcompute] calibrationdone ({time.perf_counter() - start:.2f}s): {crossovers}")
+
+        with self._lock:
+            self._crossovers, self._key = crossovers, key
+            self._save(key, crossovers)
+        return crossovers
+
+    def _crossover(self, cpu: Any, gpu: Any, operation: str, workloads) -> Optional[float]:
+        sizes, cpu_times, gpu_times = [], [], []
+        for size, make_args in workloads:
+            cpu_times.append(self._measure(cpu, operation, make_args))
+            gpu_times.append(self._measure(gpu, operation, make_args))
+            sizes.append(size)
+        return find_crossover(sizes, cpu_times, gpu_times)
+
+    def _grid_workloads(self):
+        rng = np.random.default_rng(0)
+        for side in self._grid_sides:
+            grid = rng.standard_normal((side, side, 2)).astype(np.float32)
+            yield side * side, lambda grid=grid: (grid.copy(),)
+
+    def _marker_workloads(self, side: int):
+        rng = np.random.default_rng(0)
+        grid = rng.standard_normal((side, side, 2)).astype(np.float32)
+        for count in self._marker_counts:
+            points = np.column_stack((
+                rng.uniform(0.0, side - 1.0, count),
+                rng.uniform(0.0, side - 1.0, count),
+                rng.uniform(0.5, 1.5, count),
+            )).astype(np.float32)
+            yield count, lambda grid=grid, points=points: (grid.copy(), points)
+
+    def _measure(self, backend: Any, operation: str, make_args: Callable[[], tuple]) -> float:
+        fn = getattr(backend, operation)
+
+        def call():
+            grid, *rest = make_args()
+            if operation == "fit_vectors_at_positions_batch":
+                return fn(grid, np.ascontiguousarray(rest[0][:, :2]))
+            return fn(grid, *rest)
+
+        # warm-up absorbs kernel builds and first-touch allocation
+        call()
+        best = float("inf")
+        for _ in range(self._repeats):
+            t0 = time.perf_counter()
+            call()
+            best = min(best, time.perf_counter() - t0)
+        return best
+
+    def _load(self, key: str) -> Optional[Dict[str, Crossover]]:
+        entry = load_json(self.path).get(key)
+        if not isinstance(entry, dict) or set(entry) != set(CALIBRATED_OPERATIONS):
+            return None
+        # entries from before marker operations were tabled by grid area are recalibrated
+        for operation, unit in CALIBRATED_OPERATIONS.items():
+            if unit == "markers" and entry[operation] is not None and not isinstance(entry[operation], dict):
+                return None
+        return entry
+
+    def _save(self, key: str, crossovers: Dict[str, Crossover]) -> None:
+        try:
+            save_json_entry(self.path, key, crossovers)
+        except OSError as e:
+            print(f"[vector fieldcompute] failed to save calibration: {e}")
+
+    def invalidate(self) -> None:
+        
+        with self._lock:
+            self._crossovers = None
+            self._key = None
@@ -0,0 +1,107 @@
+# OpenCL program binary cache - compiled kernels persisted per device, driver and source
+import hashlib
+import os
+import threading
+from typing import Optional, Sequence
+import pyopencl as cl
+from ..core.config import config_manager
+from .cache import atomic_write, cache_dir
+
+def default_cache_dir() -> str:
+    
+    return os.environ.get("GRAVITAS_CL_CACHE_DIR") or cache_dir("opencl")
+
+class ProgramCache:
+    
+
+    def __init__(self, directory: Optional[str] = None):
+        self._directory = directory
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def directory(self) -> str:
+        return self._directory or default_cache_dir()
+
+    @staticmethod
+    def cache_key(device: "cl.Device", source: str, options: Sequence[str] = ()) -> str:
+        
+        digest = hashlib.sha256()
+        for part in (device.name, device.platform.name, device.driver_version, device.version,
+                     " ".join(options), source):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".bin")
+
+    def build(self, ctx: "cl.Context", source: str, options: Sequence[str] = ()) -> "cl.Program":
+        
+        options = list(options)
+        if not config_manager.get("compute_kernel_cache", True):
+            return cl.Program(ctx, source).build(options=options)
+
+        devices = ctx.devices
+        keys = [self.cache_key(device, source, options) for device in devices]
+
+        binaries = self._load(keys)
+        if binaries is not None:
+            try:
+                program = cl.Program(ctx, devices, binaries).build(options=options)
+                with self._lock:
+                    self.hits += 1
+                return program
+            except Exception as e:
+                # stale or foreign binary; rebuild from source and overwrite it
+                print(f"[kernel cache] cached binary rejected, rebuilding: {e}")
+
+        program = cl.Program(ctx, source).build(options=options)
+        with self._lock:
+            self.misses += 1
+        self._store(keys, program.get_info(cl.program_info.BINARIES))
+        return program
+
+    def _load(self, keys: Sequence[str]) -> Optional[list]:
+        binaries = []
+        for key in keys:
+            try:
+                with open(self._path(key), "rb") as f:
+                    data = f.read()
+            except OSError:
+                return None
+            if not data:
+                return None
+            binaries.append(data)
+        return binaries
+
+    def _store(self, keys: Sequence[str], binaries: Sequence[bytes]) -> None:
+        try:
+            for key, binary in zip(keys, binaries):
+                if binary:
+                    atomic_write(self._path(key), bytes(binary))
+        except OSError as e:
+            print(f"[kernel cache] failed to write cache: {e}")
+
+    def clear(self) -> int:
+        
+        removed = 0
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return 0
+        for name in names:
+            if name.endswith(".bin"):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+program_cache = ProgramCache()
+
+def build_program(ctx: "cl.Context", source: str, options: Sequence[str] = ()) -> "cl.Program":
+    
+    return program_cache.build(ctx, source, options)
@@ -2,13 +2,26 @@
 import numpy as np
 from typing import Tuple, Union, List, Optional, Any
 from ..core.state import state_manager
+from ..core.config import config_manager
 from ..core.events import Event, EventType, event_bus
+from .stencil import TiledStencil, SpectralStencil
+from .multigrid import MultigridSolver
+from .potential import PotentialField, splat_density
+from .precision import accumulation_dtype, storage_dtype
+
+# use the dense bincount reduction once the scatter touches at least 1/8 of the grid
+_DENSE_SPLAT_RATIO = 8
 
 class CPUVectorFieldCalculator:
     
     def __init__(self):
         self._event_bus = event_bus
         self._state_manager = state_manager
+        self._config_manager = config_manager
+        self._stencil = TiledStencil(self._config_manager.get("compute_threads", 0))
+        self._spectral = SpectralStencil()
+        self._multigrid = MultigridSolver()
+        self._potential = PotentialField()
 
     def sum_adjacent_vectors(self, grid: np.ndarray, x: int, y: int,
                            self_weight: float = 1.0, neighbor_weight: float = 0.1) -> Tuple[float, float]:
@@ -41,29 +54,82 @@ class CPUVectorFieldCalculator:
         if grid is None or not isinstance(grid, np.ndarray):
             return grid
 
-        h, w = grid.shape[:2]
-
         # getconfigparam
         neighbor_weight = self._state_manager.get("vector_neighbor_weight", 0.1)
         self_weight = self._state_manager.get("vector_self_weight", 1.0)
 
-        padded_grid = np.pad(grid, ((1, 1), (1, 1), (0, 0)), mode='edge')
+        # row-band tiles on the worker pool, written into a persistent back buffer
+        self._stencil.set_workers(self._config_manager.get("compute_threads", 0))
+        return self._stencil.apply(grid, self_weight, neighbor_weight)
+
+    def update_grid_in_bands(self, grid: np.ndarray, band_rows: int = 256) -> np.ndarray:
+        
+        if grid is None or not isinstance(grid, np.ndarray):
+            return grid
+
+        neighbor_weight = self._state_manager.get("vector_neighbor_weight", 0.1)
+        self_weight = self._state_manager.get("vector_self_weight", 1.0)
+
+        # a memory-mapped grid is flushed band by band, so dirty pages never pile up in RAM
+        on_band = (lambda y0, y1: grid.flush()) if isinstance(grid, np.memmap) else None
+        return self._stencil.apply_banded(grid, self_weight, neighbor_weight, band_rows, on_band)
+
+    def update_grid_regions(self, grid: np.ndarray, regions: List[Tuple[int, int, int, int]]) -> np.ndarray:
+        
+        if grid is None or not isinstance(grid, np.ndarray):
+            return grid
 
-        up_neighbors = padded_grid[2:, 1:-1] * neighbor_weight
-        down_neighbors = padded_grid[:-2, 1:-1] * neighbor_weight
-        left_neighbors = padded_grid[1:-1, 2:] * neighbor_weight
-        right_neighbors = padded_grid[1:-1, :-2] * neighbor_weight
+        neighbor_weight = self._state_manager.get("vector_neighbor_weight", 0.1)
+        self_weight = self._state_manager.get("vector_self_weight", 1.0)
 
-        result = up_neighbors + down_neighbors + left_neighbors + right_neighbors
+        # only the given (y0, y1, x0, x1) cell rectangles are recomputed
+        return self._stencil.apply_regions(grid, regions, self_weight, neighbor_weight)
 
-        result += grid * self_weight
+    def iterate(self, grid: np.ndarray, iterations: Optional[int] = None, method: str = "auto") -> np.ndarray:
+        
+        if grid is None or not isinstance(grid, np.ndarray):
+            return grid
 
-        grid[:] = result
+        if iterations is None:
+            iterations = self._config_manager.get("compute_iterations", 1)
+        iterations = int(iterations)
+        if iterations <= 0:
+            return grid
+
+        neighbor_weight = self._state_manager.get("vector_neighbor_weight", 0.1)
+        self_weight = self._state_manager.get("vector_self_weight", 1.0)
+
+        if method == "auto":
+            threshold = self._config_manager.get("compute_fft_min_iterations", 32)
+            method = "fft" if threshold and iterations >= threshold else "direct"
+
+        if method == "direct":
+            self._stencil.set_workers(self._config_manager.get("compute_threads", 0))
+            return self._stencil.iterate(grid, iterations, self_weight, neighbor_weight)
+        if method == "fft":
+            # k steps of the stencil are one fixed convolution, applied as a spectral multiply
+            return self._spectral.iterate(grid, iterations, self_weight, neighbor_weight)
+        raise ValueError(f"unknown iterate method: {method}")
+
+    def solve_steady_state(self, grid: np.ndarray, tolerance: Optional[float] = None,
+                           max_cycles: Optional[int] = None) -> np.ndarray:
+        
+        if grid is None or not isinstance(grid, np.ndarray):
+            return grid
+
+        neighbor_weight = self._state_manager.get("vector_neighbor_weight", 0.1)
+        self_weight = self._state_manager.get("vector_self_weight", 1.0)
+        if tolerance is None:
+            tolerance = self._config_manager.get("compute_solver_tolerance", 1e-6)
+
+        # the grid is the source term: the result is the field the stencil settles
+        # on when that source is re-injected every step
+        grid[...] = self._multigrid.solve(grid, self_weight, neighbor_weight, tolerance, max_cycles)
         return grid
 
     def create_vector_grid(self, width: int = 640, height: int = 480, default: Tuple[float, float] = (0, 0)) -> np.ndarray:
         
-        grid = np.zeros((height, width, 2), dtype=np.float32)
+        grid = np.zeros((height, width, 2), dtype=storage_dtype())
         if default != (0, 0):
             grid[:, :, 0] = default[0]
             grid[:, :, 1] = default[1]
@@ -84,21 +150,117 @@ class CPUVectorFieldCalculator:
                 if abs(dx) + abs(dy) == 1:
                     self.add_vector_at_position(grid, x + dx, y + dy, dx * mag, dy * mag)
 
-    def create_tiny_vectors_batch(self, grid: np.ndarray, positions: List[Tuple[float, float, float]]) -> None:
+    def create_tiny_vectors_batch(self, grid: np.ndarray, positions: Union[np.ndarray, List[Tuple[float, float, float]]]) -> None:
+        
+        if not hasattr(grid, "ndim") or len(positions) == 0:
+            return
+
+        h, w = grid.shape[0], grid.shape[1]
+
+        positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+        x = np.clip(positions[:, 0], 0.0, w - 1.0)
+        y = np.clip(positions[:, 1], 0.0, h - 1.0)
+        mag = positions[:, 2]
+
+        # the left/right neighbours only carry an x component and the up/down
+        # neighbours only a y component, so each channel gets two splats per marker
+        index_x, values_x = self._bilinear_contributions(grid, np.concatenate((x - 1.0, x + 1.0)), np.concatenate((y, y)),
+                                                         np.concatenate((-mag, mag)), 0)
+        index_y, values_y = self._bilinear_contributions(grid, np.concatenate((x, x)), np.concatenate((y - 1.0, y + 1.0)),
+                                                         np.concatenate((-mag, mag)), 1)
+
+        self._accumulate(grid, np.concatenate((index_x, index_y)), np.concatenate((values_x, values_y)))
+
+    def add_potential_field(self, grid: np.ndarray, positions: Union[np.ndarray, List[Tuple[float, float, float]]],
+                            kernel: Optional[Any] = None, scale: Optional[float] = None,
+                            strength: Optional[float] = None) -> None:
         
-        if not hasattr(grid, "ndim") or not positions:
+        if not hasattr(grid, "ndim") or grid.ndim < 3 or grid.shape[2] < 2 or len(positions) == 0:
             return
 
+        if kernel is None:
+            kernel = self._config_manager.get("field_kernel", "inverse_r")
+        if scale is None:
+            scale = self._config_manager.get("field_kernel_scale", 2.0)
+        if strength is None:
+            strength = self._config_manager.get("field_strength", 1.0)
+
         h, w = grid.shape[0], grid.shape[1]
+        positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+
+        # one splat of every marker's magnitude, then a single convolution whose
+        # cost depends on the grid size only
+        density = splat_density(h, w, positions[:, 0], positions[:, 1], positions[:, 2])
+        field = self._potential.field(density, kernel, scale)
+        if strength != 1.0:
+            field *= strength
+        grid[:, :, :2] += field.astype(accumulation_dtype(grid.dtype), copy=False)
+
+    def set_field_kernel(self, kernel: Optional[np.ndarray]) -> None:
+        
+        self._potential.set_custom_kernel(kernel)
+
+    def add_vectors_at_positions_batch(self, grid: np.ndarray, positions: Union[np.ndarray, List[Tuple[float, float]]],
+                                       vectors: Union[np.ndarray, List[Tuple[float, float]]]) -> None:
+        
+        if not hasattr(grid, "ndim") or grid.ndim < 3 or grid.shape[2] < 2:
+            return
+
+        positions = np.asarray(positions, dtype=np.float32).reshape(-1, 2)
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, 2)
+        if positions.shape[0] == 0:
+            return
+
+        index_x, values_x = self._bilinear_contributions(grid, positions[:, 0], positions[:, 1], vectors[:, 0], 0)
+        index_y, values_y = self._bilinear_contributions(grid, positions[:, 0], positions[:, 1], vectors[:, 1], 1)
+
+        self._accumulate(grid, np.concatenate((index_x, index_y)), np.concatenate((values_x, values_y)))
 
-        for x, y, mag in positions:
-            x = max(0.0, min(w - 1.0, float(x)))
-            y = max(0.0, min(h - 1.0, float(y)))
+    def _bilinear_contributions(self, grid: np.ndarray, x: np.ndarray, y: np.ndarray,
+                                values: np.ndarray, channel: int) -> Tuple[np.ndarray, np.ndarray]:
+        
+        h, w, channels = grid.shape[0], grid.shape[1], grid.shape[2]
+
+        x = np.clip(x, 0.0, w - 1.0)
+        y = np.clip(y, 0.0, h - 1.0)
+
+        # coordinates are non-negative after clamping, so truncation is floor
+        x0 = x.astype(np.intp)
+        y0 = y.astype(np.intp)
+        x1 = np.minimum(x0 + 1, w - 1)
+        y1 = np.minimum(y0 + 1, h - 1)
 
-            for dy in [-1, 0, 1]:
-                for dx in [-1, 0, 1]:
-                    if abs(dx) + abs(dy) == 1:
-                        self.add_vector_at_position(grid, x + dx, y + dy, dx * mag, dy * mag)
+        wx = x - x0
+        wy = y - y0
+        left = values * (1 - wx)
+        right = values * wx
+
+        row0 = y0 * w
+        row1 = y1 * w
+        index = np.concatenate((row0 + x0, row0 + x1, row1 + x0, row1 + x1))
+        index *= channels
+        index += channel
+
+        return index, np.concatenate((left * (1 - wy), right * (1 - wy), left * wy, right * wy))
+
+    def _accumulate(self, grid: np.ndarray, index: np.ndarray, values: np.ndarray) -> None:
+        
+        # a dense bincount costs O(grid) regardless of how many cells are hit, so
+        # small batches on big grids go through the unbuffered add.at instead
+        if index.size * _DENSE_SPLAT_RATIO >= grid.size:
+            dense = np.bincount(index, weights=values, minlength=grid.size)
+            grid += dense.reshape(grid.shape).astype(accumulation_dtype(grid.dtype), copy=False)
+        elif grid.dtype != accumulation_dtype(grid.dtype):
+            # half-precision storage: sum each cell's contributions first so it is rounded once
+            cells, inverse = np.unique(index, return_inverse=True)
+            totals = np.bincount(inverse, weights=values)
+            at = cells if grid.flags.c_contiguous else np.unravel_index(cells, grid.shape)
+            target = grid.reshape(-1) if grid.flags.c_contiguous else grid
+            target[at] = target[at] + totals
+        elif grid.flags.c_contiguous:
+            np.add.at(grid.reshape(-1), index, values)
+        else:
+            np.add.at(grid, np.unravel_index(index, grid.shape), values)
 
     def add_vector_at_position(self, grid: np.ndarray, x: float, y: float, vx: float, vy: float) -> None:
         
@@ -161,11 +323,83 @@ class CPUVectorFieldCalculator:
         vx = (1 - wx) * (1 - wy) * v00[0] + wx * (1 - wy) * v01[0] + (1 - wx) * wy * v10[0] + wx * wy * v11[0]
         vy = (1 - wx) * (1 - wy) * v00[1] + wx * (1 - wy) * v01[1] + (1 - wx) * wy * v10[1] + wx * wy * v11[1]
 
-        return (vx, vy)
+        return (float(vx), float(vy))
+
+    def fit_vectors_at_positions_batch(self, grid: np.ndarray, positions: Union[np.ndarray, List[Tuple[float, float]]]) -> np.ndarray:
+        
+        positions = np.asarray(positions, dtype=np.float32).reshape(-1, 2)
+        num_positions = positions.shape[0]
+
+        if not hasattr(grid, "ndim") or grid.ndim < 3 or grid.shape[2] < 2 or num_positions == 0:
+            return np.zeros((num_positions, 2), dtype=np.float32)
+
+        return self._bilinear_gather(grid, positions[:, 0], positions[:, 1])
 
-    def fit_vectors_at_positions_batch(self, grid: np.ndarray, positions: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
+    def _bilinear_gather(self, grid: np.ndarray, x: np.ndarray, y: np.ndarray) -> np.ndarray:
         
-        if not hasattr(grid, "ndim") or grid.ndim < 3 or grid.shape[2] < 2 or not positions:
-            return [(0.0, 0.0)] * len(positions)
+        h, w = grid.shape[0], grid.shape[1]
+
+        x = np.clip(x, 0.0, w - 1.0)
+        y = np.clip(y, 0.0, h - 1.0)
 
-        return [self.fit_vector_at_position(grid, x, y) for x, y in positions]
+        x0 = np.floor(x).astype(np.intp)
+        y0 = np.floor(y).astype(np.intp)
+        x1 = np.minimum(x0 + 1, w - 1)
+        y1 = np.minimum(y0 + 1, h - 1)
+
+        wx = (x - x0)[:, None]
+        wy = (y - y0)[:, None]
+
+        # gather the four corners in one pass over a flat (h*w, 2) view
+        flat = grid.reshape(h * w, grid.shape[2])[:, :2]
+        v00 = flat[y0 * w + x0]
+        v01 = flat[y0 * w + x1]
+        v10 = flat[y1 * w + x0]
+        v11 = flat[y1 * w + x1]
+
+        top = v00 + wx * (v01 - v00)
+        bottom = v10 + wx * (v11 - v10)
+        return (top + wy * (bottom - top)).astype(np.float32, copy=False)
+
+    def step_markers(self, grid: np.ndarray, x: np.ndarray, y: np.ndarray, mag: np.ndarray,
+                     vx: np.ndarray, vy: np.ndarray, dt: float = 1.0, gravity: float = 0.01,
+                     speed_factor: float = 0.9, max_speed: float = 1.0) -> None:
+        
+        # in-place marker update; same stage order as the fused OpenCL step_markers kernel
+        if not hasattr(grid, "ndim") or grid.ndim < 3 or grid.shape[2] < 2 or x.shape[0] == 0:
+            return
+
+        h, w = grid.shape[0], grid.shape[1]
+        fitted = self._bilinear_gather(grid, x, y)
+
+        # sample / mag is an acceleration, applied over dt like gravity; markers with
+        # zero magnitude do not couple to the field
+        coupled = mag != 0.0
+        vx += np.divide(fitted[:, 0], mag, out=np.zeros_like(vx), where=coupled) * dt
+        vy += np.divide(fitted[:, 1], mag, out=np.zeros_like(vy), where=coupled) * dt
+
+        # speed clamp
+        speed = np.sqrt(vx * vx + vy * vy)
+        over = speed > max_speed
+        if np.any(over):
+            scale = max_speed / speed[over]
+            vx[over] *= scale
+            vy[over] *= scale
+
+        # integrate and clamp to the grid
+        x += vx * dt
+        y += vy * dt
+        np.clip(x, 0.0, w - 1.0, out=x)
+        np.clip(y, 0.0, h - 1.0, out=y)
+
+        # gravity and damping
+        vy += gravity * dt
+        vx *= speed_factor
+        vy *= speed_factor
+
+    def cleanup(self) -> None:
+        
+        self._stencil.shutdown()
+        self._stencil.release_buffers()
+        self._spectral.clear_cache()
+        self._potential.clear_cache()
@@ -0,0 +1,133 @@
+# OpenCL profiling - rolling per-operation timings from cl.Event profiling info
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+import numpy as np
+import pyopencl as cl
+
+class KernelProfiler:
+    
+
+    def __init__(self, window: int = 256):
+        self._lock = threading.Lock()
+        self._window = max(1, int(window))
+        self._pending: Deque[Tuple[str, "cl.Event", int]] = deque()
+        self._durations: Dict[str, Deque[float]] = {}
+        self._queue_delays: Dict[str, Deque[float]] = {}
+        self._submit_delays: Dict[str, Deque[float]] = {}
+        self._bytes: Dict[str, Deque[int]] = {}
+        self._counts: Dict[str, int] = {}
+        self._total_bytes: Dict[str, int] = {}
+        self._summary: Optional[Dict[str, Any]] = None
+        self._summary_time = 0.0
+
+    def record(self, operation: str, event: Optional["cl.Event"], nbytes: int = 0) -> Optional["cl.Event"]:
+        
+        if event is None:
+            return event
+        with self._lock:
+            self._pending.append((operation, event, int(nbytes)))
+            overflow = len(self._pending) > 4 * self._window
+        if overflow:
+            # keep memory bounded if nobody reads the stats for a while
+            self.collect()
+        return event
+
+    def collect(self) -> int:
+        
+        # only completed events carry valid timestamps; the rest stay pending
+        collected = 0
+        with self._lock:
+            still_pending: Deque[Tuple[str, "cl.Event", int]] = deque()
+            while self._pending:
+                operation, event, nbytes = self._pending.popleft()
+                try:
+                    if event.command_execution_status != cl.command_execution_status.COMPLETE:
+                        still_pending.append((operation, event, nbytes))
+                        continue
+                    profile = event.profile
+                    queued, submit = profile.queued, profile.submit
+                    start, end = profile.start, profile.end
+                except Exception:
+                    # queue created without PROFILING_ENABLE; nothing to measure
+                    continue
+
+                if operation not in self._durations:
+                    self._durations[operation] = deque(maxlen=self._window)
+                    self._queue_delays[operation] = deque(maxlen=self._window)
+                    self._submit_delays[operation] = deque(maxlen=self._window)
+                    self._bytes[operation] = deque(maxlen=self._window)
+                self._durations[operation].append((end - start) * 1e-6)
+                self._queue_delays[operation].append((start - queued) * 1e-6)
+                self._submit_delays[operation].append((submit - queued) * 1e-6)
+                self._bytes[operation].append(nbytes)
+                self._counts[operation] = self._counts.get(operation, 0) + 1
+                self._total_bytes[operation] = self._total_bytes.get(operation, 0) + nbytes
+                collected += 1
+            self._pending = still_pending
+        return collected
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        
+        self.collect()
+        with self._lock:
+            result = {}
+            for operation, durations in self._durations.items():
+                samples = np.fromiter(durations, dtype=np.float64)
+                delays = np.fromiter(self._queue_delays[operation], dtype=np.float64)
+                submits = np.fromiter(self._submit_delays[operation], dtype=np.float64)
+                # everything but the counters covers the same rolling window
+                result[operation] = {
+                    "count": self._counts[operation],
+                    "mean_ms": float(samples.mean()),
+                    "p95_ms": float(np.percentile(samples, 95)),
+                    "max_ms": float(samples.max()),
+                    "window_ms": float(samples.sum()),
+                    "queue_ms": float(delays.mean()),
+                    "submit_ms": float(submits.mean()),
+                    "bytes": int(sum(self._bytes[operation])),
+                    "total_bytes": self._total_bytes[operation],
+                }
+            return result
+
+    def summary(self) -> Dict[str, Any]:
+        
+        stats = self.stats()
+        # device time over each operation's rolling window, split by kind
+        compute_ms = sum(s["window_ms"] for op, s in stats.items() if not _is_transfer(op))
+        transfer_ms = sum(s["window_ms"] for op, s in stats.items() if _is_transfer(op))
+        return {
+            "operations": stats,
+            "compute_ms": compute_ms,
+            "transfer_ms": transfer_ms,
+            "bytes": sum(s["bytes"] for s in stats.values()),
+        }
+
+    def cached_summary(self, max_age: float) -> Dict[str, Any]:
+        
+        # summary() sorts every window; callers that publish per GPU call reuse one
+        # computed within the last max_age seconds, e.g. once per frame
+        now = time.perf_counter()
+        with self._lock:
+            if self._summary is not None and now - self._summary_time < max_age:
+                return self._summary
+        summary = self.summary()
+        with self._lock:
+            self._summary, self._summary_time = summary, now
+        return summary
+
+    def reset(self) -> None:
+        
+        with self._lock:
+            self._pending.clear()
+            self._durations.clear()
+            self._queue_delays.clear()
+            self._submit_delays.clear()
+            self._bytes.clear()
+            self._counts.clear()
+            self._total_bytes.clear()
+            self._summary = None
+
+def _is_transfer(operation: str) -> bool:
+    return operation.endswith((".upload", ".download", ".fill"))
@@ -0,0 +1,584 @@
+# Device-resident GPU session - grid and marker buffers live on the device between frames
+from contextlib import contextmanager
+from typing import Iterator, Optional, Tuple
+import numpy as np
+import pyopencl as cl
+from .cl_cache import build_program
+from .gpu_async import ClFuture, PinnedReadback
+from .gpu_profiler import KernelProfiler
+from .gpu_tuning import LocalSize, fits_device, workgroup_tuner
+from ..core.config import config_manager
+
+SESSION_KERNELS = r"""
+__kernel void adjacent_sum(__global const float2* src,
+                           __global float2* dst,
+                           const int w,
+                           const int h,
+                           const float self_weight,
+                           const float neighbor_weight)
+{
+    const int x = get_global_id(0);
+    const int y = get_global_id(1);
+    if (x >= w || y >= h) {
+        return;
+    }
+
+    const int row = y * w;
+    const int up = max(y - 1, 0) * w;
+    const int down = min(y + 1, h - 1) * w;
+    const int left = max(x - 1, 0);
+    const int right = min(x + 1, w - 1);
+
+    const float2 neighbors = src[up + x] + src[down + x] + src[row + left] + src[row + right];
+    dst[row + x] = neighbors * neighbor_weight + src[row + x] * self_weight;
+}
+
+__kernel void adjacent_sum_tiled(__global const float2* src,
+                                 __global float2* dst,
+                                 const int w,
+                                 const int h,
+                                 const float self_weight,
+                                 const float neighbor_weight,
+                                 __local float2* tile)
+{
+    const int lx = get_local_id(0);
+    const int ly = get_local_id(1);
+    const int lw = get_local_size(0);
+    const int lh = get_local_size(1);
+    const int tw = lw + 2;
+    const int th = lh + 2;
+    const int ox = (int)get_group_id(0) * lw - 1;
+    const int oy = (int)get_group_id(1) * lh - 1;
+
+    // cooperative (lw+2)x(lh+2) halo load; clamped coordinates give the same
+    // edge rule as adjacent_sum, so both kernels produce identical results
+    for (int i = ly * lw + lx; i < tw * th; i += lw * lh) {
+        const int gx = clamp(ox + i % tw, 0, w - 1);
+        const int gy = clamp(oy + i / tw, 0, h - 1);
+        tile[i] = src[gy * w + gx];
+    }
+    barrier(CLK_LOCAL_MEM_FENCE);
+
+    const int x = get_global_id(0);
+    const int y = get_global_id(1);
+    if (x >= w || y >= h) {
+        return;
+    }
+
+    const int c = (ly + 1) * tw + lx + 1;
+    const float2 neighbors = tile[c - tw] + tile[c + tw] + tile[c - 1] + tile[c + 1];
+    dst[y * w + x] = neighbors * neighbor_weight + tile[c] * self_weight;
+}
+
+inline void atomic_add_float(volatile __global float* addr, const float value)
+{
+    // float add through a 32-bit compare-and-swap loop (OpenCL 1.1 core atomics)
+    union { unsigned int u; float f; } expected, desired;
+    do {
+        expected.f = *addr;
+        desired.f = expected.f + value;
+    } while (atomic_cmpxchg((volatile __global unsigned int*)addr, expected.u, desired.u) != expected.u);
+}
+
+inline void splat_bilinear(__global float* grid, float x, float y, const float value,
+                           const int channel, const int w, const int h)
+{
+    x = clamp(x, 0.0f, (float)(w - 1));
+    y = clamp(y, 0.0f, (float)(h - 1));
+    const int x0 = (int)x;
+    const int y0 = (int)y;
+    const int x1 = min(x0 + 1, w - 1);
+    const int y1 = min(y0 + 1, h - 1);
+    const float wx = x - (float)x0;
+    const float wy = y - (float)y0;
+    const float left = value * (1.0f - wx);
+    const float right = value * wx;
+
+    atomic_add_float(grid + (y0 * w + x0) * 2 + channel, left * (1.0f - wy));
+    atomic_add_float(grid + (y0 * w + x1) * 2 + channel, right * (1.0f - wy));
+    atomic_add_float(grid + (y1 * w + x0) * 2 + channel, left * wy);
+    atomic_add_float(grid + (y1 * w + x1) * 2 + channel, right * wy);
+}
+
+__kernel void splat_tiny_vectors(__global float* grid,
+                                 __global const float2* positions,
+                                 __global const float* magnitudes,
+                                 const int w,
+                                 const int h,
+                                 const int count)
+{
+    const int i = get_global_id(0);
+    if (i >= count) {
+        return;
+    }
+
+    const float x = clamp(positions[i].x, 0.0f, (float)(w - 1));
+    const float y = clamp(positions[i].y, 0.0f, (float)(h - 1));
+    const float mag = magnitudes[i];
+
+    // left/right neighbours carry only x, up/down neighbours only y
+    splat_bilinear(grid, x - 1.0f, y, -mag, 0, w, h);
+    splat_bilinear(grid, x + 1.0f, y, mag, 0, w, h);
+    splat_bilinear(grid, x, y - 1.0f, -mag, 1, w, h);
+    splat_bilinear(grid, x, y + 1.0f, mag, 1, w, h);
+}
+
+inline float2 sample_bilinear(__global const float2* grid, float2 p, const int w, const int h)
+{
+    const float x = clamp(p.x, 0.0f, (float)(w - 1));
+    const float y = clamp(p.y, 0.0f, (float)(h - 1));
+    const int x0 = (int)x;
+    const int y0 = (int)y;
+    const int x1 = min(x0 + 1, w - 1);
+    const int y1 = min(y0 + 1, h - 1);
+    const float wx = x - (float)x0;
+    const float wy = y - (float)y0;
+
+    const float2 top = mix(grid[y0 * w + x0], grid[y0 * w + x1], wx);
+    const float2 bottom = mix(grid[y1 * w + x0], grid[y1 * w + x1], wx);
+    return mix(top, bottom, wy);
+}
+
+__kernel void fit_vectors(__global const float2* grid,
+                          __global const float2* positions,
+                          __global float2* results,
+                          const int w,
+                          const int h,
+                          const int count)
+{
+    const int i = get_global_id(0);
+    if (i >= count) {
+        return;
+    }
+    results[i] = sample_bilinear(grid, positions[i], w, h);
+}
+
+__kernel void step_markers(__global const float2* grid,
+                           __global float2* positions,
+                           __global float2* velocities,
+                           __global const float* magnitudes,
+                           const int w,
+                           const int h,
+                           const int count,
+                           const float dt,
+                           const float gravity,
+                           const float speed_factor,
+                           const float max_speed)
+{
+    const int i = get_global_id(0);
+    if (i >= count) {
+        return;
+    }
+
+    float2 p = positions[i];
+    float2 v = velocities[i];
+    const float mag = magnitudes[i];
+
+    // sample / mag is an acceleration, applied over dt like gravity; markers with
+    // zero magnitude do not couple to the field
+    if (mag != 0.0f) {
+        v += sample_bilinear(grid, p, w, h) / mag * dt;
+    }
+
+    // speed clamp
+    const float speed = sqrt(v.x * v.x + v.y * v.y);
+    if (speed > max_speed) {
+        v *= max_speed / speed;
+    }
+
+    // integrate and clamp to the grid
+    p += v * dt;
+    p.x = clamp(p.x, 0.0f, (float)(w - 1));
+    p.y = clamp(p.y, 0.0f, (float)(h - 1));
+
+    // gravity and damping
+    v.y += gravity * dt;
+    v *= speed_factor;
+
+    positions[i] = p;
+    velocities[i] = v;
+}
+
+// half-precision host grids cross the bus as half and are widened on the device,
+// so every kernel above still reads and accumulates float2
+__kernel void widen_half(__global const half* src,
+                         __global float2* dst,
+                         const int count)
+{
+    const int i = get_global_id(0);
+    if (i < count) {
+        dst[i] = vload_half2(i, src);
+    }
+}
+
+__kernel void narrow_half(__global const float2* src,
+                          __global half* dst,
+                          const int count)
+{
+    const int i = get_global_id(0);
+    if (i < count) {
+        vstore_half2_rte(src[i], i, dst);
+    }
+}
+"""
+
+class GPUSession:
+    
+
+    def __init__(self, ctx: "cl.Context", queue: "cl.CommandQueue", width: int, height: int, capacity: int = 1024,
+                 profiler: Optional[KernelProfiler] = None):
+        if width <= 0 or height <= 0:
+            raise ValueError(f"invalid session grid size: {width}x{height}")
+
+        self._ctx = ctx
+        self._queue = queue
+        self._profiler = profiler
+        self._width = int(width)
+        self._height = int(height)
+
+        self._program = build_program(ctx, SESSION_KERNELS)
+        self._kernels = {
+            "adjacent_sum": cl.Kernel(self._program, "adjacent_sum"),
+            "adjacent_sum_tiled": cl.Kernel(self._program, "adjacent_sum_tiled"),
+            "fit_vectors": cl.Kernel(self._program, "fit_vectors"),
+            "step_markers": cl.Kernel(self._program, "step_markers"),
+            "splat_tiny_vectors": cl.Kernel(self._program, "splat_tiny_vectors"),
+            "widen_half": cl.Kernel(self._program, "widen_half"),
+            "narrow_half": cl.Kernel(self._program, "narrow_half"),
+        }
+
+        # front/back grid pair, allocated once for this shape; step() swaps them
+        nbytes = self._width * self._height * 2 * np.dtype(np.float32).itemsize
+        self._grid_buf = cl.Buffer(ctx, cl.mem_flags.READ_WRITE, nbytes)
+        self._back_buf = cl.Buffer(ctx, cl.mem_flags.READ_WRITE, nbytes)
+        self._track("session.fill", cl.enqueue_fill_buffer(queue, self._grid_buf, np.float32(0.0), 0, nbytes), nbytes)
+
+        self._marker_count = 0
+        self._marker_capacity = 0
+        self._positions_buf: Optional[cl.Buffer] = None
+        self._velocities_buf: Optional[cl.Buffer] = None
+        self._magnitudes_buf: Optional[cl.Buffer] = None
+        self._samples_buf: Optional[cl.Buffer] = None
+        # staging for host splat batches, separate from the resident markers
+        self._splat_capacity = 0
+        self._splat_points_buf: Optional[cl.Buffer] = None
+        self._splat_magnitudes_buf: Optional[cl.Buffer] = None
+        self._readback: Optional[PinnedReadback] = None
+        self._half_buf: Optional[cl.Buffer] = None
+        self._local_size: LocalSize = None
+        self._local_size_resolved = False
+        self._reserve_markers(max(1, int(capacity)))
+
+    def _track(self, operation: str, event: Optional["cl.Event"], nbytes: int = 0) -> Optional["cl.Event"]:
+        if self._profiler is not None:
+            self._profiler.record(operation, event, nbytes)
+        return event
+
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        return (self._height, self._width, 2)
+
+    @property
+    def queue(self) -> "cl.CommandQueue":
+        return self._queue
+
+    @property
+    def grid_buffer(self) -> "cl.Buffer":
+        return self._grid_buf
+
+    @property
+    def positions_buffer(self) -> "cl.Buffer":
+        return self._positions_buf
+
+    @property
+    def velocities_buffer(self) -> "cl.Buffer":
+        return self._velocities_buf
+
+    @property
+    def magnitudes_buffer(self) -> "cl.Buffer":
+        return self._magnitudes_buf
+
+    @property
+    def marker_count(self) -> int:
+        return self._marker_count
+
+    def _reserve_markers(self, capacity: int) -> None:
+        if capacity <= self._marker_capacity:
+            return
+
+        # marker buffers grow by doubling and are never shrunk
+        capacity = max(capacity, self._marker_capacity * 2)
+        vec_bytes = capacity * 2 * np.dtype(np.float32).itemsize
+        scalar_bytes = capacity * np.dtype(np.float32).itemsize
+        mf = cl.mem_flags
+
+        positions = cl.Buffer(self._ctx, mf.READ_WRITE, vec_bytes)
+        velocities = cl.Buffer(self._ctx, mf.READ_WRITE, vec_bytes)
+        magnitudes = cl.Buffer(self._ctx, mf.READ_WRITE, scalar_bytes)
+        samples = cl.Buffer(self._ctx, mf.READ_WRITE, vec_bytes)
+
+        if self._marker_count:
+            used_vec = self._marker_count * 2 * np.dtype(np.float32).itemsize
+            used_scalar = self._marker_count * np.dtype(np.float32).itemsize
+            cl.enqueue_copy(self._queue, positions, self._positions_buf, byte_count=used_vec)
+            cl.enqueue_copy(self._queue, velocities, self._velocities_buf, byte_count=used_vec)
+            cl.enqueue_copy(self._queue, magnitudes, self._magnitudes_buf, byte_count=used_scalar)
+
+        self._positions_buf = positions
+        self._velocities_buf = velocities
+        self._magnitudes_buf = magnitudes
+        self._samples_buf = samples
+        self._marker_capacity = capacity
+
+    def _reserve_splat(self, count: int) -> None:
+        if count <= self._splat_capacity:
+            return
+
+        # grow-only like the marker buffers; the old contents are not needed
+        capacity = max(count, self._splat_capacity * 2)
+        for buf in (self._splat_points_buf, self._splat_magnitudes_buf):
+            if buf is not None:
+                buf.release()
+        mf = cl.mem_flags
+        self._splat_points_buf = cl.Buffer(self._ctx, mf.READ_ONLY, capacity * 2 * np.dtype(np.float32).itemsize)
+        self._splat_magnitudes_buf = cl.Buffer(self._ctx, mf.READ_ONLY, capacity * np.dtype(np.float32).itemsize)
+        self._splat_capacity = capacity
+
+    def upload(self, grid: np.ndarray) -> None:
+        
+        if tuple(grid.shape) != self.shape:
+            raise ValueError(f"grid shape {grid.shape} does not match session shape {self.shape}")
+        if grid.dtype == np.float16:
+            host = np.ascontiguousarray(grid)
+            self._track("session.upload", cl.enqueue_copy(self._queue, self._get_half_buffer(), host), host.nbytes)
+            self._convert_half("widen_half", self._half_buf, self._grid_buf)
+            return
+        host = np.ascontiguousarray(grid, dtype=np.float32)
+        self._track("session.upload", cl.enqueue_copy(self._queue, self._grid_buf, host), host.nbytes)
+
+    def download(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        
+        if out is None:
+            out = np.empty(self.shape, dtype=np.float32)
+        elif tuple(out.shape) != self.shape or out.dtype not in (np.float32, np.float16) or not out.flags.c_contiguous:
+            raise ValueError("download target must be a C-contiguous float32 or float16 array of the session shape")
+        if out.dtype == np.float16:
+            # round on the device so only half the bytes cross the bus
+            self._convert_half("narrow_half", self._grid_buf, self._get_half_buffer())
+            self._track("session.download", cl.enqueue_copy(self._queue, out, self._half_buf), out.nbytes)
+            return out
+        self._track("session.download", cl.enqueue_copy(self._queue, out, self._grid_buf), out.nbytes)
+        return out
+
+    def _get_half_buffer(self) -> "cl.Buffer":
+        if self._half_buf is None:
+            nbytes = self._width * self._height * 2 * np.dtype(np.float16).itemsize
+            self._half_buf = cl.Buffer(self._ctx, cl.mem_flags.READ_WRITE, nbytes)
+        return self._half_buf
+
+    def _convert_half(self, name: str, src: "cl.Buffer", dst: "cl.Buffer") -> "cl.Event":
+        count = self._width * self._height
+        kernel = self._kernels[name]
+        kernel.set_args(src, dst, np.int32(count))
+        return self._track(name, cl.enqueue_nd_range_kernel(self._queue, kernel, (count,), None))
+
+    @contextmanager
+    def map(self, writable: bool = False) -> Iterator[np.ndarray]:
+        
+        # maps the resident grid into host memory; writes are pushed back on exit
+        flags = cl.map_flags.READ | (cl.map_flags.WRITE if writable else 0)
+        mapped, _ = cl.enqueue_map_buffer(self._queue, self._grid_buf, flags, 0, self.shape, np.float32)
+        try:
+            if not writable:
+                mapped.flags.writeable = False
+            yield mapped
+        finally:
+            mapped.base.release(self._queue)
+
+    def set_markers(self, positions: np.ndarray, velocities: Optional[np.ndarray] = None,
+                    magnitudes: Optional[np.ndarray] = None) -> None:
+
+        positions = np.ascontiguousarray(positions, dtype=np.float32).reshape(-1, 2)
+        count = positions.shape[0]
+        if velocities is None:
+            velocities = np.zeros((count, 2), dtype=np.float32)
+        if magnitudes is None:
+            magnitudes = np.ones(count, dtype=np.float32)
+        velocities = np.ascontiguousarray(velocities, dtype=np.float32).reshape(-1, 2)
+        magnitudes = np.ascontiguousarray(magnitudes, dtype=np.float32).reshape(-1)
+        if velocities.shape[0] != count or magnitudes.shape[0] != count:
+            raise ValueError("positions, velocities and magnitudes must have the same length")
+
+        self._marker_count = 0
+        self._reserve_markers(count)
+        if count:
+            self._track("markers.upload", cl.enqueue_copy(self._queue, self._positions_buf, positions), positions.nbytes)
+            self._track("markers.upload", cl.enqueue_copy(self._queue, self._velocities_buf, velocities), velocities.nbytes)
+            self._track("markers.upload", cl.enqueue_copy(self._queue, self._magnitudes_buf, magnitudes), magnitudes.nbytes)
+        self._marker_count = count
+
+    def download_markers(self) -> Tuple[np.ndarray, np.ndarray]:
+        
+        positions = np.empty((self._marker_count, 2), dtype=np.float32)
+        velocities = np.empty((self._marker_count, 2), dtype=np.float32)
+        if self._marker_count:
+            self._track("markers.download", cl.enqueue_copy(self._queue, positions, self._positions_buf), positions.nbytes)
+            self._track("markers.download", cl.enqueue_copy(self._queue, velocities, self._velocities_buf), velocities.nbytes)
+        return positions, velocities
+
+    @property
+    def local_size(self) -> LocalSize:
+        return self._local_size
+
+    @local_size.setter
+    def local_size(self, local_size: LocalSize) -> None:
+        # pins the stencil work-group shape and skips tuning; None is the untiled kernel
+        self._local_size = None if local_size is None else (int(local_size[0]), int(local_size[1]))
+        self._local_size_resolved = True
+
+    def _launch_adjacent_sum(self, local_size: LocalSize, self_weight: float, neighbor_weight: float) -> "cl.Event":
+        # always front -> back: no work item reads a cell another one is writing
+        args = (self._grid_buf, self._back_buf, np.int32(self._width), np.int32(self._height),
+                np.float32(self_weight), np.float32(neighbor_weight))
+        if local_size is None:
+            kernel = self._kernels["adjacent_sum"]
+            kernel.set_args(*args)
+            return cl.enqueue_nd_range_kernel(self._queue, kernel, (self._width, self._height), None)
+
+        lw, lh = local_size
+        kernel = self._kernels["adjacent_sum_tiled"]
+        kernel.set_args(*args, cl.LocalMemory((lw + 2) * (lh + 2) * 2 * np.dtype(np.float32).itemsize))
+        global_size = (-(-self._width // lw) * lw, -(-self._height // lh) * lh)
+        return cl.enqueue_nd_range_kernel(self._queue, kernel, global_size, local_size)
+
+    def _resolve_local_size(self, self_weight: float, neighbor_weight: float) -> LocalSize:
+        if self._local_size_resolved:
+            return self._local_size
+
+        if config_manager.get("compute_workgroup_tuning", True):
+            device = self._queue.device
+            tiled = self._kernels["adjacent_sum_tiled"]
+            # tuning runs write only the back buffer, which the next step overwrites anyway
+            self._local_size = workgroup_tuner.choose(
+                device, "adjacent_sum_tiled", (self._width, self._height),
+                lambda local_size: self._launch_adjacent_sum(local_size, self_weight, neighbor_weight),
+                lambda local_size: fits_device(local_size, device, tiled))
+        self._local_size_resolved = True
+        return self._local_size
+
+    def step(self, iterations: int = 1, self_weight: float = 1.0, neighbor_weight: float = 0.1) -> Optional["cl.Event"]:
+        
+        local_size = self._resolve_local_size(self_weight, neighbor_weight)
+        event = None
+        for _ in range(int(iterations)):
+            event = self._track("adjacent_sum", self._launch_adjacent_sum(local_size, self_weight, neighbor_weight))
+            self._grid_buf, self._back_buf = self._back_buf, self._grid_buf
+        return event
+
+    def sample_markers(self) -> np.ndarray:
+        
+        results = np.zeros((self._marker_count, 2), dtype=np.float32)
+        if not self._marker_count:
+            return results
+
+        kernel = self._kernels["fit_vectors"]
+        kernel.set_args(self._grid_buf, self._positions_buf, self._samples_buf,
+                        np.int32(self._width), np.int32(self._height), np.int32(self._marker_count))
+        self._track("fit_vectors", cl.enqueue_nd_range_kernel(self._queue, kernel, (self._marker_count,), None))
+        self._track("fit_vectors.download", cl.enqueue_copy(self._queue, results, self._samples_buf), results.nbytes)
+        return results
+
+    def splat_markers(self) -> Optional["cl.Event"]:
+        
+        # tiny vectors for every resident marker, accumulated in place with float atomics
+        if not self._marker_count:
+            return None
+
+        kernel = self._kernels["splat_tiny_vectors"]
+        kernel.set_args(self._grid_buf, self._positions_buf, self._magnitudes_buf,
+                        np.int32(self._width), np.int32(self._height), np.int32(self._marker_count))
+        return self._track("splat_tiny_vectors", cl.enqueue_nd_range_kernel(self._queue, kernel, (self._marker_count,), None))
+
+    def splat_tiny_vectors(self, positions: np.ndarray) -> Optional["cl.Event"]:
+        
+        # host (N, 3) x, y, mag batch; only the N entries are uploaded, never the grid
+        positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+        count = positions.shape[0]
+        if not count:
+            return None
+
+        points = np.ascontiguousarray(positions[:, :2])
+        magnitudes = np.ascontiguousarray(positions[:, 2])
+        self._reserve_splat(count)
+        points_buf, magnitudes_buf = self._splat_points_buf, self._splat_magnitudes_buf
+        self._track("splat_tiny_vectors.upload", cl.enqueue_copy(self._queue, points_buf, points), points.nbytes)
+        self._track("splat_tiny_vectors.upload", cl.enqueue_copy(self._queue, magnitudes_buf, magnitudes), magnitudes.nbytes)
+
+        kernel = self._kernels["splat_tiny_vectors"]
+        kernel.set_args(self._grid_buf, points_buf, magnitudes_buf,
+                        np.int32(self._width), np.int32(self._height), np.int32(count))
+        return self._track("splat_tiny_vectors", cl.enqueue_nd_range_kernel(self._queue, kernel, (count,), None))
+
+    def step_markers(self, dt: float = 1.0, gravity: float = 0.01, speed_factor: float = 0.9,
+                     max_speed: float = 1.0) -> Optional["cl.Event"]:
+        
+        # one launch over the resident marker buffers; nothing is read back
+        if not self._marker_count:
+            return None
+
+        kernel = self._kernels["step_markers"]
+        kernel.set_args(self._grid_buf, self._positions_buf, self._velocities_buf, self._magnitudes_buf,
+                        np.int32(self._width), np.int32(self._height), np.int32(self._marker_count),
+                        np.float32(dt), np.float32(gravity), np.float32(speed_factor), np.float32(max_speed))
+        return self._track("step_markers", cl.enqueue_nd_range_kernel(self._queue, kernel, (self._marker_count,), None))
+
+    def download_async(self) -> ClFuture:
+        
+        # non-blocking readback into one of two pinned host buffers; the array a
+        # future resolves to stays valid until the second download_async after it
+        if self._readback is None:
+            self._readback = PinnedReadback(self._ctx, self._queue, self.shape, np.float32)
+        future = self._readback.read(self._grid_buf)
+        for event in future.events:
+            self._track("session.download", event, self._width * self._height * 2 * np.dtype(np.float32).itemsize)
+        self._queue.flush()
+        return future
+
+    def download_markers_async(self) -> ClFuture:
+        
+        positions = np.empty((self._marker_count, 2), dtype=np.float32)
+        velocities = np.empty((self._marker_count, 2), dtype=np.float32)
+        events = []
+        if self._marker_count:
+            events.append(cl.enqueue_copy(self._queue, positions, self._positions_buf, is_blocking=False))
+            events.append(cl.enqueue_copy(self._queue, velocities, self._velocities_buf, is_blocking=False))
+            for event in events:
+                self._track("markers.download", event, positions.nbytes)
+            self._queue.flush()
+        return ClFuture(events, lambda: (positions, velocities))
+
+    def flush(self) -> None:
+        
+        # submit queued commands without waiting, so the device runs while the host renders
+        self._queue.flush()
+
+    def finish(self) -> None:
+        
+        self._queue.finish()
+
+    def release(self) -> None:
+        
+        if self._readback is not None:
+            self._readback.release()
+            self._readback = None
+        for buf in (self._grid_buf, self._back_buf, self._half_buf, self._positions_buf,
+                    self._velocities_buf, self._magnitudes_buf, self._samples_buf,
+                    self._splat_points_buf, self._splat_magnitudes_buf):
+            if buf is not None:
+                buf.release()
+        self._grid_buf = self._back_buf = self._half_buf = None
+        self._positions_buf = self._velocities_buf = self._magnitudes_buf = self._samples_buf = None
+        self._splat_points_buf = self._splat_magnitudes_buf = None
+        self._splat_capacity = 0
+        self._marker_count = 0
+        self._marker_capacity = 0
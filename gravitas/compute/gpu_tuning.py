@@ -0,0 +1,119 @@
+# Work-group tuning - measured local sizes for tiled OpenCL kernels, cached per device
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Sequence, Tuple
+import pyopencl as cl
+from .cache import cache_dir, load_json, save_json_entry
+
+LocalSize = Optional[Tuple[int, int]]
+
+# None is the untiled kernel with a driver-chosen local size
+DEFAULT_CANDIDATES: Tuple[LocalSize, ...] = (
+    None, (8, 8), (16, 8), (16, 16), (32, 4), (32, 8), (64, 4), (8, 32),
+)
+
+def default_tuning_path() -> str:
+    
+    return os.environ.get("GRAVITAS_WORKGROUP_FILE") or os.path.join(cache_dir(), "workgroups.json")
+
+def fits_device(local_size: LocalSize, device: "cl.Device", kernel: Optional["cl.Kernel"] = None,
+                local_bytes_per_item: int = 8, halo: int = 1) -> bool:
+
+    if local_size is None:
+        return True
+    lw, lh = local_size
+    limit = device.max_work_group_size
+    if kernel is not None:
+        limit = min(limit, kernel.get_work_group_info(cl.kernel_work_group_info.WORK_GROUP_SIZE, device))
+    if lw * lh > limit:
+        return False
+    sizes = device.max_work_item_sizes
+    if lw > sizes[0] or lh > sizes[1]:
+        return False
+    return (lw + 2 * halo) * (lh + 2 * halo) * local_bytes_per_item <= device.local_mem_size
+
+class WorkGroupTuner:
+    
+
+    def __init__(self, path: Optional[str] = None, candidates: Sequence[LocalSize] = DEFAULT_CANDIDATES,
+                 repeats: int = 3):
+        self._path = path
+        self._lock = threading.RLock()
+        self._candidates = tuple(candidates)
+        self._repeats = max(1, int(repeats))
+        self._choices: Dict[str, LocalSize] = {}
+        self._loaded = False
+
+    @property
+    def path(self) -> str:
+        return self._path or default_tuning_path()
+
+    @staticmethod
+    def cache_key(device: "cl.Device", kernel_name: str, shape: Tuple[int, int]) -> str:
+        
+        return f"{device.platform.name}|{device.name}|{device.driver_version}|{kernel_name}|{shape[0]}x{shape[1]}"
+
+    def choose(self, device: "cl.Device", kernel_name: str, shape: Tuple[int, int],
+               run: Callable[[LocalSize], "cl.Event"],
+               fits: Callable[[LocalSize], bool] = lambda local_size: True) -> LocalSize:
+
+        key = self.cache_key(device, kernel_name, shape)
+        with self._lock:
+            if not self._loaded:
+                self._choices.update(self._load())
+                self._loaded = True
+            if key in self._choices:
+                return self._choices[key]
+
+        candidates = [c for c in self._candidates if fits(c)]
+        choice = self.tune(candidates, run)
+        print(f"[GPUcompute] {kernel_name} {shape[0]}x{shape[1]} work-group: {choice or 'untiled'}")
+
+        with self._lock:
+            self._choices[key] = choice
+            self._save(key, choice)
+        return choice
+
+    def tune(self, candidates: Sequence[LocalSize], run: Callable[[LocalSize], "cl.Event"]) -> LocalSize:
+        
+        best, best_time = None, float("inf")
+        for candidate in candidates:
+            try:
+                # warm-up absorbs first-launch costs, then best of N
+                run(candidate).wait()
+                elapsed = float("inf")
+                for _ in range(self._repeats):
+                    t0 = time.perf_counter()
+                    run(candidate).wait()
+                    elapsed = min(elapsed, time.perf_counter() - t0)
+            except cl.Error as e:
+                # a shape the runtime rejects is simply not a candidate
+                print(f"[GPUcompute] work-group {candidate} rejected: {e}")
+                continue
+            if elapsed < best_time:
+                best, best_time = candidate, elapsed
+        return best
+
+    def _load(self) -> Dict[str, LocalSize]:
+        choices: Dict[str, LocalSize] = {}
+        for key, value in load_json(self.path).items():
+            if value is None:
+                choices[key] = None
+            elif isinstance(value, list) and len(value) == 2:
+                choices[key] = (int(value[0]), int(value[1]))
+        return choices
+
+    def _save(self, key: str, choice: LocalSize) -> None:
+        try:
+            save_json_entry(self.path, key, list(choice) if choice is not None else None)
+        except OSError as e:
+            print(f"[GPUcompute] failed to save work-group choice: {e}")
+
+    def invalidate(self) -> None:
+        
+        with self._lock:
+            self._choices.clear()
+            self._loaded = False
+
+workgroup_tuner = WorkGroupTuner()
@@ -1,9 +1,72 @@
 
+import weakref
 import numpy as np
 import pyopencl as cl
-from typing import Tuple, Union, List, Optional, Any
+from typing import Tuple, Union, List, Optional, Any, Dict
+from ..core.config import config_manager
 from ..core.state import state_manager
 from ..core.events import Event, EventType, event_bus
+from .gpu_session import GPUSession
+from .gpu_async import ClFuture
+from .cl_cache import build_program
+from .gpu_profiler import KernelProfiler
+from .precision import storage_dtype
+from .active_tiles import active_tiles_for
+
+SUM_ADJACENT_KERNEL = r"""
+__kernel void sum_adjacent_vectors(__global const float2* grid,
+                                   __global float2* result,
+                                   const int w,
+                                   const int h,
+                                   const int x,
+                                   const int y,
+                                   const float self_weight,
+                                   const float neighbor_weight)
+{
+    // every cell is computed so the result buffer is fully defined; the host
+    // reads back (x, y). Neighbours outside the grid contribute nothing
+    const int gx = get_global_id(0);
+    const int gy = get_global_id(1);
+    if (gx >= w || gy >= h) {
+        return;
+    }
+
+    float2 sum = grid[gy * w + gx] * self_weight;
+    if (gy > 0) sum += grid[(gy - 1) * w + gx] * neighbor_weight;
+    if (gy < h - 1) sum += grid[(gy + 1) * w + gx] * neighbor_weight;
+    if (gx > 0) sum += grid[gy * w + gx - 1] * neighbor_weight;
+    if (gx < w - 1) sum += grid[gy * w + gx + 1] * neighbor_weight;
+    result[gy * w + gx] = sum;
+}
+"""
+
+FIT_VECTORS_KERNEL = r"""
+__kernel void fit_vectors_at_positions_batch_kernel(__global const float2* grid,
+                                                    __global const float2* positions,
+                                                    __global float2* results,
+                                                    const int w,
+                                                    const int h,
+                                                    const int count)
+{
+    const int i = get_global_id(0);
+    if (i >= count) {
+        return;
+    }
+
+    const float x = clamp(positions[i].x, 0.0f, (float)(w - 1));
+    const float y = clamp(positions[i].y, 0.0f, (float)(h - 1));
+    const int x0 = (int)x;
+    const int y0 = (int)y;
+    const int x1 = min(x0 + 1, w - 1);
+    const int y1 = min(y0 + 1, h - 1);
+    const float wx = x - (float)x0;
+    const float wy = y - (float)y0;
+
+    const float2 top = mix(grid[y0 * w + x0], grid[y0 * w + x1], wx);
+    const float2 bottom = mix(grid[y1 * w + x0], grid[y1 * w + x1], wx);
+    results[i] = mix(top, bottom, wy);
+}
+"""
 
 class GPUVectorFieldCalculator:
     
@@ -14,6 +77,11 @@ class GPUVectorFieldCalculator:
         self._queue = None
         self._programs = {}
         self._kernels = {}
+        self._sessions = {}
+        # (width, height) -> (host grid ref, its tile map, write count) the scratch
+        # session's device grid was last read back into
+        self._resident: Dict[Tuple[int, int], Tuple["weakref.ref", Any, int]] = {}
+        self._profiler: Optional[KernelProfiler] = None
         self._initialized = False
 
         # initializeOpenCL
@@ -35,7 +103,12 @@ class GPUVectorFieldCalculator:
                     raise RuntimeError("not foundavailableOpenCLdevice")
 
             self._ctx = cl.Context(devices)
-            self._queue = cl.CommandQueue(self._ctx)
+            # profiling timestamps cost a little per command, so they are opt-in
+            if config_manager.get("compute_profiling", False):
+                self._queue = cl.CommandQueue(self._ctx, properties=cl.command_queue_properties.PROFILING_ENABLE)
+                self._profiler = KernelProfiler()
+            else:
+                self._queue = cl.CommandQueue(self._ctx)
 
             self._compile_programs()
 
@@ -59,23 +132,11 @@ class GPUVectorFieldCalculator:
 
     def _compile_programs(self) -> None:
         
-        sum_adjacent_kernel = 
-
-        update_grid_kernel = 
-
-        create_tiny_vectors_batch_kernel = 
-
-        fit_vectors_at_positions_batch_kernel = 
-
         try:
-            self._programs['sum_adjacent_vectors'] = cl.Program(self._ctx, sum_adjacent_kernel).build()
-            self._programs['update_grid_with_adjacent_sum'] = cl.Program(self._ctx, update_grid_kernel).build()
-            self._programs['create_tiny_vectors_batch'] = cl.Program(self._ctx, create_tiny_vectors_batch_kernel).build()
-            self._programs['fit_vectors_at_positions_batch'] = cl.Program(self._ctx, fit_vectors_at_positions_batch_kernel).build()
+            self._programs['sum_adjacent_vectors'] = build_program(self._ctx, SUM_ADJACENT_KERNEL)
+            self._programs['fit_vectors_at_positions_batch'] = build_program(self._ctx, FIT_VECTORS_KERNEL)
 
             self._kernels['sum_adjacent_vectors'] = cl.Kernel(self._programs['sum_adjacent_vectors'], 'sum_adjacent_vectors')
-            self._kernels['update_grid_with_adjacent_sum'] = cl.Kernel(self._programs['update_grid_with_adjacent_sum'], 'update_grid_with_adjacent_sum')
-            self._kernels['create_tiny_vectors_batch'] = cl.Kernel(self._programs['create_tiny_vectors_batch'], 'create_tiny_vectors_batch_kernel')
             self._kernels['fit_vectors_at_positions_batch'] = cl.Kernel(self._programs['fit_vectors_at_positions_batch'], 'fit_vectors_at_positions_batch_kernel')
         except Exception as e:
             print(f"[GPUcompute] OpenCLprogramcompilefail: {e}")
@@ -94,20 +155,24 @@ class GPUVectorFieldCalculator:
             raise TypeError("grid mustis numpy.ndarray type")
 
         h, w = grid.shape[:2]
+        grid = np.ascontiguousarray(grid, dtype=np.float32)
 
         result = np.zeros((h, w, 2), dtype=np.float32)
 
-        grid_buf = cl.Buffer(self._ctx, cl.mem_flags.READ_ONLY | cl.mem_flags.COPY_HOST_PTR, hostbuf=grid)
+        grid_buf = cl.Buffer(self._ctx, cl.mem_flags.READ_ONLY, grid.nbytes)
         result_buf = cl.Buffer(self._ctx, cl.mem_flags.WRITE_ONLY, result.nbytes)
+        self._track("sum_adjacent_vectors.upload", cl.enqueue_copy(self._queue, grid_buf, grid), grid.nbytes)
 
         self._kernels['sum_adjacent_vectors'].set_args(
             grid_buf, result_buf,
             np.int32(w), np.int32(h), np.int32(x), np.int32(y),
             np.float32(self_weight), np.float32(neighbor_weight)
         )
-        cl.enqueue_nd_range_kernel(self._queue, self._kernels['sum_adjacent_vectors'], (w, h), None)
+        self._track("sum_adjacent_vectors",
+                    cl.enqueue_nd_range_kernel(self._queue, self._kernels['sum_adjacent_vectors'], (w, h), None))
 
-        cl.enqueue_copy(self._queue, result, result_buf)
+        self._track("sum_adjacent_vectors.download", cl.enqueue_copy(self._queue, result, result_buf), result.nbytes)
+        self._publish_profile("sum_adjacent_vectors")
 
         return (result[y, x, 0], result[y, x, 1])
 
@@ -125,21 +190,69 @@ class GPUVectorFieldCalculator:
         neighbor_weight = self._state_manager.get("vector_neighbor_weight", 0.1)
         self_weight = self._state_manager.get("vector_self_weight", 1.0)
 
-        grid_buf = cl.Buffer(self._ctx, cl.mem_flags.READ_WRITE | cl.mem_flags.COPY_HOST_PTR, hostbuf=grid)
+        # the in-place kernel read neighbours other work items were already
+        # writing; the session stencil reads the front buffer and writes the back one
+        session = self._resident_session(grid)
+        session.step(1, self_weight, neighbor_weight)
+        self._read_back(session, grid)
+        self._publish_profile("update_grid_with_adjacent_sum")
 
-        self._kernels['update_grid_with_adjacent_sum'].set_args(
-            grid_buf, np.int32(w), np.int32(h),
-            np.float32(self_weight), np.float32(neighbor_weight)
-        )
-        cl.enqueue_nd_range_kernel(self._queue, self._kernels['update_grid_with_adjacent_sum'], (w, h), None)
+        return grid
+
+    def iterate(self, grid: np.ndarray, iterations: Optional[int] = None, method: str = "auto") -> np.ndarray:
+        
+        if not self._initialized:
+            raise RuntimeError("GPUcomputeinitialize")
+
+        if grid is None or not isinstance(grid, np.ndarray):
+            return grid
+        if method not in ("auto", "direct"):
+            raise ValueError(f"unknown iterate method: {method}")
+
+        if iterations is None:
+            iterations = config_manager.get("compute_iterations", 1)
+        iterations = int(iterations)
+        if iterations <= 0:
+            return grid
+
+        neighbor_weight = self._state_manager.get("vector_neighbor_weight", 0.1)
+        self_weight = self._state_manager.get("vector_self_weight", 1.0)
 
-        cl.enqueue_copy(self._queue, grid, grid_buf)
+        # all k steps swap between the session's two device buffers: one upload
+        # (skipped while the grid is resident) and one download for the whole batch
+        session = self._resident_session(grid)
+        session.step(iterations, self_weight, neighbor_weight)
+        self._read_back(session, grid)
+        self._publish_profile("iterate")
 
         return grid
 
+    def update_grid_with_adjacent_sum_async(self, grid: np.ndarray) -> ClFuture:
+        
+        if not self._initialized:
+            raise RuntimeError("GPUcomputeinitialize")
+
+        h, w = grid.shape[:2]
+
+        neighbor_weight = self._state_manager.get("vector_neighbor_weight", 0.1)
+        self_weight = self._state_manager.get("vector_self_weight", 1.0)
+
+        # returns once the work is queued; result() waits on the readback event and
+        # copies the pinned buffer into grid. Until then the device is ahead of the host
+        session = self._resident_session(grid)
+        session.step(1, self_weight, neighbor_weight)
+
+        def finish(result: np.ndarray) -> np.ndarray:
+            np.copyto(grid, result)
+            self._remember_resident(grid)
+            self._publish_profile("update_grid_with_adjacent_sum_async")
+            return grid
+
+        return session.download_async().then(finish)
+
     def create_vector_grid(self, width: int = 640, height: int = 480, default: Tuple[float, float] = (0, 0)) -> np.ndarray:
         
-        grid = np.zeros((height, width, 2), dtype=np.float32)
+        grid = np.zeros((height, width, 2), dtype=storage_dtype())
         if default != (0, 0):
             grid[:, :, 0] = default[0]
             grid[:, :, 1] = default[1]
@@ -163,34 +276,54 @@ class GPUVectorFieldCalculator:
                 if abs(dx) + abs(dy) == 1:
                     self.add_vector_at_position(grid, x + dx, y + dy, dx * mag, dy * mag)
 
-    def create_tiny_vectors_batch(self, grid: np.ndarray, positions: List[Tuple[float, float, float]]) -> None:
+    def create_tiny_vectors_batch(self, grid: np.ndarray, positions: Union[np.ndarray, List[Tuple[float, float, float]]]) -> None:
         
         if not self._initialized:
             raise RuntimeError("GPUcomputeinitialize")
 
-        if not hasattr(grid, "ndim") or not positions:
+        if not hasattr(grid, "ndim") or len(positions) == 0:
             return
 
-        h, w = grid.shape[0], grid.shape[1]
-        num_positions = len(positions)
-
-        positions_array = np.array(positions, dtype=np.float32).flatten()
+        # scatter straight into the device copy of the grid with float atomics;
+        # callers that keep the grid resident use GPUSession.splat_tiny_vectors
+        session = self._resident_session(grid)
+        session.splat_tiny_vectors(positions)
+        self._read_back(session, grid)
+        self._publish_profile("create_tiny_vectors_batch")
 
-        temp_grid_flat = np.zeros((h * w * 2,), dtype=np.float32)
-
-        temp_grid_buf = cl.Buffer(self._ctx, cl.mem_flags.WRITE_ONLY, temp_grid_flat.nbytes)
-        positions_buf = cl.Buffer(self._ctx, cl.mem_flags.READ_ONLY | cl.mem_flags.COPY_HOST_PTR, hostbuf=positions_array)
-
-        self._kernels['create_tiny_vectors_batch'].set_args(
-            temp_grid_buf, positions_buf,
-            np.int32(w), np.int32(h), np.int32(num_positions)
-        )
-        cl.enqueue_nd_range_kernel(self._queue, self._kernels['create_tiny_vectors_batch'], (num_positions,), None)
-
-        cl.enqueue_copy(self._queue, temp_grid_flat, temp_grid_buf)
+    def _get_scratch_session(self, width: int, height: int) -> GPUSession:
+        
+        session = self._sessions.get((width, height))
+        if session is None:
+            session = GPUSession(self._ctx, self._queue, width, height, profiler=self._profiler)
+            self._sessions[(width, height)] = session
+        return session
 
-        temp_grid = temp_grid_flat.reshape((h, w, 2))
-        grid += temp_grid
+    def _resident_session(self, grid: np.ndarray) -> GPUSession:
+        
+        # the scratch session keeps the grid between calls. A tracked grid whose tile
+        # map has seen no writes since the last readback is already on the device, so
+        # only the download remains per call. Untracked grids are always uploaded
+        h, w = grid.shape[0], grid.shape[1]
+        session = self._get_scratch_session(w, h)
+        held = self._resident.pop((w, h), None)
+        tiles = active_tiles_for(grid)
+        if (held is None or tiles is None or held[0]() is not grid
+                or held[1] is not tiles or held[2] != tiles.writes):
+            session.upload(grid)
+        return session
+
+    def _read_back(self, session: GPUSession, grid: np.ndarray) -> None:
+        if grid.dtype in (np.float32, np.float16) and grid.flags.c_contiguous:
+            session.download(grid)
+        else:
+            grid[...] = session.download()
+        self._remember_resident(grid)
+
+    def _remember_resident(self, grid: np.ndarray) -> None:
+        tiles = active_tiles_for(grid)
+        if tiles is not None:
+            self._resident[(grid.shape[1], grid.shape[0])] = (weakref.ref(grid), tiles, tiles.writes)
 
     def add_vector_at_position(self, grid: np.ndarray, x: float, y: float, vx: float, vy: float) -> None:
         
@@ -259,39 +392,119 @@ class GPUVectorFieldCalculator:
         vx = (1 - wx) * (1 - wy) * v00[0] + wx * (1 - wy) * v01[0] + (1 - wx) * wy * v10[0] + wx * wy * v11[0]
         vy = (1 - wx) * (1 - wy) * v00[1] + wx * (1 - wy) * v01[1] + (1 - wx) * wy * v10[1] + wx * wy * v11[1]
 
-        return (vx, vy)
+        return (float(vx), float(vy))
 
     def fit_vectors_at_positions_batch(self, grid: np.ndarray, positions: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
         
         if not self._initialized:
             raise RuntimeError("GPUcomputeinitialize")
 
-        if not hasattr(grid, "ndim") or grid.ndim < 3 or grid.shape[2] < 2 or not positions:
+        if not hasattr(grid, "ndim") or grid.ndim < 3 or grid.shape[2] < 2 or len(positions) == 0:
             return [(0.0, 0.0)] * len(positions)
 
-        h, w = grid.shape[0], grid.shape[1]
-        num_positions = len(positions)
+        results = self.fit_vectors_at_positions_array(grid, positions)
+
+        return [(results[i, 0], results[i, 1]) for i in range(results.shape[0])]
+
+    def step_markers(self, grid: np.ndarray, x: np.ndarray, y: np.ndarray, mag: np.ndarray,
+                     vx: np.ndarray, vy: np.ndarray, dt: float = 1.0, gravity: float = 0.01,
+                     speed_factor: float = 0.9, max_speed: float = 1.0) -> None:
+        
+        if not self._initialized:
+            raise RuntimeError("GPUcomputeinitialize")
+
+        if not hasattr(grid, "ndim") or grid.ndim < 3 or grid.shape[2] < 2 or x.shape[0] == 0:
+            return
+
+        # the fused kernel samples the resident grid and moves every marker in one
+        # launch; only the marker arrays cross the bus once the grid is resident
+        session = self._resident_session(grid)
+        session.set_markers(np.column_stack((x, y)), np.column_stack((vx, vy)), mag)
+        session.step_markers(dt, gravity, speed_factor, max_speed)
+        positions, velocities = session.download_markers()
+        x[:] = positions[:, 0]
+        y[:] = positions[:, 1]
+        vx[:] = velocities[:, 0]
+        vy[:] = velocities[:, 1]
+        # the kernel only reads the grid, so the device copy still matches the host
+        self._remember_resident(grid)
+        self._publish_profile("step_markers")
+
+    def fit_vectors_at_positions_array(self, grid: np.ndarray, positions: Union[np.ndarray, List[Tuple[float, float]]]) -> np.ndarray:
+        
+        if not self._initialized:
+            raise RuntimeError("GPUcomputeinitialize")
 
-        positions_array = np.array(positions, dtype=np.float32).flatten()
+        positions_array = np.ascontiguousarray(positions, dtype=np.float32).reshape(-1, 2)
+        num_positions = positions_array.shape[0]
 
         results = np.zeros((num_positions, 2), dtype=np.float32)
 
-        grid_buf = cl.Buffer(self._ctx, cl.mem_flags.READ_ONLY | cl.mem_flags.COPY_HOST_PTR, hostbuf=grid)
-        positions_buf = cl.Buffer(self._ctx, cl.mem_flags.READ_ONLY | cl.mem_flags.COPY_HOST_PTR, hostbuf=positions_array)
+        if not hasattr(grid, "ndim") or grid.ndim < 3 or grid.shape[2] < 2 or num_positions == 0:
+            return results
+
+        h, w = grid.shape[0], grid.shape[1]
+
+        grid = np.ascontiguousarray(grid, dtype=np.float32)
+        grid_buf = cl.Buffer(self._ctx, cl.mem_flags.READ_ONLY, grid.nbytes)
+        positions_buf = cl.Buffer(self._ctx, cl.mem_flags.READ_ONLY, positions_array.nbytes)
         results_buf = cl.Buffer(self._ctx, cl.mem_flags.WRITE_ONLY, results.nbytes)
+        self._track("fit_vectors_at_positions_batch.upload", cl.enqueue_copy(self._queue, grid_buf, grid), grid.nbytes)
+        self._track("fit_vectors_at_positions_batch.upload",
+                    cl.enqueue_copy(self._queue, positions_buf, positions_array), positions_array.nbytes)
 
         self._kernels['fit_vectors_at_positions_batch'].set_args(
             grid_buf, positions_buf, results_buf,
             np.int32(w), np.int32(h), np.int32(num_positions)
         )
-        cl.enqueue_nd_range_kernel(self._queue, self._kernels['fit_vectors_at_positions_batch'], (num_positions,), None)
+        self._track("fit_vectors_at_positions_batch",
+                    cl.enqueue_nd_range_kernel(self._queue, self._kernels['fit_vectors_at_positions_batch'], (num_positions,), None))
+
+        self._track("fit_vectors_at_positions_batch.download", cl.enqueue_copy(self._queue, results, results_buf), results.nbytes)
+        self._publish_profile("fit_vectors_at_positions_batch")
 
-        cl.enqueue_copy(self._queue, results, results_buf)
+        return results
 
-        return [(results[i, 0], results[i, 1]) for i in range(num_positions)]
+    def create_session(self, width: int, height: int, capacity: int = 1024) -> GPUSession:
+        
+        if not self._initialized:
+            raise RuntimeError("GPUcomputeinitialize")
+
+        return GPUSession(self._ctx, self._queue, width, height, capacity, profiler=self._profiler)
+
+    @property
+    def profiler(self) -> Optional[KernelProfiler]:
+        return self._profiler
+
+    def profile_stats(self) -> Dict[str, Dict[str, Any]]:
+        
+        if self._profiler is None:
+            return {}
+        return self._profiler.stats()
+
+    def _track(self, operation: str, event: Optional["cl.Event"], nbytes: int = 0) -> Optional["cl.Event"]:
+        if self._profiler is not None:
+            self._profiler.record(operation, event, nbytes)
+        return event
+
+    def _publish_profile(self, operation: str) -> None:
+        if self._profiler is None:
+            return
+        # the summary is recomputed at most once per frame, not on every GPU call
+        target_fps = config_manager.get("target_fps", 60)
+        max_age = 1.0 / target_fps if target_fps and target_fps > 0 else 0.0
+        self._event_bus.publish(Event(
+            EventType.GPU_COMPUTE_COMPLETED,
+            {"device": "gpu", "operation": operation, "profile": self._profiler.cached_summary(max_age)},
+            "GPUVectorFieldCalculator"
+        ))
 
     def cleanup(self) -> None:
         
+        for session in self._sessions.values():
+            session.release()
+        self._sessions.clear()
+        self._resident.clear()
         if self._ctx:
             del self._ctx
         if self._queue:
@@ -0,0 +1,180 @@
+# Multigrid solver - steady state of the weighted-neighbour stencil in O(N) work per V-cycle
+import threading
+from typing import List, Optional, Tuple
+import numpy as np
+
+class _Level:
+    __slots__ = ("height", "width", "diagonal", "ax", "ay", "jacobi")
+
+    def __init__(self, height: int, width: int, diagonal: float, ax: float, ay: float):
+        self.height = height
+        self.width = width
+        # operator: diagonal * u - ax * (left + right) - ay * (up + down), edge clamped
+        self.diagonal = diagonal
+        self.ax = ax
+        self.ay = ay
+
+        # damped Jacobi weights; clamped edges put part of the neighbour sum on the diagonal
+        effective = np.full((height, width, 1), diagonal)
+        if width > 1:
+            effective[:, 0] -= ax
+            effective[:, -1] -= ax
+        if height > 1:
+            effective[0] -= ay
+            effective[-1] -= ay
+        self.jacobi = np.divide(1.0, effective, out=np.zeros_like(effective), where=effective != 0)
+
+def _neighbors_x(u: np.ndarray) -> np.ndarray:
+    out = np.empty_like(u)
+    out[:, 1:] = u[:, :-1]
+    out[:, 0] = u[:, 0]
+    out[:, :-1] += u[:, 1:]
+    out[:, -1] += u[:, -1]
+    return out
+
+def _neighbors_y(u: np.ndarray) -> np.ndarray:
+    out = np.empty_like(u)
+    out[1:] = u[:-1]
+    out[0] = u[0]
+    out[:-1] += u[1:]
+    out[-1] += u[-1]
+    return out
+
+def _restrict(r: np.ndarray) -> np.ndarray:
+    # 2x2 cell average; an odd trailing row/column is repeated so it averages with itself
+    h, w = r.shape[0], r.shape[1]
+    if h > 1:
+        if h % 2:
+            r = np.concatenate((r, r[-1:]), axis=0)
+        r = 0.5 * (r[0::2] + r[1::2])
+    if w > 1:
+        if w % 2:
+            r = np.concatenate((r, r[:, -1:]), axis=1)
+        r = 0.5 * (r[:, 0::2] + r[:, 1::2])
+    return r
+
+def _prolong_axis(e: np.ndarray, n: int, axis: int) -> np.ndarray:
+    # cell-centred linear interpolation: fine cells 2J and 2J+1 take 3/4 of coarse J
+    # and 1/4 of the coarse neighbour on their side (clamped at the edges)
+    e = np.moveaxis(e, axis, 0)
+    before = np.concatenate((e[:1], e[:-1]), axis=0)
+    after = np.concatenate((e[1:], e[-1:]), axis=0)
+    fine = np.empty((2 * e.shape[0],) + e.shape[1:], dtype=e.dtype)
+    fine[0::2] = 0.75 * e + 0.25 * before
+    fine[1::2] = 0.75 * e + 0.25 * after
+    return np.moveaxis(fine[:n], 0, axis)
+
+class MultigridSolver:
+    
+
+    def __init__(self, tolerance: float = 1e-6, max_cycles: int = 50, pre_smooth: int = 2,
+                 post_smooth: int = 2, coarsest: int = 8, omega: float = 0.8):
+        self._lock = threading.Lock()
+        self.tolerance = float(tolerance)
+        self.max_cycles = int(max_cycles)
+        self._pre_smooth = int(pre_smooth)
+        self._post_smooth = int(post_smooth)
+        self._coarsest = max(2, int(coarsest))
+        self._omega = float(omega)
+        self._coarse_inverse: Optional[Tuple[tuple, np.ndarray]] = None
+        self.last_cycles = 0
+        self.last_residual = 0.0
+
+    @staticmethod
+    def spectral_radius(height: int, width: int, self_weight: float, neighbor_weight: float) -> float:
+        
+        # extreme eigenvalues of the edge-clamped stencil (see SpectralStencil.gain)
+        low = 2.0 * np.cos(np.pi * (height - 1) / height) + 2.0 * np.cos(np.pi * (width - 1) / width)
+        return max(abs(self_weight + 4.0 * neighbor_weight), abs(self_weight + neighbor_weight * low))
+
+    def _levels(self, height: int, width: int, self_weight: float, neighbor_weight: float) -> List[_Level]:
+        # rediscretised hierarchy: each halving of an axis quarters its coupling
+        levels = [_Level(height, width, 1.0 - self_weight, neighbor_weight, neighbor_weight)]
+        constant = 1.0 - self_weight - 4.0 * neighbor_weight
+        while max(height, width) > self._coarsest:
+            ax, ay = levels[-1].ax, levels[-1].ay
+            if width > 1:
+                width, ax = (width + 1) // 2, ax / 4.0
+            if height > 1:
+                height, ay = (height + 1) // 2, ay / 4.0
+            levels.append(_Level(height, width, constant + 2.0 * (ax + ay), ax, ay))
+        return levels
+
+    @staticmethod
+    def _apply(level: _Level, u: np.ndarray) -> np.ndarray:
+        return level.diagonal * u - level.ax * _neighbors_x(u) - level.ay * _neighbors_y(u)
+
+    def _smooth(self, level: _Level, u: np.ndarray, b: np.ndarray, sweeps: int) -> np.ndarray:
+        step = self._omega * level.jacobi
+        for _ in range(sweeps):
+            u = u + step * (b - self._apply(level, u))
+        return u
+
+    def _coarse_solve(self, level: _Level, b: np.ndarray) -> np.ndarray:
+        key = (level.height, level.width, level.diagonal, level.ax, level.ay)
+        if self._coarse_inverse is None or self._coarse_inverse[0] != key:
+            n = level.height * level.width
+            basis = np.eye(n).reshape(level.height, level.width, n)
+            matrix = self._apply(level, basis).reshape(n, n)
+            # pseudo-inverse: the pure-Neumann case is singular in the constant mode
+            self._coarse_inverse = (key, np.linalg.pinv(matrix))
+        inverse = self._coarse_inverse[1]
+        channels = b.shape[2]
+        return (inverse @ b.reshape(-1, channels)).reshape(b.shape)
+
+    def _v_cycle(self, levels: List[_Level], depth: int, u: np.ndarray, b: np.ndarray) -> np.ndarray:
+        level = levels[depth]
+        if depth == len(levels) - 1:
+            return self._coarse_solve(level, b)
+
+        u = self._smooth(level, u, b, self._pre_smooth)
+        residual = b - self._apply(level, u)
+        coarse = levels[depth + 1]
+        correction = self._v_cycle(levels, depth + 1, np.zeros((coarse.height, coarse.width, u.shape[2])),
+                                   _restrict(residual))
+        if coarse.height != level.height:
+            correction = _prolong_axis(correction, level.height, 0)
+        if coarse.width != level.width:
+            correction = _prolong_axis(correction, level.width, 1)
+        u = u + correction
+        return self._smooth(level, u, b, self._post_smooth)
+
+    def solve(self, source: np.ndarray, self_weight: float, neighbor_weight: float,
+              tolerance: Optional[float] = None, max_cycles: Optional[int] = None) -> np.ndarray:
+
+        # fixed point of u <- stencil(u) + source, i.e. (I - A) u = source
+        h, w = source.shape[0], source.shape[1]
+        if neighbor_weight <= 0.0:
+            raise ValueError("multigrid solve needs a positive neighbor weight")
+        radius = self.spectral_radius(h, w, self_weight, neighbor_weight)
+        critical = abs(1.0 - self_weight - 4.0 * neighbor_weight) < 1e-12
+        if radius > 1.0 + 1e-12 or (radius >= 1.0 - 1e-12 and not critical):
+            raise ValueError(f"stencil iteration does not converge for these weights (spectral radius {radius:.4f})")
+
+        tolerance = self.tolerance if tolerance is None else float(tolerance)
+        max_cycles = self.max_cycles if max_cycles is None else int(max_cycles)
+
+        b = source.reshape(h, w, -1).astype(np.float64)
+        if critical:
+            # self + 4 * neighbor == 1 keeps the mean: under the stencil it grows without
+            # bound, so only the mean-free part of the field has a steady state
+            b = b - b.mean(axis=(0, 1), keepdims=True)
+
+        with self._lock:
+            levels = self._levels(h, w, self_weight, neighbor_weight)
+            u = np.zeros_like(b)
+            norm = np.linalg.norm(b)
+            residual = 0.0
+            cycles = 0
+            if norm > 0.0:
+                for cycles in range(1, max_cycles + 1):
+                    u = self._v_cycle(levels, 0, u, b)
+                    if critical:
+                        u -= u.mean(axis=(0, 1), keepdims=True)
+                    residual = float(np.linalg.norm(b - self._apply(levels[0], u)) / norm)
+                    if residual <= tolerance:
+                        break
+            self.last_cycles = cycles
+            self.last_residual = residual
+
+        return u.reshape(source.shape)
@@ -0,0 +1,126 @@
+# Potential field - marker density convolved with a long-range kernel via real FFTs
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple, Union
+import numpy as np
+
+Kernel = Union[str, np.ndarray]
+
+def splat_density(height: int, width: int, x: np.ndarray, y: np.ndarray, mass: np.ndarray) -> np.ndarray:
+    
+    # cloud-in-cell: each marker spreads its mass over the four surrounding cells
+    x = np.clip(np.asarray(x, dtype=np.float64).reshape(-1), 0.0, width - 1.0)
+    y = np.clip(np.asarray(y, dtype=np.float64).reshape(-1), 0.0, height - 1.0)
+    mass = np.asarray(mass, dtype=np.float64).reshape(-1)
+
+    x0 = x.astype(np.intp)
+    y0 = y.astype(np.intp)
+    x1 = np.minimum(x0 + 1, width - 1)
+    y1 = np.minimum(y0 + 1, height - 1)
+    wx = x - x0
+    wy = y - y0
+
+    index = np.concatenate((y0 * width + x0, y0 * width + x1, y1 * width + x0, y1 * width + x1))
+    weights = np.concatenate((mass * (1 - wx) * (1 - wy), mass * wx * (1 - wy),
+                              mass * (1 - wx) * wy, mass * wx * wy))
+    return np.bincount(index, weights=weights, minlength=height * width).reshape(height, width)
+
+def _displacements(height: int, width: int) -> Tuple[np.ndarray, np.ndarray]:
+    # signed offsets of the 2h x 2w zero-padded domain in wrap-around order, so the
+    # circular convolution equals the open-boundary linear convolution on the grid
+    dy = np.fft.fftfreq(2 * height, 1.0 / (2 * height))
+    dx = np.fft.fftfreq(2 * width, 1.0 / (2 * width))
+    return dy[:, None], dx[None, :]
+
+def kernel_array(height: int, width: int, kernel: Kernel = "inverse_r", scale: float = 1.0) -> np.ndarray:
+    
+    dy, dx = _displacements(height, width)
+    if isinstance(kernel, np.ndarray):
+        # a user array is centred on its middle cell and may be at most the padded size
+        kh, kw = kernel.shape[:2]
+        if kh > 2 * height or kw > 2 * width:
+            raise ValueError(f"kernel {kw}x{kh} is larger than the padded grid {2 * width}x{2 * height}")
+        values = np.zeros((2 * height, 2 * width))
+        rows = (np.arange(kh) - kh // 2) % (2 * height)
+        cols = (np.arange(kw) - kw // 2) % (2 * width)
+        values[np.ix_(rows, cols)] = kernel
+        return values
+    if kernel == "inverse_r":
+        # softened 1/r; `scale` is the softening length, which keeps the centre finite
+        return 1.0 / np.sqrt(dx * dx + dy * dy + scale * scale)
+    if kernel == "gaussian":
+        # `scale` is the standard deviation in cells
+        return np.exp(-(dx * dx + dy * dy) / (2.0 * scale * scale))
+    raise ValueError(f"unknown field kernel: {kernel}")
+
+class PotentialField:
+    
+
+    def __init__(self, max_cached: int = 4):
+        self._lock = threading.Lock()
+        self._spectra: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        self._max_cached = max(1, int(max_cached))
+        self._custom: Optional[np.ndarray] = None
+
+    def set_custom_kernel(self, kernel: Optional[np.ndarray]) -> None:
+        
+        self._custom = None if kernel is None else np.array(kernel, dtype=np.float64)
+
+    def _resolve(self, kernel: Kernel) -> Kernel:
+        if isinstance(kernel, str) and kernel == "custom":
+            if self._custom is None:
+                raise ValueError("field kernel 'custom' requested but no custom kernel is set")
+            return self._custom
+        if isinstance(kernel, np.ndarray):
+            return np.asarray(kernel, dtype=np.float64)
+        return kernel
+
+    def spectrum(self, height: int, width: int, kernel: Kernel = "inverse_r", scale: float = 1.0) -> np.ndarray:
+        
+        kernel = self._resolve(kernel)
+        if isinstance(kernel, np.ndarray):
+            tag = ("array", kernel.shape, hashlib.sha1(kernel.tobytes()).hexdigest())
+        else:
+            tag = (kernel, float(scale))
+        key = (int(height), int(width)) + tag
+        with self._lock:
+            cached = self._spectra.get(key)
+            if cached is not None:
+                self._spectra.move_to_end(key)
+                return cached
+
+        # negative central difference of the kernel in x and y: convolving the density
+        # with these gives -grad(potential) directly, so one forward transform and one
+        # stacked inverse cover both components
+        values = kernel_array(height, width, kernel, scale)
+        grad_x = 0.5 * (np.roll(values, 1, axis=1) - np.roll(values, -1, axis=1))
+        grad_y = 0.5 * (np.roll(values, 1, axis=0) - np.roll(values, -1, axis=0))
+        spectrum = np.fft.rfft2(np.stack((grad_x, grad_y)))
+
+        with self._lock:
+            self._spectra[key] = spectrum
+            while len(self._spectra) > self._max_cached:
+                self._spectra.popitem(last=False)
+        return spectrum
+
+    def potential(self, density: np.ndarray, kernel: Kernel = "inverse_r", scale: float = 1.0) -> np.ndarray:
+        
+        h, w = density.shape
+        values = kernel_array(h, w, self._resolve(kernel), scale)
+        padded = np.fft.rfft2(density, s=(2 * h, 2 * w))
+        return np.fft.irfft2(padded * np.fft.rfft2(values), s=(2 * h, 2 * w))[:h, :w]
+
+    def field(self, density: np.ndarray, kernel: Kernel = "inverse_r", scale: float = 1.0) -> np.ndarray:
+        
+        # (h, w, 2) vectors pointing down the potential, i.e. away from positive mass
+        h, w = density.shape
+        spectrum = self.spectrum(h, w, kernel, scale)
+        padded = np.fft.rfft2(density, s=(2 * h, 2 * w))
+        components = np.fft.irfft2(spectrum * padded, s=(2 * h, 2 * w))
+        return np.moveaxis(components[:, :h, :w], 0, -1)
+
+    def clear_cache(self) -> None:
+        
+        with self._lock:
+            self._spectra.clear()
@@ -0,0 +1,20 @@
+# Grid precision - storage dtype from config, float32 accumulation for narrower storage
+from typing import Optional
+import numpy as np
+from ..core.config import config_manager
+
+STORAGE_DTYPES = {"float32": np.float32, "float16": np.float16}
+
+def storage_dtype(name: Optional[str] = None) -> np.dtype:
+    
+    if name is None:
+        name = config_manager.get("grid_dtype", "float32")
+    try:
+        return np.dtype(STORAGE_DTYPES[str(name)])
+    except KeyError:
+        raise ValueError(f"unsupported grid dtype: {name}") from None
+
+def accumulation_dtype(dtype) -> np.dtype:
+    
+    # arithmetic on half-precision grids is carried out in float32 and rounded once on store
+    return np.promote_types(np.dtype(dtype), np.float32)
@@ -0,0 +1,288 @@
+# Tiled stencil engine - row-band parallel adjacent sum with persistent buffers
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+from .precision import accumulation_dtype
+
+class TiledStencil:
+    
+
+    def __init__(self, workers: int = 0, min_band_rows: int = 64):
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_workers = 0
+        self._workers = self._resolve_workers(workers)
+        self._min_band_rows = max(1, int(min_band_rows))
+        self._buffers: Dict[Tuple[Tuple[int, ...], np.dtype], List[np.ndarray]] = {}
+
+    @staticmethod
+    def _resolve_workers(workers: int) -> int:
+        workers = int(workers or 0)
+        if workers <= 0:
+            workers = os.cpu_count() or 1
+        return workers
+
+    @property
+    def workers(self) -> int:
+        return self._workers
+
+    def set_workers(self, workers: int) -> None:
+        
+        self._workers = self._resolve_workers(workers)
+
+    def buffers(self, shape: Tuple[int, ...], dtype=np.float32, count: int = 2) -> List[np.ndarray]:
+        
+        # [back, scratch, ...], allocated once per grid shape and reused every step
+        key = (tuple(shape), np.dtype(dtype))
+        with self._lock:
+            pair = self._buffers.setdefault(key, [])
+            while len(pair) < count:
+                pair.append(np.empty(shape, dtype=dtype))
+            return pair[:count]
+
+    def release_buffers(self) -> None:
+        
+        with self._lock:
+            self._buffers.clear()
+
+    def apply(self, grid: np.ndarray, self_weight: float, neighbor_weight: float) -> np.ndarray:
+        
+        return self.iterate(grid, 1, self_weight, neighbor_weight)
+
+    def iterate(self, grid: np.ndarray, iterations: int, self_weight: float, neighbor_weight: float) -> np.ndarray:
+        
+        # ping-pong between the caller's grid and the persistent back buffer,
+        # copying back at most once at the end
+        work = accumulation_dtype(grid.dtype)
+        back, _ = self.buffers(grid.shape, work)
+        if work == grid.dtype:
+            front = grid
+        else:
+            # half-precision storage: the first step reads the grid, later steps
+            # ping-pong in float32 and the result is rounded once on the way back
+            front = self.buffers(grid.shape, work, count=3)[2]
+        src, dst = grid, back
+        for _ in range(int(iterations)):
+            self.step(src, dst, self_weight, neighbor_weight)
+            src, dst = dst, (front if dst is back else back)
+
+        if src is not grid:
+            np.copyto(grid, src)
+        return grid
+
+    def step(self, src: np.ndarray, dst: np.ndarray, self_weight: float, neighbor_weight: float) -> np.ndarray:
+        
+        if src is dst:
+            raise ValueError("stencil source and destination must be different buffers")
+
+        h = src.shape[0]
+        _, scratch = self.buffers(dst.shape, dst.dtype)
+        bands = self._bands(h)
+
+        if len(bands) == 1:
+            self._step_band(src, dst, scratch, 0, h, self_weight, neighbor_weight)
+            return dst
+
+        executor = self._get_executor()
+        futures = [
+            executor.submit(self._step_band, src, dst, scratch, y0, y1, self_weight, neighbor_weight)
+            for y0, y1 in bands
+        ]
+        for future in futures:
+            future.result()
+        return dst
+
+    def _bands(self, h: int) -> List[Tuple[int, int]]:
+        count = max(1, min(self._workers, h // self._min_band_rows))
+        edges = np.linspace(0, h, count + 1).astype(int)
+        return [(int(edges[i]), int(edges[i + 1])) for i in range(count)]
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None or self._executor_workers != self._workers:
+                if self._executor is not None:
+                    self._executor.shutdown(wait=True)
+                self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="gravitas-stencil")
+                self._executor_workers = self._workers
+            return self._executor
+
+    @staticmethod
+    def _step_band(src: np.ndarray, dst: np.ndarray, scratch: np.ndarray, y0: int, y1: int,
+                   self_weight: float, neighbor_weight: float) -> None:
+        TiledStencil._step_region(src, dst, scratch, y0, y1, 0, src.shape[1], self_weight, neighbor_weight)
+
+    @staticmethod
+    def _step_region(src: np.ndarray, dst: np.ndarray, scratch: np.ndarray, y0: int, y1: int, x0: int, x1: int,
+                     self_weight: float, neighbor_weight: float) -> None:
+        # dst[y0:y1, x0:x1] from src with a one-cell halo; out-of-range neighbours clamp to the edge
+        h, w = src.shape[0], src.shape[1]
+        out = dst[y0:y1, x0:x1]
+        center = src[y0:y1, x0:x1]
+
+        # up neighbours (one-row halo above the region)
+        if y0 > 0:
+            np.copyto(out, src[y0 - 1:y1 - 1, x0:x1])
+        else:
+            out[0] = src[0, x0:x1]
+            np.copyto(out[1:], src[0:y1 - 1, x0:x1])
+
+        # down neighbours (one-row halo below the region)
+        if y1 < h:
+            out += src[y0 + 1:y1 + 1, x0:x1]
+        else:
+            out[:-1] += src[y0 + 1:h, x0:x1]
+            out[-1] += src[h - 1, x0:x1]
+
+        # left neighbours (one-column halo)
+        if x0 > 0:
+            out += src[y0:y1, x0 - 1:x1 - 1]
+        else:
+            out[:, 1:] += center[:, :-1]
+            out[:, 0] += center[:, 0]
+
+        # right neighbours
+        if x1 < w:
+            out += src[y0:y1, x0 + 1:x1 + 1]
+        else:
+            out[:, :-1] += center[:, 1:]
+            out[:, -1] += center[:, -1]
+
+        out *= neighbor_weight
+        if self_weight:
+            weighted = scratch[y0:y1, x0:x1]
+            np.multiply(center, self_weight, out=weighted, dtype=weighted.dtype)
+            out += weighted
+
+    def apply_regions(self, grid: np.ndarray, regions: List[Tuple[int, int, int, int]],
+                      self_weight: float, neighbor_weight: float) -> np.ndarray:
+        
+        # one step over the given (y0, y1, x0, x1) rectangles only; cells outside them
+        # keep their value, which is exact when those cells and their neighbours are zero
+        back, scratch = self.buffers(grid.shape, accumulation_dtype(grid.dtype))
+        for y0, y1, x0, x1 in regions:
+            self._step_region(grid, back, scratch, y0, y1, x0, x1, self_weight, neighbor_weight)
+        # every region reads the untouched grid before any result is copied back
+        for y0, y1, x0, x1 in regions:
+            grid[y0:y1, x0:x1] = back[y0:y1, x0:x1]
+        return grid
+
+    def apply_banded(self, grid: np.ndarray, self_weight: float, neighbor_weight: float,
+                     band_rows: int = 256, on_band: Optional[Callable[[int, int], None]] = None) -> np.ndarray:
+        
+        # one step with O(band_rows * width) working memory, for memory-mapped grids that
+        # do not fit in RAM. Bands are written back in place, so the last original row of
+        # each band is kept aside as the upper halo of the next
+        h = grid.shape[0]
+        band_rows = max(1, int(band_rows))
+        work = accumulation_dtype(grid.dtype)
+        above = None
+        for y0 in range(0, h, band_rows):
+            y1 = min(h, y0 + band_rows)
+            lo, hi = max(0, y0 - 1), min(h, y1 + 1)
+            block = np.array(grid[lo:hi], dtype=work)
+            if above is not None:
+                block[0] = above
+            above = block[y1 - 1 - lo].copy()
+
+            out = np.empty_like(block)
+            scratch = np.empty_like(block)
+            # the block's outer rows are real grid edges or halos, so its clamping matches the full grid
+            self._step_region(block, out, scratch, y0 - lo, y1 - lo, 0, block.shape[1], self_weight, neighbor_weight)
+            grid[y0:y1] = out[y0 - lo:y1 - lo]
+            if on_band is not None:
+                on_band(y0, y1)
+        return grid
+
+    def shutdown(self) -> None:
+        
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+                self._executor_workers = 0
+
+def _dct(x: np.ndarray) -> np.ndarray:
+    # unnormalized DCT-II along the last axis, via one real FFT of the same length (Makhoul)
+    n = x.shape[-1]
+    v = np.concatenate((x[..., ::2], x[..., 1::2][..., ::-1]), axis=-1)
+    spectrum = np.fft.rfft(v, axis=-1)
+    spectrum *= np.exp(-0.5j * np.pi * np.arange(spectrum.shape[-1]) / n).astype(spectrum.dtype)
+
+    result = np.empty(x.shape, dtype=spectrum.real.dtype)
+    result[..., :spectrum.shape[-1]] = spectrum.real
+    tail = (n - 1) // 2
+    if tail:
+        result[..., n - tail:] = -spectrum[..., tail:0:-1].imag
+    return result
+
+def _idct(coefficients: np.ndarray) -> np.ndarray:
+    # exact inverse of _dct
+    n = coefficients.shape[-1]
+    half = n // 2 + 1
+
+    spectrum = np.empty(coefficients.shape[:-1] + (half,), dtype=np.result_type(coefficients.dtype, np.complex64))
+    spectrum.real = coefficients[..., :half]
+    spectrum.imag[..., 0] = 0.0
+    spectrum.imag[..., 1:] = -coefficients[..., n - 1:n - half:-1]
+    spectrum *= np.exp(0.5j * np.pi * np.arange(half) / n).astype(spectrum.dtype)
+    v = np.fft.irfft(spectrum, n=n, axis=-1)
+
+    result = np.empty(coefficients.shape, dtype=v.dtype)
+    split = (n + 1) // 2
+    result[..., ::2] = v[..., :split]
+    result[..., 1::2] = v[..., split:][..., ::-1]
+    return result
+
+class SpectralStencil:
+    
+
+    def __init__(self, max_cached: int = 4):
+        self._lock = threading.Lock()
+        self._gains: "OrderedDict[Tuple[int, int, float, float, int], np.ndarray]" = OrderedDict()
+        self._max_cached = max(1, int(max_cached))
+
+    def gain(self, height: int, width: int, self_weight: float, neighbor_weight: float, iterations: int) -> np.ndarray:
+        
+        # the edge-clamped adjacent sum is diagonal in the DCT-II basis, with
+        # eigenvalue self + neighbor * (2cos(pi*k/h) + 2cos(pi*l/w)) per mode;
+        # k steps multiply each mode by that eigenvalue to the k-th power
+        key = (int(height), int(width), float(self_weight), float(neighbor_weight), int(iterations))
+        with self._lock:
+            cached = self._gains.get(key)
+            if cached is not None:
+                self._gains.move_to_end(key)
+                return cached
+
+        rows = 2.0 * np.cos(np.pi * np.arange(height) / height)
+        cols = 2.0 * np.cos(np.pi * np.arange(width) / width)
+        symbol = self_weight + neighbor_weight * (rows[:, None] + cols[None, :])
+        gain = np.power(symbol, int(iterations))
+
+        with self._lock:
+            self._gains[key] = gain
+            while len(self._gains) > self._max_cached:
+                self._gains.popitem(last=False)
+        return gain
+
+    def iterate(self, grid: np.ndarray, iterations: int, self_weight: float, neighbor_weight: float) -> np.ndarray:
+        
+        h, w = grid.shape[0], grid.shape[1]
+        gain = self.gain(h, w, self_weight, neighbor_weight, iterations)
+
+        # channel-first so every transform runs along a contiguous last axis;
+        # transforms stay in the grid's precision where NumPy's FFT supports it
+        planes = np.ascontiguousarray(np.moveaxis(grid, (0, 1), (-2, -1)), dtype=accumulation_dtype(grid.dtype))
+        coefficients = np.ascontiguousarray(np.swapaxes(_dct(planes), -1, -2))
+        coefficients = _dct(coefficients)
+        coefficients *= gain.T.astype(coefficients.dtype, copy=False)
+        planes = np.swapaxes(_idct(coefficients), -1, -2)
+        grid[...] = np.moveaxis(_idct(np.ascontiguousarray(planes)), (-2, -1), (0, 1))
+        return grid
+
+    def clear_cache(self) -> None:
+        
+        with self._lock:
+            self._gains.clear()
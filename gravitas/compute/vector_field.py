@@ -4,8 +4,9 @@ from typing import Tuple, Union, List, Optional, Any
 from ..core.config import config_manager
 from ..core.events import Event, EventType, event_bus, EventHandler
 from ..core.state import state_manager
-from .cpu_vector_field import CPUVectorFieldCalculator
-from .gpu_vector_field import GPUVectorFieldCalculator
+from .backends import BackendRegistry, backend_registry
+from .calibration import DeviceCalibrator
+from .active_tiles import ActiveTiles, active_tiles_for, track_activity
 
 class VectorFieldCalculator(EventHandler):
     
@@ -14,14 +15,9 @@ class VectorFieldCalculator(EventHandler):
         self._state_manager = state_manager
         self._config_manager = config_manager
 
-        self._cpu_calculator = CPUVectorFieldCalculator()
-        self._gpu_calculator = None
-
-        try:
-            self._gpu_calculator = GPUVectorFieldCalculator()
-            print("[vector fieldcompute] GPUcomputeinitializesuccess")
-        except Exception as e:
-            print(f"[vector fieldcompute] GPUcomputeinitializefail: {e}")
+        # backends are created on first use through the registry
+        self._backends: BackendRegistry = backend_registry
+        self._calibrator = DeviceCalibrator()
 
         self._current_device = self._config_manager.get("compute_device", "cpu")
 
@@ -29,6 +25,43 @@ class VectorFieldCalculator(EventHandler):
         self._event_bus.subscribe(EventType.APP_INITIALIZED, self)
         self._event_bus.subscribe(EventType.CONFIG_CHANGED, self)
 
+    @property
+    def _cpu_calculator(self):
+        return self._backends.get("cpu")
+
+    @property
+    def _gpu_calculator(self):
+        return self._backends.get("gpu")
+
+    @property
+    def backends(self) -> BackendRegistry:
+        return self._backends
+
+    @property
+    def calibrator(self) -> DeviceCalibrator:
+        return self._calibrator
+
+    def _calculator_for(self, operation: str, size: int, cells: Optional[int] = None):
+        
+        # "auto" routes each call to whichever backend calibration measured faster at this
+        # size; marker operations also pass the grid area, which dominates their GPU cost
+        if self._current_device == "auto":
+            gpu = self._gpu_calculator
+            if gpu is not None and self._calibrator.choose(operation, size, self._cpu_calculator, gpu, cells) == "gpu":
+                return gpu
+            return self._cpu_calculator
+
+        return self._gpu_calculator if self._current_device == "gpu" and self._gpu_calculator else self._cpu_calculator
+
+    def calibrate(self, force: bool = False) -> Optional[dict]:
+        
+        gpu = self._gpu_calculator
+        if gpu is None:
+            return None
+        if force:
+            return self._calibrator.calibrate(self._cpu_calculator, gpu)
+        return self._calibrator.ensure(self._cpu_calculator, gpu)
+
     @property
     def current_device(self) -> str:
         
@@ -36,7 +69,7 @@ class VectorFieldCalculator(EventHandler):
 
     def set_device(self, device: str) -> bool:
         
-        if device not in ["cpu", "gpu"]:
+        if device not in ["cpu", "gpu", "auto"]:
             return False
 
         if device == "gpu" and self._gpu_calculator is None:
@@ -73,12 +106,102 @@ class VectorFieldCalculator(EventHandler):
 
     def update_grid_with_adjacent_sum(self, grid: np.ndarray) -> np.ndarray:
         
+        if grid is None or not isinstance(grid, np.ndarray):
+            return grid
+
+        # tracked grids are sized and processed by their dirty tiles, not their area
+        tiles = active_tiles_for(grid)
+        if tiles is None:
+            calculator = self._calculator_for("update_grid_with_adjacent_sum", grid.shape[0] * grid.shape[1])
+            return calculator.update_grid_with_adjacent_sum(grid)
+
+        calculator = self._calculator_for("update_grid_with_adjacent_sum", tiles.active_cells())
+        regions = tiles.regions(halo=1)
+        if hasattr(calculator, "update_grid_regions"):
+            grid = calculator.update_grid_regions(grid, regions)
+        else:
+            grid = calculator.update_grid_with_adjacent_sum(grid)
+        self._host_written(calculator, tiles)
+        # values spread at most one cell per step, into the halo around each dirty run
+        tiles.refresh(grid, regions)
+        return grid
+
+    def _host_written(self, calculator, tiles: ActiveTiles) -> None:
+        
+        # the GPU backend records the write count after its own readback; any other
+        # backend changed the grid behind that device copy, which must be re-uploaded
+        if calculator is not self._backends.loaded().get("gpu"):
+            tiles.touch()
+
+    def iterate(self, grid: np.ndarray, iterations: Optional[int] = None, method: str = "auto") -> np.ndarray:
+        
+        if grid is None or not isinstance(grid, np.ndarray):
+            return grid
+
+        if iterations is None:
+            iterations = self._config_manager.get("compute_iterations", 1)
+        iterations = int(iterations)
+        if iterations <= 0:
+            return grid
+
+        tiles = active_tiles_for(grid)
+        if tiles is not None:
+            sparse = self._calculator_for("update_grid_with_adjacent_sum", tiles.active_cells())
+            if method != "fft" and tiles.fraction() < 0.5 and hasattr(sparse, "update_grid_regions"):
+                # values spread one cell per step, so all k steps stay inside the dirty
+                # runs grown by k cells: the regions are derived once, refreshed once
+                regions = tiles.regions(halo=iterations)
+                for _ in range(iterations):
+                    grid = sparse.update_grid_regions(grid, regions)
+                self._host_written(sparse, tiles)
+                tiles.refresh(grid, regions)
+                return grid
+            # a dense pass can leave values anywhere
+            tiles.mark_all()
+
+        calculator = self._gpu_calculator if self._current_device == "gpu" and self._gpu_calculator else self._cpu_calculator
+        if method == "fft":
+            # the spectral path is host-side only
+            calculator = self._cpu_calculator
+
+        if hasattr(calculator, "iterate"):
+            return calculator.iterate(grid, iterations, method)
+
+        for _ in range(int(iterations)):
+            grid = calculator.update_grid_with_adjacent_sum(grid)
+        return grid
+
+    def update_grid_in_bands(self, grid: np.ndarray, band_rows: int = 256) -> np.ndarray:
+        
+        if grid is None or not isinstance(grid, np.ndarray):
+            return grid
+
+        # out-of-core stepping is host-side by nature: a grid that does not fit in
+        # RAM does not fit in device memory either
+        grid = self._cpu_calculator.update_grid_in_bands(grid, band_rows)
+
+        tiles = active_tiles_for(grid)
+        if tiles is not None:
+            tiles.mark_all()
+        return grid
+
+    def solve_steady_state(self, grid: np.ndarray, tolerance: Optional[float] = None,
+                           max_cycles: Optional[int] = None) -> np.ndarray:
+        
         if grid is None or not isinstance(grid, np.ndarray):
             return grid
 
         calculator = self._gpu_calculator if self._current_device == "gpu" and self._gpu_calculator else self._cpu_calculator
+        if not hasattr(calculator, "solve_steady_state"):
+            calculator = self._cpu_calculator
+
+        grid = calculator.solve_steady_state(grid, tolerance, max_cycles)
 
-        return calculator.update_grid_with_adjacent_sum(grid)
+        tiles = active_tiles_for(grid)
+        if tiles is not None:
+            # the solution is dense
+            tiles.mark_all()
+        return grid
 
     def create_vector_grid(self, width: int = 640, height: int = 480, default: Tuple[float, float] = (0, 0)) -> np.ndarray:
         
@@ -92,9 +215,20 @@ class VectorFieldCalculator(EventHandler):
 
         calculator.create_tiny_vector(grid, x, y, mag)
 
-    def create_tiny_vectors_batch(self, grid: np.ndarray, positions: List[Tuple[float, float, float]]) -> None:
+        tiles = active_tiles_for(grid)
+        if tiles is not None:
+            tiles.mark_points(x, y, radius=1)
+
+    def create_tiny_vectors_batch(self, grid: np.ndarray, positions: Union[np.ndarray, List[Tuple[float, float, float]]]) -> None:
         
-        calculator = self._gpu_calculator if self._current_device == "gpu" and self._gpu_calculator else self._cpu_calculator
+        calculator = self._calculator_for("create_tiny_vectors_batch", len(positions), grid.shape[0] * grid.shape[1])
+
+        # marked before the write: a GPU backend that keeps the grid resident records
+        # the tile map's write count after its readback, and must not see its own splat
+        tiles = active_tiles_for(grid)
+        if tiles is not None and len(positions):
+            points = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+            tiles.mark_points(points[:, 0], points[:, 1], radius=1)
 
         if hasattr(calculator, 'create_tiny_vectors_batch'):
             calculator.create_tiny_vectors_batch(grid, positions)
@@ -108,20 +242,94 @@ class VectorFieldCalculator(EventHandler):
 
         calculator.add_vector_at_position(grid, x, y, vx, vy)
 
+        tiles = active_tiles_for(grid)
+        if tiles is not None:
+            tiles.mark_points(x, y)
+
+    def add_vectors_at_positions_batch(self, grid: np.ndarray, positions: Union[np.ndarray, List[Tuple[float, float]]],
+                                       vectors: Union[np.ndarray, List[Tuple[float, float]]]) -> None:
+        
+        calculator = self._gpu_calculator if self._current_device == "gpu" and self._gpu_calculator else self._cpu_calculator
+
+        if hasattr(calculator, 'add_vectors_at_positions_batch'):
+            calculator.add_vectors_at_positions_batch(grid, positions, vectors)
+        else:
+            self._cpu_calculator.add_vectors_at_positions_batch(grid, positions, vectors)
+
+        tiles = active_tiles_for(grid)
+        if tiles is not None and len(positions):
+            points = np.asarray(positions, dtype=np.float32).reshape(-1, 2)
+            tiles.mark_points(points[:, 0], points[:, 1])
+
+    def add_potential_field(self, grid: np.ndarray, positions: Union[np.ndarray, List[Tuple[float, float, float]]],
+                            kernel: Optional[Any] = None, scale: Optional[float] = None,
+                            strength: Optional[float] = None) -> None:
+        
+        calculator = self._gpu_calculator if self._current_device == "gpu" and self._gpu_calculator else self._cpu_calculator
+
+        if hasattr(calculator, 'add_potential_field'):
+            calculator.add_potential_field(grid, positions, kernel, scale, strength)
+        else:
+            self._cpu_calculator.add_potential_field(grid, positions, kernel, scale, strength)
+
+        tiles = active_tiles_for(grid)
+        if tiles is not None and len(positions):
+            # the kernel reaches every cell
+            tiles.mark_all()
+
+    def set_field_kernel(self, kernel: Optional[np.ndarray]) -> None:
+        
+        self._cpu_calculator.set_field_kernel(kernel)
+        if self._gpu_calculator and hasattr(self._gpu_calculator, "set_field_kernel"):
+            self._gpu_calculator.set_field_kernel(kernel)
+
     def fit_vector_at_position(self, grid: np.ndarray, x: float, y: float) -> Tuple[float, float]:
         
         calculator = self._gpu_calculator if self._current_device == "gpu" and self._gpu_calculator else self._cpu_calculator
 
         return calculator.fit_vector_at_position(grid, x, y)
 
-    def fit_vectors_at_positions_batch(self, grid: np.ndarray, positions: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
+    def fit_vectors_at_positions_batch(self, grid: np.ndarray, positions: Union[np.ndarray, List[Tuple[float, float]]]) -> np.ndarray:
+        
+        calculator = self._calculator_for("fit_vectors_at_positions_batch", len(positions), grid.shape[0] * grid.shape[1])
+
+        if hasattr(calculator, 'fit_vectors_at_positions_array'):
+            return calculator.fit_vectors_at_positions_array(grid, positions)
+        elif hasattr(calculator, 'fit_vectors_at_positions_batch'):
+            return np.asarray(calculator.fit_vectors_at_positions_batch(grid, positions), dtype=np.float32).reshape(-1, 2)
+        else:
+            return np.array([calculator.fit_vector_at_position(grid, x, y) for x, y in positions], dtype=np.float32).reshape(-1, 2)
+
+    def step_markers(self, grid: np.ndarray, x: np.ndarray, y: np.ndarray, mag: np.ndarray,
+                     vx: np.ndarray, vy: np.ndarray, dt: float = 1.0, gravity: float = 0.01,
+                     speed_factor: float = 0.9, max_speed: float = 1.0) -> None:
         
         calculator = self._gpu_calculator if self._current_device == "gpu" and self._gpu_calculator else self._cpu_calculator
 
-        if hasattr(calculator, 'fit_vectors_at_positions_batch'):
-            return calculator.fit_vectors_at_positions_batch(grid, positions)
+        # the GPU backend runs the fused kernel against its resident copy of the grid
+        if not hasattr(calculator, 'step_markers'):
+            calculator = self._cpu_calculator
+        calculator.step_markers(grid, x, y, mag, vx, vy, dt, gravity, speed_factor, max_speed)
+
+    def track_activity(self, grid: np.ndarray, tile_size: Optional[int] = None) -> ActiveTiles:
+        
+        return track_activity(grid, tile_size)
+
+    def clear_grid(self, grid: np.ndarray) -> None:
+        
+        # zeroes only the dirty tiles of a tracked grid
+        tiles = active_tiles_for(grid)
+        if tiles is None:
+            grid.fill(0.0)
         else:
-            return [calculator.fit_vector_at_position(grid, x, y) for x, y in positions]
+            tiles.clear(grid)
+
+    def create_gpu_session(self, width: int, height: int, capacity: int = 1024):
+        
+        if self._gpu_calculator is None:
+            raise RuntimeError("GPUcomputeunavailable")
+
+        return self._gpu_calculator.create_session(width, height, capacity)
 
     def handle(self, event: Event) -> None:
         
@@ -142,8 +350,9 @@ class VectorFieldCalculator(EventHandler):
 
     def cleanup(self) -> None:
         
-        if self._gpu_calculator:
-            self._gpu_calculator.cleanup()
+        # only backends that were actually created are cleaned up
+        for backend in self._backends.loaded().values():
+            backend.cleanup()
 
 vector_calculator = VectorFieldCalculator()
 
@@ -155,6 +364,19 @@ def update_grid_with_adjacent_sum(grid: np.ndarray) -> np.ndarray:
     
     return vector_calculator.update_grid_with_adjacent_sum(grid)
 
+def iterate(grid: np.ndarray, iterations: Optional[int] = None, method: str = "auto") -> np.ndarray:
+    
+    return vector_calculator.iterate(grid, iterations, method)
+
+def update_grid_in_bands(grid: np.ndarray, band_rows: int = 256) -> np.ndarray:
+    
+    return vector_calculator.update_grid_in_bands(grid, band_rows)
+
+def solve_steady_state(grid: np.ndarray, tolerance: Optional[float] = None,
+                       max_cycles: Optional[int] = None) -> np.ndarray:
+    
+    return vector_calculator.solve_steady_state(grid, tolerance, max_cycles)
+
 def create_vector_grid(width: int = 640, height: int = 480, default: Tuple[float, float] = (0, 0)) -> np.ndarray:
     
     return vector_calculator.create_vector_grid(width, height, default)
@@ -3,14 +3,18 @@ import os
 import threading
 import numpy as np
 import time
-from typing import Optional, Dict, Any, Tuple, Callable, Union
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Optional, Dict, Any, Iterator, Tuple, Callable, Union
 from .events import Event, EventType, event_bus, EventHandler, EventBus
 from .state import StateManager, state_manager
 from .config import ConfigManager, config_manager
 from .container import container
-from ..compute.vector_field import VectorFieldCalculator
-from ..graphics.renderer import VectorFieldRenderer
-from ..window.window import Window
+from ..compute.vector_field import VectorFieldCalculator, vector_calculator
+from ..compute.active_tiles import ActiveTiles, active_tiles_for, track_activity
+from ..compute.precision import storage_dtype
+
+if TYPE_CHECKING:
+    from ..graphics.renderer import VectorFieldRenderer
 
 class FPSLimiter(EventHandler):
     def __init__(self, state_manager: StateManager, event_bus: EventBus, config_manager: ConfigManager):
@@ -69,15 +73,72 @@ class GridManager(EventHandler):
 
     @property
     def grid(self) -> Optional[np.ndarray]:
+        # read-only view of the live grid; call snapshot() for a detached copy
+        with self._lock:
+            return self._read_only(self._grid)
+
+    @staticmethod
+    def _read_only(grid: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        if grid is None:
+            return None
+        view = grid.view()
+        view.flags.writeable = False
+        return view
+
+    def snapshot(self) -> Optional[np.ndarray]:
+        
         with self._lock:
             return self._grid.copy() if self._grid is not None else None
 
+    @contextmanager
+    def borrow(self, writable: bool = True) -> Iterator[Optional[np.ndarray]]:
+        
+        # holds the lock for the whole block; a writable borrow may touch any cell,
+        # so every tile is marked dirty and the grid flagged as updated on exit.
+        # A grid mapped read-only only ever lends a read-only view
+        with self._lock:
+            grid = self._grid
+            if grid is None or not writable or not grid.flags.writeable:
+                yield self._read_only(grid)
+                return
+            try:
+                yield grid
+            finally:
+                if self._grid is grid:
+                    self._active_tiles().mark_all()
+                self._state_manager.set("grid_updated", True)
+
+    @property
+    def is_read_only(self) -> bool:
+        # true for a grid loaded with mmap_mode="r"
+        with self._lock:
+            return self._grid is not None and not self._grid.flags.writeable
+
+    def _active_tiles(self) -> Optional[ActiveTiles]:
+        # looked up per call rather than cached: the stencil and the clears read the
+        # registry entry, so that is the map every write here has to mark
+        if self._grid is None:
+            return None
+        tiles = active_tiles_for(self._grid)
+        if tiles is None:
+            # untracked behind our back; a fresh map starts all dirty, which is safe
+            tiles = track_activity(self._grid)
+        return tiles
+
+    @property
+    def active_tiles(self) -> Optional[ActiveTiles]:
+        with self._lock:
+            return self._active_tiles()
+
     def init_grid(self, width: int = 640, height: int = 480, default: Tuple[float, float] = (0.0, 0.0)) -> np.ndarray:
         with self._lock:
-            self._grid = np.zeros((height, width, 2), dtype=np.float32)
+            self._grid = np.zeros((height, width, 2), dtype=storage_dtype())
             if default != (0.0, 0.0):
                 self._grid[:, :, 0] = default[0]
                 self._grid[:, :, 1] = default[1]
+            tiles = track_activity(self._grid)
+            if default == (0.0, 0.0):
+                tiles.reset()
 
             # update state
             self._state_manager.update({
@@ -93,32 +154,78 @@ class GridManager(EventHandler):
                 "GridManager"
             ))
 
-            return self._grid.copy()
+            # the live grid: writes through the compute calculators keep its active tiles current
+            return self._grid
 
     def update_grid(self, updates: Dict[Tuple[int, int], Tuple[float, float]]) -> None:
+        if not updates:
+            return
+        keys = np.array(list(updates.keys()), dtype=np.intp).reshape(-1, 2)
+        values = np.array(list(updates.values()), dtype=np.float32).reshape(-1, 2)
+        self.update_cells(values, keys[:, 0], keys[:, 1])
+
+    def update_cells(self, values: Union[np.ndarray, Tuple[float, float]], ys: Optional[np.ndarray] = None,
+                     xs: Optional[np.ndarray] = None, mask: Optional[np.ndarray] = None) -> int:
+        
+        # bulk write in one fancy-indexing op: either index arrays (ys, xs) with (n, 2)
+        # values, or a boolean (h, w) mask with (count, 2) or full (h, w, 2) values.
+        # A single (vx, vy) pair broadcasts. Returns the number of cells written
         with self._lock:
             if self._grid is None:
-                return
-
-            changed = False
-            for (y, x), (vx, vy) in updates.items():
-                if 0 <= y < self._grid.shape[0] and 0 <= x < self._grid.shape[1]:
-                    self._grid[y, x] = (vx, vy)
-                    changed = True
-
-            if changed:
-                self._state_manager.set("grid_updated", True)
-
-                self._event_bus.publish(Event(
-                    EventType.GRID_UPDATED,
-                    {"updates": updates},
-                    "GridManager"
-                ))
+                return 0
+            if not self._grid.flags.writeable:
+                print("[GridManager] Grid is mapped read-only; update ignored")
+                return 0
+            h, w = self._grid.shape[:2]
+            values = np.asarray(values, dtype=np.float32)
+
+            if mask is not None:
+                mask = np.asarray(mask, dtype=bool)
+                if mask.shape != (h, w):
+                    raise ValueError(f"mask shape {mask.shape} does not match grid {(h, w)}")
+                ys, xs = np.nonzero(mask)
+                if values.shape[:2] == (h, w):
+                    values = values[mask]
+            else:
+                if ys is None or xs is None:
+                    raise ValueError("update_cells needs either ys and xs or a mask")
+                ys = np.asarray(ys, dtype=np.intp).reshape(-1)
+                xs = np.asarray(xs, dtype=np.intp).reshape(-1)
+                inside = (ys >= 0) & (ys < h) & (xs >= 0) & (xs < w)
+                if not inside.all():
+                    # out-of-range cells are skipped, as the dict interface always did
+                    if values.ndim == 2:
+                        values = values[inside]
+                    ys, xs = ys[inside], xs[inside]
+
+            count = ys.shape[0]
+            if count == 0:
+                return 0
+
+            if mask is not None:
+                self._grid[mask] = values
+            else:
+                self._grid[ys, xs] = values
+            self._active_tiles().mark_cells(ys, xs)
+            self._state_manager.set("grid_updated", True)
+
+            # subscribers get the dirty bounding box (half-open, in cells), not the cells themselves
+            region = (int(ys.min()), int(ys.max()) + 1, int(xs.min()), int(xs.max()) + 1)
+            self._event_bus.publish(Event(
+                EventType.GRID_UPDATED,
+                {"region": region, "count": int(count)},
+                "GridManager"
+            ))
+            return int(count)
 
     def clear_grid(self) -> None:
         with self._lock:
             if self._grid is not None:
-                self._grid.fill(0.0)
+                if not self._grid.flags.writeable:
+                    print("[GridManager] Grid is mapped read-only; clear ignored")
+                    return
+                # only tiles written since the last clear hold non-zero cells
+                self._active_tiles().clear(self._grid)
 
                 self._state_manager.set("grid_updated", True, notify=False)
 
@@ -128,20 +235,37 @@ class GridManager(EventHandler):
                     "GridManager"
                 ))
 
-    def load_grid(self, file_path: str) -> bool:
+    def load_grid(self, file_path: str, mmap_mode: Optional[str] = None) -> bool:
+        # mmap_mode "r", "r+" or "c" maps the .npy file instead of reading it: pages load
+        # on first touch, so grids larger than RAM open instantly. "r+" writes go to the file;
+        # an "r" grid is view-only, and the mutators below refuse it rather than raise
         try:
             if not os.path.exists(file_path):
                 print(f"[GridManager] File not found: {file_path}")
                 return False
+            if mmap_mode not in (None, "r", "r+", "c"):
+                print(f"[GridManager] Invalid mmap mode: {mmap_mode}")
+                return False
+
+            loaded_grid = np.load(file_path, mmap_mode=mmap_mode)
+            if loaded_grid.ndim != 3 or loaded_grid.shape[2] != 2:
+                print(f"[GridManager] Not a vector grid: {loaded_grid.shape}")
+                return False
 
-            loaded_grid = np.load(file_path)
+            if mmap_mode is None:
+                # the array np.load just read is ours; convert only if the dtype differs
+                loaded_grid = loaded_grid.astype(storage_dtype(), copy=False)
+            elif loaded_grid.dtype not in (np.float32, np.float16):
+                print(f"[GridManager] Unsupported mapped grid dtype: {loaded_grid.dtype}")
+                return False
 
             with self._lock:
                 if self._grid is not None and loaded_grid.shape != self._grid.shape:
                     print(f"[GridManager] Grid size mismatch: {loaded_grid.shape} vs {self._grid.shape}")
                     return False
 
-                self._grid = loaded_grid.copy()
+                self._grid = loaded_grid
+                track_activity(self._grid)
 
                 self._state_manager.update({
                     "grid_width": loaded_grid.shape[1],
@@ -151,7 +275,7 @@ class GridManager(EventHandler):
 
                 self._event_bus.publish(Event(
                     EventType.GRID_LOADED,
-                    {"file_path": file_path, "shape": loaded_grid.shape},
+                    {"file_path": file_path, "shape": loaded_grid.shape, "mapped": mmap_mode is not None},
                     "GridManager"
                 ))
 
@@ -160,11 +284,53 @@ class GridManager(EventHandler):
             print(f"[GridManager] Failed to load grid: {e}")
             return False
 
+    def create_grid_file(self, file_path: str, width: int, height: int) -> bool:
+        
+        # a zero-filled .npy of any size, mapped read-write; the file is sparse until written
+        try:
+            grid = np.lib.format.open_memmap(file_path, mode="w+", dtype=storage_dtype(), shape=(height, width, 2))
+            with self._lock:
+                self._grid = grid
+                track_activity(self._grid).reset()
+
+                self._state_manager.update({
+                    "grid_width": width,
+                    "grid_height": height,
+                    "grid_updated": True
+                })
+
+                self._event_bus.publish(Event(
+                    EventType.GRID_LOADED,
+                    {"file_path": file_path, "shape": grid.shape, "mapped": True},
+                    "GridManager"
+                ))
+            return True
+        except Exception as e:
+            print(f"[GridManager] Failed to create grid file: {e}")
+            return False
+
+    @property
+    def is_mapped(self) -> bool:
+        return isinstance(self._grid, np.memmap)
+
+    def flush(self) -> None:
+        
+        with self._lock:
+            if isinstance(self._grid, np.memmap) and self._grid.mode in ("r+", "w+"):
+                self._grid.flush()
+
     def save_grid(self, file_path: str) -> bool:
         try:
             with self._lock:
                 if self._grid is not None:
-                    np.save(file_path, self._grid)
+                    grid = self._grid
+                    mapped_path = getattr(grid, "filename", None)
+                    if (isinstance(grid, np.memmap) and grid.mode in ("r+", "w+") and mapped_path
+                            and os.path.abspath(mapped_path) == os.path.abspath(file_path)):
+                        # saving a read-write mapping onto its own file only needs the dirty pages
+                        grid.flush()
+                    else:
+                        np.save(file_path, grid)
 
                     self._event_bus.publish(Event(
                         EventType.GRID_SAVED,
@@ -238,16 +404,20 @@ class AppCore:
 
         # get services from container
         self._vector_calculator = container.resolve(VectorFieldCalculator)
-        self._renderer = container.resolve(VectorFieldRenderer)
+        # the renderer pulls in OpenGL; it is resolved or created on first use,
+        # and Window.initialize registers the same singleton when it draws first
+        self._renderer: Optional["VectorFieldRenderer"] = None
 
-        # if not in container, create them
+        # if not in container, create it
+        # reuse the module-level calculator rather than creating a second one
         if self._vector_calculator is None:
-            self._vector_calculator = VectorFieldCalculator()
+            self._vector_calculator = vector_calculator
             container.register_singleton(VectorFieldCalculator, self._vector_calculator)
 
-        if self._renderer is None:
-            self._renderer = VectorFieldRenderer()
-            container.register_singleton(VectorFieldRenderer, self._renderer)
+        # "auto" routing needs its crossover sizes; measure (or load them from the cache)
+        # now rather than stalling the first routed call of the first frame
+        if self._vector_calculator.current_device == "auto":
+            self._vector_calculator.calibrate()
 
         # register self to container
         container.register_singleton(AppCore, self)
@@ -288,7 +458,13 @@ class AppCore:
         return self._vector_calculator
 
     @property
-    def renderer(self) -> VectorFieldRenderer:
+    def renderer(self) -> "VectorFieldRenderer":
+        if self._renderer is None:
+            from ..graphics.renderer import VectorFieldRenderer
+            self._renderer = container.resolve(VectorFieldRenderer)
+            if self._renderer is None:
+                self._renderer = VectorFieldRenderer()
+                container.register_singleton(VectorFieldRenderer, self._renderer)
         return self._renderer
 
     def shutdown(self) -> None:
@@ -0,0 +1,209 @@
+# Checkpoints - grid, markers, RNG, simulation config and frame counter in one atomically written file
+import io
+import json
+import os
+import queue
+import random
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+import numpy as np
+from .config import config_manager
+from .state import StateManager, state_manager
+
+# state keys that change what a step computes; view, render and device settings are left out
+SIMULATION_KEYS = (
+    "vector_self_weight", "vector_neighbor_weight", "cell_size", "gravity", "speed_factor",
+    "grid_dtype", "grid_tile_size", "compute_iterations", "compute_fft_min_iterations",
+    "marker_integrator", "marker_cfl", "marker_max_substeps",
+    "field_mode", "field_kernel", "field_kernel_scale", "field_strength",
+)
+_FORMAT = 1
+_STOP = object()
+
+def _plain(value: Any) -> Any:
+    # RNG states nest tuples and arrays; JSON needs lists and Python scalars
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, (tuple, list)):
+        return [_plain(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+@dataclass
+class Checkpoint:
+    frame: int
+    grid: np.ndarray
+    markers: Optional[np.ndarray] = None
+    state: Dict[str, Any] = field(default_factory=dict)
+    rng: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def capture(cls, frame: int, grid: np.ndarray, markers: Optional[np.ndarray] = None,
+                rng: Optional[np.random.Generator] = None, state: Optional[StateManager] = None) -> "Checkpoint":
+
+        # copies everything now, so the simulation can keep stepping while the file is written
+        state = state_manager if state is None else state
+        values = {}
+        for key in SIMULATION_KEYS:
+            value = state.get(key, None)
+            if value is None:
+                value = config_manager.get(key, None)
+            if value is not None:
+                values[key] = _plain(value)
+
+        legacy = np.random.get_state()
+        rng_state = {
+            "python": _plain(random.getstate()),
+            "numpy_global": [legacy[0], legacy[1].tolist(), int(legacy[2]), int(legacy[3]), float(legacy[4])],
+        }
+        if rng is not None:
+            rng_state["generator"] = _plain(rng.bit_generator.state)
+
+        return cls(int(frame), np.array(grid, order="C"),
+                   None if markers is None else np.array(markers, dtype=np.float32, order="C", ndmin=2),
+                   values, rng_state)
+
+    def restore(self, rng: Optional[np.random.Generator] = None, state: Optional[StateManager] = None) -> None:
+        
+        # simulation settings go straight into the state manager, which the config reads
+        # through; ConfigManager.set would also rewrite config.json
+        state = state_manager if state is None else state
+        state.update(dict(self.state))
+
+        python_state = self.rng.get("python")
+        if python_state is not None:
+            version, internal, gauss = python_state
+            random.setstate((version, tuple(internal), gauss))
+        legacy = self.rng.get("numpy_global")
+        if legacy is not None:
+            np.random.set_state((legacy[0], np.array(legacy[1], dtype=np.uint32), legacy[2], legacy[3], legacy[4]))
+        if rng is not None:
+            if "generator" not in self.rng:
+                raise ValueError("checkpoint holds no generator state")
+            if self.rng["generator"]["bit_generator"] != type(rng.bit_generator).__name__:
+                raise ValueError(f"checkpoint generator is {self.rng['generator']['bit_generator']}, "
+                                 f"not {type(rng.bit_generator).__name__}")
+            rng.bit_generator.state = self.rng["generator"]
+
+    def to_bytes(self) -> bytes:
+        
+        meta = {"format": _FORMAT, "frame": self.frame, "state": self.state, "rng": self.rng}
+        arrays = {"grid": self.grid, "meta": np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8)}
+        if self.markers is not None:
+            arrays["markers"] = self.markers
+        buffer = io.BytesIO()
+        np.savez(buffer, **arrays)
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Checkpoint":
+        
+        with np.load(io.BytesIO(data), allow_pickle=False) as archive:
+            meta = json.loads(archive["meta"].tobytes().decode("utf-8"))
+            if meta.get("format") != _FORMAT:
+                raise ValueError(f"unsupported checkpoint format: {meta.get('format')}")
+            markers = archive["markers"] if "markers" in archive.files else None
+            return cls(meta["frame"], archive["grid"], markers, meta["state"], meta["rng"])
+
+def save_checkpoint(path: str, checkpoint: Checkpoint) -> None:
+    
+    # write a sibling temp file, fsync it, then rename over the target: a crash at any
+    # point leaves either the previous checkpoint or the new one, never a torn file
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=".checkpoint-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(checkpoint.to_bytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+def load_checkpoint(path: str) -> Checkpoint:
+    
+    with open(path, "rb") as f:
+        return Checkpoint.from_bytes(f.read())
+
+class Checkpointer:
+    
+
+    def __init__(self, path: str, interval: Optional[int] = None, rng: Optional[np.random.Generator] = None,
+                 state: Optional[StateManager] = None):
+        if interval is None:
+            interval = config_manager.get("checkpoint_interval", 0)
+        self._path = path
+        self._interval = max(0, int(interval))
+        self._rng = rng
+        self._state = state
+        self._error: Optional[BaseException] = None
+        self.written = 0
+
+        # one slot: at most one checkpoint waits while another is written
+        self._queue: "queue.Queue" = queue.Queue(maxsize=1)
+        self._thread = threading.Thread(target=self._run, name="gravitas-checkpoint", daemon=True)
+        self._thread.start()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def interval(self) -> int:
+        return self._interval
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    return
+                save_checkpoint(self._path, item)
+                self.written += 1
+            except BaseException as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _check(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError(f"checkpoint write failed: {error}") from error
+
+    def maybe_checkpoint(self, frame: int, grid: np.ndarray, markers: Optional[np.ndarray] = None) -> bool:
+        
+        # call once per frame, after the frame's step; frame 0 is never checkpointed
+        self._check()
+        if self._interval <= 0 or frame <= 0 or frame % self._interval:
+            return False
+        self.checkpoint(frame, grid, markers)
+        return True
+
+    def checkpoint(self, frame: int, grid: np.ndarray, markers: Optional[np.ndarray] = None) -> None:
+        
+        self._check()
+        self._queue.put(Checkpoint.capture(frame, grid, markers, self._rng, self._state))
+
+    def wait(self) -> None:
+        
+        self._queue.join()
+        self._check()
+
+    def close(self) -> None:
+        
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._check()
+
+    def __enter__(self) -> "Checkpointer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -48,6 +48,8 @@ class ConfigManager:
         self.register_option("grid_width", 640, "Grid width", type="number")
         self.register_option("grid_height", 480, "Grid height", type="number")
         self.register_option("cell_size", 1.0, "Cell size", type="number")
+        self.register_option("grid_dtype", "float32", "Grid storage precision; float16 halves memory and transfers, arithmetic stays float32", options=["float32", "float16"])
+        self.register_option("grid_tile_size", 32, "Active-tile size in cells for sparse clears and stencil passes", type="number", options=[16, 32])
 
         # vector field config
         self.register_option("vector_color", [0.2, 0.6, 1.0], "Vector color", type="array")
@@ -55,6 +57,18 @@ class ConfigManager:
         self.register_option("vector_self_weight", 0.0, "Vector self weight", type="number", min_value=0.0, max_value=10.0)
         self.register_option("vector_neighbor_weight", 0.25, "Vector neighbor weight", type="number", min_value=0.0, max_value=10.0)
 
+        # marker integration config
+        self.register_option("marker_integrator", "euler", "Marker integrator: semi-implicit euler, velocity verlet or midpoint rk2", options=["euler", "verlet", "rk2"])
+        self.register_option("marker_cfl", 1.0, "Most cells a marker may cross in one substep", type="number", min_value=0.05, max_value=10.0)
+        self.register_option("marker_max_substeps", 4, "Upper bound on substeps per frame (1 disables substepping)", type="number", min_value=1, max_value=64)
+        self.register_option("marker_index_cell_size", 8.0, "Cell size in grid cells of the marker spatial index used for picking and box selection", type="number", min_value=1.0, max_value=256.0)
+
+        # marker field config
+        self.register_option("field_mode", "splat", "How markers write the vector field: 'splat' (four-neighbour tiny vectors) or 'potential' (FFT convolution)", options=["splat", "potential"])
+        self.register_option("field_kernel", "inverse_r", "Potential kernel: softened 1/r, Gaussian, or the array set with set_field_kernel()", options=["inverse_r", "gaussian", "custom"])
+        self.register_option("field_kernel_scale", 2.0, "Kernel length in cells: softening for inverse_r, sigma for gaussian", type="number", min_value=0.1, max_value=1000.0)
+        self.register_option("field_strength", 1.0, "Scale applied to the potential field", type="number", min_value=-1000.0, max_value=1000.0)
+
         # view config
         self.register_option("cam_x", 0.0, "Camera X", type="number")
         self.register_option("cam_y", 0.0, "Camera Y", type="number")
@@ -68,12 +82,23 @@ class ConfigManager:
         self.register_option("line_width", 1.0, "Line width", type="number", min_value=0.5, max_value=5.0)
 
         # compute config
-        self.register_option("compute_device", "cpu", "Compute device", options=["cpu", "gpu"])
+        self.register_option("compute_device", "cpu", "Compute device", options=["cpu", "gpu", "auto"])
         self.register_option("compute_iterations", 1, "Compute iterations", type="number", min_value=1, max_value=100)
+        self.register_option("compute_threads", 0, "CPU stencil worker threads (0 = one per core)", type="number", min_value=0, max_value=256)
+        self.register_option("compute_fft_min_iterations", 32, "Iteration count from which iterate() uses the FFT path (0 = never)", type="number", min_value=0, max_value=10000)
+        self.register_option("compute_solver_tolerance", 1e-6, "Relative residual at which solve_steady_state() stops its multigrid V-cycles", type="number", min_value=1e-12, max_value=0.1)
+        self.register_option("compute_kernel_cache", True, "Cache compiled OpenCL program binaries on disk", type="boolean")
+        self.register_option("compute_profiling", False, "Record OpenCL event timings and publish them with GPU compute events", type="boolean")
+        self.register_option("compute_workgroup_tuning", True, "Measure and cache the stencil work-group shape per device", type="boolean")
 
         # render vector lines
         self.register_option("render_vector_lines", True, "Render vector lines", type="boolean")
 
+        # recording config
+        self.register_option("record_codec", "zlib", "Compression for recorded frames; lzma is smaller and slower", options=["zlib", "lzma"])
+        self.register_option("record_keyframe_interval", 30, "Recorded frames between full keyframes; the rest are XOR deltas against the last keyframe", type="number", min_value=1, max_value=10000)
+        self.register_option("checkpoint_interval", 0, "Frames between background checkpoints written by Checkpointer (0 disables)", type="number", min_value=0)
+
         # fps config
         self.register_option("target_fps", 60, "Target FPS", type="number", min_value=1, max_value=240)
 
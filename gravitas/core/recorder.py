@@ -0,0 +1,275 @@
+# Simulation recorder - compressed keyframe/XOR-delta frame log written on a background thread
+import json
+import lzma
+import os
+import queue
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Iterator, List, Optional, Tuple
+import numpy as np
+from .config import config_manager
+
+_MAGIC = b"GRVREC01"
+_HEADER_LEN = struct.Struct("<I")
+# frame number, kind, payload bytes, grid bytes, marker rows, marker count
+_RECORD = struct.Struct("<QBIIHI")
+_KEYFRAME, _DELTA = 0, 1
+_INDEX_DTYPE = np.dtype([("frame", "<u8"), ("offset", "<u8"), ("length", "<u4"), ("kind", "u1"),
+                         ("grid_bytes", "<u4"), ("marker_rows", "<u2"), ("marker_count", "<u4")])
+_CODECS = {
+    "zlib": (lambda data, level: zlib.compress(data, level), zlib.decompress),
+    "lzma": (lambda data, level: lzma.compress(data, preset=level), lzma.decompress),
+}
+_STOP = object()
+
+def _index_path(path: str) -> str:
+    return path + ".idx"
+
+def _xor(data: bytes, key: bytes) -> bytes:
+    # unchanged cells XOR to zero bytes, which is what makes deltas compress
+    return np.bitwise_xor(np.frombuffer(data, dtype=np.uint8), np.frombuffer(key, dtype=np.uint8)).tobytes()
+
+class SimulationRecorder:
+    
+
+    def __init__(self, path: str, shape: Tuple[int, ...], dtype=np.float32, codec: Optional[str] = None,
+                 keyframe_interval: Optional[int] = None, level: int = 6, queue_frames: int = 64):
+        if codec is None:
+            codec = config_manager.get("record_codec", "zlib")
+        if codec not in _CODECS:
+            raise ValueError(f"unknown record codec: {codec}")
+        if keyframe_interval is None:
+            keyframe_interval = config_manager.get("record_keyframe_interval", 30)
+
+        self._path = path
+        self._shape = tuple(int(n) for n in shape)
+        self._dtype = np.dtype(dtype)
+        self._codec = codec
+        self._compress = _CODECS[codec][0]
+        self._level = int(level)
+        self._keyframe_interval = max(1, int(keyframe_interval))
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, int(queue_frames)))
+        self._index: List[tuple] = []
+        self._error: Optional[BaseException] = None
+        self._frame = 0
+        self._closed = False
+
+        self._file = open(path, "wb")
+        header = json.dumps({"shape": list(self._shape), "dtype": self._dtype.str, "codec": codec,
+                             "keyframe_interval": self._keyframe_interval}).encode("utf-8")
+        self._file.write(_MAGIC + _HEADER_LEN.pack(len(header)) + header)
+
+        self._thread = threading.Thread(target=self._run, name="gravitas-recorder", daemon=True)
+        self._thread.start()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def frames_recorded(self) -> int:
+        return self._frame
+
+    def record(self, grid: np.ndarray, markers: Optional[np.ndarray] = None, frame: Optional[int] = None) -> int:
+        
+        # the caller keeps stepping its arrays, so only copies cross to the writer thread;
+        # encoding and compression happen there. A full queue blocks, bounding memory
+        self._check()
+        if self._closed:
+            raise RuntimeError("recorder is closed")
+        if tuple(grid.shape) != self._shape:
+            raise ValueError(f"grid shape {grid.shape} does not match recording {self._shape}")
+
+        if frame is None:
+            frame = self._frame
+        grid_copy = np.array(grid, dtype=self._dtype, order="C")
+        marker_copy = None if markers is None else np.array(markers, dtype=np.float32, order="C", ndmin=2)
+        self._queue.put((int(frame), grid_copy, marker_copy))
+        self._frame = int(frame) + 1
+        return int(frame)
+
+    def _run(self) -> None:
+        keyframe: Optional[bytes] = None
+        since_key = 0
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    return
+                if self._error is not None:
+                    continue
+                frame, grid, markers = item
+                raw = grid.tobytes()
+                if keyframe is None or since_key >= self._keyframe_interval:
+                    kind, grid_bytes = _KEYFRAME, raw
+                    keyframe, since_key = raw, 0
+                else:
+                    kind, grid_bytes = _DELTA, _xor(raw, keyframe)
+                since_key += 1
+
+                rows, count = (0, 0) if markers is None else markers.shape
+                marker_bytes = b"" if markers is None else markers.tobytes()
+                payload = self._compress(grid_bytes + marker_bytes, self._level)
+
+                offset = self._file.tell()
+                self._file.write(_RECORD.pack(frame, kind, len(payload), len(raw), rows, count))
+                self._file.write(payload)
+                self._index.append((frame, offset, _RECORD.size + len(payload), kind, len(raw), rows, count))
+            except BaseException as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _check(self) -> None:
+        if self._error is not None:
+            raise RuntimeError(f"recorder writer failed: {self._error}") from self._error
+
+    def flush(self) -> None:
+        
+        # waits for queued frames, then makes the file and its index readable as-is
+        self._queue.join()
+        self._check()
+        self._file.flush()
+        self._write_index()
+
+    def _write_index(self) -> None:
+        index = np.array(self._index, dtype=_INDEX_DTYPE)
+        tmp = _index_path(self._path) + ".tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, index)
+        os.replace(tmp, _index_path(self._path))
+
+    def close(self) -> None:
+        
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+        try:
+            self._file.flush()
+            self._write_index()
+        finally:
+            self._file.close()
+        self._check()
+
+    def __enter__(self) -> "SimulationRecorder":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+class RecordingReader:
+    
+
+    def __init__(self, path: str, cache_keyframes: int = 2):
+        self._file = open(path, "rb")
+        if self._file.read(len(_MAGIC)) != _MAGIC:
+            self._file.close()
+            raise ValueError(f"not a gravitas recording: {path}")
+        (length,) = _HEADER_LEN.unpack(self._file.read(_HEADER_LEN.size))
+        header = json.loads(self._file.read(length).decode("utf-8"))
+        self._data_start = self._file.tell()
+
+        self.shape = tuple(header["shape"])
+        self.dtype = np.dtype(header["dtype"])
+        self.codec = header["codec"]
+        self.keyframe_interval = header["keyframe_interval"]
+        self._decompress = _CODECS[self.codec][1]
+        self._lock = threading.Lock()
+        self._keyframes: "OrderedDict[int, bytes]" = OrderedDict()
+        self._max_cached = max(1, int(cache_keyframes))
+
+        self._index = np.load(_index_path(path)) if os.path.exists(_index_path(path)) else None
+        size = os.path.getsize(path)
+        if self._index is None or (self._index[-1]["offset"] + self._index[-1]["length"] if len(self._index)
+                                   else self._data_start) != size:
+            # a recording that was not closed (e.g. the process died) is re-indexed by scanning
+            self._index = self._scan()
+        self._positions = {int(frame): i for i, frame in enumerate(self._index["frame"])}
+        # each frame's keyframe is the nearest keyframe record at or before it in file order
+        keys = np.flatnonzero(self._index["kind"] == _KEYFRAME)
+        self._key_of = keys[np.searchsorted(keys, np.arange(len(self._index)), side="right") - 1] if keys.size else keys
+
+    def _scan(self) -> np.ndarray:
+        entries = []
+        self._file.seek(self._data_start)
+        while True:
+            offset = self._file.tell()
+            head = self._file.read(_RECORD.size)
+            if len(head) < _RECORD.size:
+                break
+            frame, kind, length, grid_bytes, rows, count = _RECORD.unpack(head)
+            self._file.seek(length, os.SEEK_CUR)
+            entries.append((frame, offset, _RECORD.size + length, kind, grid_bytes, rows, count))
+        # seeking past the end does not fail, so a torn final record shows up as overrunning the file
+        size = self._file.seek(0, os.SEEK_END)
+        if entries and entries[-1][1] + entries[-1][2] > size:
+            entries.pop()
+        return np.array(entries, dtype=_INDEX_DTYPE)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    @property
+    def frames(self) -> np.ndarray:
+        return self._index["frame"]
+
+    def _payload(self, position: int) -> bytes:
+        entry = self._index[position]
+        with self._lock:
+            self._file.seek(int(entry["offset"]) + _RECORD.size)
+            data = self._file.read(int(entry["length"]) - _RECORD.size)
+        return self._decompress(data)
+
+    def _keyframe(self, position: int) -> bytes:
+        with self._lock:
+            cached = self._keyframes.get(position)
+            if cached is not None:
+                self._keyframes.move_to_end(position)
+                return cached
+        raw = self._payload(position)[:int(self._index[position]["grid_bytes"])]
+        with self._lock:
+            self._keyframes[position] = raw
+            while len(self._keyframes) > self._max_cached:
+                self._keyframes.popitem(last=False)
+        return raw
+
+    def read(self, frame: int) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        
+        # one keyframe (usually cached) plus one delta, however long the recording is
+        try:
+            position = self._positions[int(frame)]
+        except KeyError:
+            raise IndexError(f"frame {frame} is not in the recording") from None
+        entry = self._index[position]
+        payload = self._payload(position)
+        grid_bytes = int(entry["grid_bytes"])
+        raw = payload[:grid_bytes]
+        if entry["kind"] == _DELTA:
+            raw = _xor(raw, self._keyframe(int(self._key_of[position])))
+
+        grid = np.frombuffer(raw, dtype=self.dtype).reshape(self.shape).copy()
+        markers = None
+        if entry["marker_rows"]:
+            markers = np.frombuffer(payload[grid_bytes:], dtype=np.float32).reshape(
+                int(entry["marker_rows"]), int(entry["marker_count"])).copy()
+        return grid, markers
+
+    def __iter__(self) -> Iterator[Tuple[int, np.ndarray, Optional[np.ndarray]]]:
+        for frame in self.frames:
+            grid, markers = self.read(int(frame))
+            yield int(frame), grid, markers
+
+    def close(self) -> None:
+        
+        self._file.close()
+
+    def __enter__(self) -> "RecordingReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -45,7 +45,7 @@ class Controller:
     def clear_grid(self):
         
         try:
-            self.grid.fill(0.0)
+            self.vector_calculator.clear_grid(self.grid)
         except Exception as e:
             print(f"[error] clear_grid exception: {e}")
 
@@ -133,23 +133,13 @@ class Controller:
                 print(f"[demo] clickpositiongrid: ({gx}, {gy})")
                 return None
 
-            markers = self.marker_system.get_markers()
-            if not markers:
+            if not self.marker_system.markers:
                 print("[demo] noneavailablemarker")
                 return None
 
-            min_dist = float('inf')
-            closest_marker = None
             threshold = 5.0
-            for marker in markers:
-                marker_x = marker["x"]
-                marker_y = marker["y"]
-                dist = ((marker_x - gx) ** 2 + (marker_y - gy) ** 2) ** 0.5
-                if dist < min_dist:
-                    min_dist = dist
-                    closest_marker = marker
-
-            if closest_marker is None or min_dist > threshold:
+            closest_marker = self.marker_system.find_nearest_marker(gx, gy, threshold)
+            if closest_marker is None:
                 print("[demo] not foundmarkerorselectvalue")
                 return None
 
@@ -158,6 +148,18 @@ class Controller:
             print(f"[error] handlermouseleftkeypressedhourexception: {e}")
             return None
 
+    def select_markers_in_box(self, mx0: float, my0: float, mx1: float, my1: float) -> np.ndarray:
+        
+        try:
+            gx0, gy0 = self._screen_to_grid(mx0, my0)
+            gx1, gy1 = self._screen_to_grid(mx1, my1)
+            selected = self.marker_system.markers_in_rect(gx0, gy0, gx1, gy1)
+            self.app_core.state_manager.set("selected_markers", selected)
+            return selected
+        except Exception as e:
+            print(f"[error] box select markers exception: {e}")
+            return np.empty(0, dtype=np.intp)
+
     def handle_mouse_drag(self, mx: float, my: float, selected_marker: dict):
         
         if selected_marker is None:
@@ -0,0 +1,160 @@
+import math
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Optional, Tuple, Type
+import numpy as np
+from gravitas.core.config import config_manager
+
+# field acceleration at (x, y): grid sample / marker magnitude; gravity is added by each integrator
+Acceleration = Callable[[np.ndarray, np.ndarray], Tuple[np.ndarray, np.ndarray]]
+
+def frame_speed(vx: np.ndarray, vy: np.ndarray, ax: np.ndarray, ay: np.ndarray, dt: float,
+                max_speed: Optional[float] = None) -> float:
+    
+    # fastest speed any marker can reach this frame: current speed plus what the
+    # frame's acceleration adds, no more than the speed clamp allows
+    if vx.shape[0] == 0:
+        return 0.0
+    speed = float(np.max(np.sqrt(vx * vx + vy * vy) + np.sqrt(ax * ax + ay * ay) * dt))
+    if max_speed is not None:
+        speed = min(speed, max_speed)
+    return speed
+
+def substep_count(speed: float, dt: float, cell_size: float = 1.0, cfl: float = 1.0, max_substeps: int = 4) -> int:
+    
+    # CFL-style bound: no marker may cross more than `cfl` cells in one substep
+    if dt <= 0.0:
+        return 1
+    courant = speed * dt / (max(cfl, 1e-6) * max(cell_size, 1e-6))
+    return int(min(max(1, math.ceil(courant)), max(1, int(max_substeps))))
+
+class Integrator(ABC):
+    
+
+    name = "base"
+    samples_per_step = 1
+
+    @abstractmethod
+    def step(self, accel: Acceleration, x: np.ndarray, y: np.ndarray, vx: np.ndarray, vy: np.ndarray,
+             h: float, gravity: float, max_speed: float, width: int, height: int,
+             first: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> None:
+        ...
+
+    def advance(self, calculator, grid: np.ndarray, x: np.ndarray, y: np.ndarray, mag: np.ndarray,
+                vx: np.ndarray, vy: np.ndarray, dt: float = 1.0, gravity: float = 0.01,
+                speed_factor: float = 0.9, max_speed: float = 1.0, cell_size: float = 1.0,
+                cfl: Optional[float] = None, max_substeps: Optional[int] = None) -> int:
+
+        if x.shape[0] == 0:
+            return 0
+        if cfl is None:
+            cfl = config_manager.get("marker_cfl", 1.0)
+        if max_substeps is None:
+            max_substeps = config_manager.get("marker_max_substeps", 4)
+
+        h, w = grid.shape[0], grid.shape[1]
+        coupled = mag != 0.0
+
+        def accel(px: np.ndarray, py: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+            sample = calculator.fit_vectors_at_positions_batch(grid, np.column_stack((px, py)))
+            ax = np.divide(sample[:, 0], mag, out=np.zeros_like(px), where=coupled)
+            ay = np.divide(sample[:, 1], mag, out=np.zeros_like(py), where=coupled)
+            return ax, ay
+
+        # the first substep's field sample also sizes the substeps
+        first = accel(x, y)
+        speed = frame_speed(vx, vy, first[0], first[1] + gravity, dt, max_speed)
+        substeps = substep_count(speed, dt, cell_size, cfl, max_substeps)
+        sub_dt = dt / substeps
+        # damping is a per-frame factor; spread it so a frame damps the same at any substep count
+        damping = speed_factor ** (1.0 / substeps)
+        for _ in range(substeps):
+            self.step(accel, x, y, vx, vy, sub_dt, gravity, max_speed, w, h, first)
+            first = None
+            vx *= damping
+            vy *= damping
+        return substeps
+
+def _clamp_speed(vx: np.ndarray, vy: np.ndarray, max_speed: float) -> None:
+    speed = np.sqrt(vx * vx + vy * vy)
+    over = speed > max_speed
+    if np.any(over):
+        scale = max_speed / speed[over]
+        vx[over] *= scale
+        vy[over] *= scale
+
+def _move(x: np.ndarray, y: np.ndarray, dx: np.ndarray, dy: np.ndarray, width: int, height: int) -> None:
+    x += dx
+    y += dy
+    np.clip(x, 0.0, width - 1.0, out=x)
+    np.clip(y, 0.0, height - 1.0, out=y)
+
+class SemiImplicitEuler(Integrator):
+    
+
+    name = "euler"
+
+    def step(self, accel, x, y, vx, vy, h, gravity, max_speed, width, height, first=None):
+        # velocity first, then position with the new velocity; gravity lands after the
+        # move, the same stage order as the calculators' fused step_markers
+        ax, ay = first or accel(x, y)
+        vx += ax * h
+        vy += ay * h
+        _clamp_speed(vx, vy, max_speed)
+        _move(x, y, vx * h, vy * h, width, height)
+        vy += gravity * h
+
+class VelocityVerlet(Integrator):
+    
+
+    name = "verlet"
+    samples_per_step = 2
+
+    def step(self, accel, x, y, vx, vy, h, gravity, max_speed, width, height, first=None):
+        ax0, ay0 = first or accel(x, y)
+        ay0 = ay0 + gravity
+        _move(x, y, vx * h + 0.5 * ax0 * h * h, vy * h + 0.5 * ay0 * h * h, width, height)
+        ax1, ay1 = accel(x, y)
+        ay1 += gravity
+        vx += 0.5 * (ax0 + ax1) * h
+        vy += 0.5 * (ay0 + ay1) * h
+        _clamp_speed(vx, vy, max_speed)
+
+class MidpointRK2(Integrator):
+    
+
+    name = "rk2"
+    samples_per_step = 2
+
+    def step(self, accel, x, y, vx, vy, h, gravity, max_speed, width, height, first=None):
+        ax0, ay0 = first or accel(x, y)
+        ay0 = ay0 + gravity
+        mx = np.clip(x + 0.5 * h * vx, 0.0, width - 1.0)
+        my = np.clip(y + 0.5 * h * vy, 0.0, height - 1.0)
+        mvx = vx + 0.5 * h * ax0
+        mvy = vy + 0.5 * h * ay0
+        axm, aym = accel(mx, my)
+        aym += gravity
+        _move(x, y, mvx * h, mvy * h, width, height)
+        vx += axm * h
+        vy += aym * h
+        _clamp_speed(vx, vy, max_speed)
+
+INTEGRATORS: Dict[str, Type[Integrator]] = {
+    SemiImplicitEuler.name: SemiImplicitEuler,
+    VelocityVerlet.name: VelocityVerlet,
+    MidpointRK2.name: MidpointRK2,
+}
+
+def register_integrator(cls: Type[Integrator]) -> Type[Integrator]:
+    
+    INTEGRATORS[cls.name] = cls
+    return cls
+
+def get_integrator(name: Optional[str] = None) -> Integrator:
+    
+    if name is None:
+        name = config_manager.get("marker_integrator", "euler")
+    try:
+        return INTEGRATORS[name]()
+    except KeyError:
+        raise ValueError(f"unknown marker integrator: {name}") from None
@@ -1,8 +1,209 @@
-
-
-from typing import List, Dict, Any, Tuple
+from collections.abc import MutableMapping
+from typing import List, Dict, Any, Iterator, Optional, Tuple, Union
 import numpy as np
 from gravitas.compute.vector_field import vector_calculator
+from gravitas.core.config import config_manager
+from plugins.integrators import Integrator, SemiImplicitEuler, get_integrator, substep_count
+from plugins.spatial_index import SpatialHash
+
+# per-marker fields, in row order of MarkerStore's backing block
+MARKER_FIELDS = ("x", "y", "mag", "vx", "vy")
+_FIELD_ROWS = {name: row for row, name in enumerate(MARKER_FIELDS)}
+
+class MarkerView(MutableMapping):
+    
+
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store: "MarkerStore", index: int):
+        self._store = store
+        self._index = index
+
+    @property
+    def index(self) -> int:
+        return self._index
+
+    def __getitem__(self, key: str) -> float:
+        if key not in _FIELD_ROWS:
+            raise KeyError(key)
+        if self._index >= len(self._store):
+            raise IndexError(f"marker {self._index} no longer exists")
+        return float(self._store._data[_FIELD_ROWS[key], self._index])
+
+    def __setitem__(self, key: str, value: float) -> None:
+        if key not in _FIELD_ROWS:
+            raise KeyError(key)
+        if self._index >= len(self._store):
+            raise IndexError(f"marker {self._index} no longer exists")
+        self._store._data[_FIELD_ROWS[key], self._index] = value
+        self._store._revision += 1
+
+    def __delitem__(self, key: str) -> None:
+        raise TypeError("marker fields cannot be deleted")
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(MARKER_FIELDS)
+
+    def __len__(self) -> int:
+        return len(MARKER_FIELDS)
+
+    def to_dict(self) -> Dict[str, float]:
+        return {key: self[key] for key in MARKER_FIELDS}
+
+    def __repr__(self) -> str:
+        return f"MarkerView({self._index}, {self.to_dict()})"
+
+class MarkerStore:
+    
+
+    def __init__(self, capacity: int = 64):
+        self._data = np.zeros((len(MARKER_FIELDS), max(1, int(capacity))), dtype=np.float32)
+        self._count = 0
+        # bumped by every add/extend/remove/clear and view write; raw writes into
+        # the field arrays are not counted
+        self._revision = 0
+
+    @classmethod
+    def from_dicts(cls, markers: List[Dict[str, float]]) -> "MarkerStore":
+        
+        store = cls(capacity=len(markers))
+        for m in markers:
+            store.add(m["x"], m["y"], m.get("mag", 1.0), m.get("vx", 0.0), m.get("vy", 0.0))
+        return store
+
+    @classmethod
+    def from_soa(cls, soa: np.ndarray) -> "MarkerStore":
+        
+        soa = np.asarray(soa, dtype=np.float32)
+        if soa.ndim != 2 or soa.shape[0] != len(MARKER_FIELDS):
+            raise ValueError(f"expected a ({len(MARKER_FIELDS)}, n) marker array, got {soa.shape}")
+        store = cls(capacity=soa.shape[1])
+        store._data[:, :soa.shape[1]] = soa
+        store._count = soa.shape[1]
+        return store
+
+    @property
+    def revision(self) -> int:
+        return self._revision
+
+    @property
+    def capacity(self) -> int:
+        return self._data.shape[1]
+
+    @property
+    def x(self) -> np.ndarray:
+        return self._data[0, :self._count]
+
+    @property
+    def y(self) -> np.ndarray:
+        return self._data[1, :self._count]
+
+    @property
+    def mag(self) -> np.ndarray:
+        return self._data[2, :self._count]
+
+    @property
+    def vx(self) -> np.ndarray:
+        return self._data[3, :self._count]
+
+    @property
+    def vy(self) -> np.ndarray:
+        return self._data[4, :self._count]
+
+    def field(self, name: str) -> np.ndarray:
+        
+        return self._data[_FIELD_ROWS[name], :self._count]
+
+    def reserve(self, capacity: int) -> None:
+        
+        if capacity <= self.capacity:
+            return
+
+        # amortized doubling keeps repeated add() calls O(1)
+        new_capacity = max(capacity, self.capacity * 2)
+        data = np.zeros((len(MARKER_FIELDS), new_capacity), dtype=np.float32)
+        data[:, :self._count] = self._data[:, :self._count]
+        self._data = data
+
+    def add(self, x: float, y: float, mag: float = 1.0, vx: float = 0.0, vy: float = 0.0) -> int:
+        
+        self.reserve(self._count + 1)
+        self._data[:, self._count] = (x, y, mag, vx, vy)
+        self._count += 1
+        self._revision += 1
+        return self._count - 1
+
+    def extend(self, x: Union[np.ndarray, List[float]], y: Union[np.ndarray, List[float]],
+               mag: Union[np.ndarray, float] = 1.0, vx: Union[np.ndarray, float] = 0.0,
+               vy: Union[np.ndarray, float] = 0.0) -> None:
+
+        x = np.asarray(x, dtype=np.float32).ravel()
+        n = x.shape[0]
+        start = self._count
+        self.reserve(start + n)
+        for row, values in enumerate((x, y, mag, vx, vy)):
+            self._data[row, start:start + n] = values
+        self._count += n
+        self._revision += 1
+
+    def remove(self, index: int) -> None:
+        
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(f"marker index out of range: {index}")
+
+        # swap-remove: the last marker takes the freed slot
+        last = self._count - 1
+        if index != last:
+            self._data[:, index] = self._data[:, last]
+        self._count = last
+        self._revision += 1
+
+    def clear(self) -> None:
+        
+        self._count = 0
+        self._revision += 1
+
+    def positions(self) -> np.ndarray:
+        
+        return np.ascontiguousarray(self._data[:2, :self._count].T)
+
+    def soa(self) -> np.ndarray:
+        
+        # (fields, count) view of the live block, rows in MARKER_FIELDS order
+        return self._data[:, :self._count]
+
+    def tiny_vector_positions(self) -> np.ndarray:
+        
+        return np.ascontiguousarray(self._data[:3, :self._count].T)
+
+    def to_list(self) -> List[Dict[str, float]]:
+        
+        return [dict(zip(MARKER_FIELDS, column)) for column in self._data[:, :self._count].T.tolist()]
+
+    def copy(self) -> "MarkerStore":
+        
+        store = MarkerStore(capacity=self.capacity)
+        store._data[:, :self._count] = self._data[:, :self._count]
+        store._count = self._count
+        return store
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __bool__(self) -> bool:
+        return self._count > 0
+
+    def __getitem__(self, index: int) -> MarkerView:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(f"marker index out of range: {index}")
+        return MarkerView(self, index)
+
+    def __iter__(self) -> Iterator[MarkerView]:
+        return (MarkerView(self, i) for i in range(self._count))
 
 class MarkerSystem:
     
@@ -10,23 +211,57 @@ class MarkerSystem:
     def __init__(self, app_core):
         self.app_core = app_core
         self.vector_calculator = vector_calculator
-        self.markers = []
+        self.markers = MarkerStore()
+        # None follows the marker_integrator config option
+        self.integrator: Optional[Integrator] = None
+        # uniform-grid index over marker positions, sized to the last grid seen
+        self._index: Optional[SpatialHash] = None
+        self._index_bounds: Optional[Tuple[int, int]] = None
+        self._index_key: Optional[Tuple[int, int, float]] = None
+        # queries reuse the index until markers move or the store changes
+        self._index_dirty = True
+        self._index_source: Optional[Tuple[MarkerStore, int]] = None
 
     def add_marker(self, x: float, y: float, mag: float = 1.0, vx: float = 0.0, vy: float = 0.0) -> None:
         
-        marker = {"x": float(x), "y": float(y), "mag": float(mag), "vx": float(vx), "vy": float(vy)}
-        self.markers.append(marker)
+        self.markers.add(float(x), float(y), float(mag), float(vx), float(vy))
+        self._index_dirty = True
+        self._sync_to_state_manager()
+
+    def remove_marker(self, index: int) -> None:
+        
+        self.markers.remove(index)
+        self._index_dirty = True
         self._sync_to_state_manager()
 
     def clear_markers(self) -> None:
         
-        self.markers = []
+        self.markers.clear()
+        self._index_dirty = True
         self._sync_to_state_manager()
 
-    def get_markers(self) -> List[Dict[str, float]]:
+    def get_markers(self) -> List[MarkerView]:
         
         return list(self.markers)
 
+    def find_nearest_marker(self, x: float, y: float, max_distance: float = float("inf")) -> Optional[MarkerView]:
+        
+        self._sync_markers_from_state()
+        if not self.markers:
+            return None
+        index, _ = self._refresh_index().nearest(x, y, max_distance)
+        return self.markers[index] if index >= 0 else None
+
+    def markers_in_radius(self, x: float, y: float, radius: float) -> np.ndarray:
+        
+        self._sync_markers_from_state()
+        return self._refresh_index().query_radius(x, y, radius)
+
+    def markers_in_rect(self, x0: float, y0: float, x1: float, y1: float) -> np.ndarray:
+        
+        self._sync_markers_from_state()
+        return self._refresh_index().query_rect(x0, y0, x1, y1)
+
     def update_markers(self, grid: np.ndarray, dt: float = 1.0, gravity: float = 0.01, speed_factor: float = 0.9) -> None:
         
         if not self._is_valid_grid(grid):
@@ -34,19 +269,49 @@ class MarkerSystem:
 
         self._sync_markers_from_state()
 
-        h, w = grid.shape[0], grid.shape[1]
-        cell_size = self.app_core.state_manager.get("cell_size", 1.0)
-
-        marker_positions = self._collect_marker_positions()
-        fitted_vectors = self._fit_vectors_batch(grid, marker_positions)
+        if not self.markers:
+            return
 
-        new_markers = []
-        for i, marker in enumerate(self.markers):
-            updated_marker = self._update_single_marker(marker, fitted_vectors[i], dt, gravity, speed_factor, cell_size, w, h)
-            if updated_marker:
-                new_markers.append(updated_marker)
+        cell_size = self.app_core.state_manager.get("cell_size", 1.0)
 
-        self._update_markers_list(new_markers)
+        store = self.markers
+        integrator = self.integrator or get_integrator()
+        # euler clamps speed before moving, so max_speed * dt bounds the frame's
+        # displacement without sampling the field first
+        substeps = substep_count(cell_size, dt, cell_size, config_manager.get("marker_cfl", 1.0),
+                                 config_manager.get("marker_max_substeps", 4))
+        if substeps == 1 and type(integrator) is SemiImplicitEuler:
+            # sample, velocity update, speed clamp, integrate and damping in one pass
+            self.vector_calculator.step_markers(
+                grid, store.x, store.y, store.mag, store.vx, store.vy,
+                dt=dt, gravity=gravity, speed_factor=speed_factor, max_speed=cell_size
+            )
+        else:
+            integrator.advance(self.vector_calculator, grid, store.x, store.y, store.mag, store.vx, store.vy,
+                               dt=dt, gravity=gravity, speed_factor=speed_factor, max_speed=cell_size,
+                               cell_size=cell_size)
+
+        # re-sorting every step keeps the order nearly sorted, so each refresh stays cheap
+        self._index_bounds = (grid.shape[1], grid.shape[0])
+        self._index_dirty = True
+        self._refresh_index()
+
+    def _refresh_index(self) -> SpatialHash:
+        
+        width, height = self._index_bounds or (config_manager.get("grid_width", 640),
+                                               config_manager.get("grid_height", 480))
+        key = (int(width), int(height), float(config_manager.get("marker_index_cell_size", 8.0)))
+        if self._index is None or self._index_key != key:
+            self._index = SpatialHash(*key)
+            self._index_key = key
+            self._index_dirty = True
+        source = (self.markers, self.markers.revision)
+        if self._index_dirty or self._index_source is None or self._index_source[0] is not source[0] \
+                or self._index_source[1] != source[1]:
+            self._index.update(self.markers.x, self.markers.y)
+            self._index_source = source
+            self._index_dirty = False
+        return self._index
 
     def _is_valid_grid(self, grid: np.ndarray) -> bool:
         
@@ -56,93 +321,60 @@ class MarkerSystem:
         
         try:
             stored = self.app_core.state_manager.get("markers", None)
-            if stored is not None:
-                self.markers = list(stored)
+            if stored is None or stored is self.markers:
+                return
+            if isinstance(stored, MarkerStore):
+                self.markers = stored
+            else:
+                self.markers = MarkerStore.from_dicts(list(stored))
+            self._index_dirty = True
         except Exception:
             pass
 
-    def _collect_marker_positions(self) -> List[Tuple[float, float]]:
-        
-        return [(m["x"], m["y"]) for m in self.markers]
-
-    def _fit_vectors_batch(self, grid: np.ndarray, positions: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
-        
-        return self.vector_calculator.fit_vectors_at_positions_batch(grid, positions)
-
-    def _update_single_marker(self, marker: Dict[str, float], fitted_vector: Tuple[float, float], dt: float, gravity: float, speed_factor: float, cell_size: float, w: int, h: int) -> Dict[str, float]:
-        
-        x, y, mag, vx, vy = marker["x"], marker["y"], marker["mag"], marker["vx"], marker["vy"]
-        try:
-            fitted_vx, fitted_vy = fitted_vector
-
-            # updatevelocity
-            vx += fitted_vx / mag
-            vy += fitted_vy / mag
-
-            # clampvelocity
-            vx, vy = self._clamp_velocity(vx, vy, cell_size)
-
-            # updateposition
-            x, y = self._update_position(x, y, vx, vy, dt, w, h)
-
-            vx, vy = self._apply_physics(vx, vy, gravity, speed_factor, dt)
-
-            marker["x"], marker["y"], marker["vx"], marker["vy"] = x, y, vx, vy
-            return marker
-        except Exception as e:
-            print(f"Error updating marker at ({x}, {y}): {str(e)}")
-            return marker
-
-    def _clamp_velocity(self, vx: float, vy: float, cell_size: float) -> Tuple[float, float]:
-        
-        speed = (vx ** 2 + vy ** 2) ** 0.5
-        if speed > cell_size:
-            vx = vx / speed * cell_size
-            vy = vy / speed * cell_size
-        return vx, vy
-
-    def _update_position(self, x: float, y: float, vx: float, vy: float, dt: float, w: int, h: int) -> Tuple[float, float]:
-        
-        new_x = max(0.0, min(w - 1.0, x + vx * dt))
-        new_y = max(0.0, min(h - 1.0, y + vy * dt))
-        return new_x, new_y
-
-    def _apply_physics(self, vx: float, vy: float, gravity: float, speed_factor: float, dt: float) -> Tuple[float, float]:
-        
-        vy += gravity * dt
-        vx *= speed_factor
-        vy *= speed_factor
-        return vx, vy
-
-    def _update_markers_list(self, new_markers: List[Dict[str, float]]) -> None:
-        
-        self.markers = new_markers
-        self._sync_to_state_manager()
-
     def create_tiny_vector(self, grid: np.ndarray, x: float, y: float, mag: float = 1.0) -> None:
         self.vector_calculator.create_tiny_vector(grid, x, y, mag)
 
     def add_vector_at_position(self, grid: np.ndarray, x: float, y: float, vx: float, vy: float) -> None:
         self.vector_calculator.add_vector_at_position(grid, x, y, vx, vy)
-        
+
 
     def fit_vector_at_position(self, grid: np.ndarray, x: float, y: float) -> Tuple[float, float]:
         return self.vector_calculator.fit_vector_at_position(grid, x, y)
 
     def update_field_and_markers(self, grid: np.ndarray, dt: float, gravity: float, speed_factor: float) -> None:
-        self.batch_create_tiny_vectors_from_markers(grid, self.markers)
+        self._sync_markers_from_state()
+        if self.app_core.config_manager.get("field_mode", "splat") == "potential":
+            self.add_potential_field_from_markers(grid, self.markers)
+        else:
+            self.batch_create_tiny_vectors_from_markers(grid, self.markers)
         self.update_markers(grid, dt=dt, gravity=gravity, speed_factor=speed_factor)
 
-    def batch_create_tiny_vectors_from_markers(self, grid: np.ndarray, markers: List[Dict[str, float]]) -> None:
+    def batch_create_tiny_vectors_from_markers(self, grid: np.ndarray, markers: Union[MarkerStore, List[Dict[str, float]]]) -> None:
         
-        tiny_vector_positions = [(m["x"], m["y"], m["mag"]) for m in markers]
-        if tiny_vector_positions:
-            self.vector_calculator.create_tiny_vectors_batch(grid, tiny_vector_positions)
+        if not markers:
+            return
+
+        if isinstance(markers, MarkerStore):
+            tiny_vector_positions = markers.tiny_vector_positions()
+        else:
+            tiny_vector_positions = np.array([(m["x"], m["y"], m["mag"]) for m in markers], dtype=np.float32)
+        self.vector_calculator.create_tiny_vectors_batch(grid, tiny_vector_positions)
+
+    def add_potential_field_from_markers(self, grid: np.ndarray, markers: Union[MarkerStore, List[Dict[str, float]]]) -> None:
+        
+        if not markers:
+            return
+
+        if isinstance(markers, MarkerStore):
+            positions = markers.tiny_vector_positions()
+        else:
+            positions = np.array([(m["x"], m["y"], m["mag"]) for m in markers], dtype=np.float32)
+        self.vector_calculator.add_potential_field(grid, positions)
 
     def _sync_to_state_manager(self) -> None:
         
+        # the store is shared by reference, so per-frame updates need no sync
         try:
-            self.app_core.state_manager.set("markers", list(self.markers))
+            self.app_core.state_manager.set("markers", self.markers)
         except Exception:
             pass
-
@@ -0,0 +1,136 @@
+import math
+from typing import Tuple
+import numpy as np
+
+
+class SpatialHash:
+    
+
+    def __init__(self, width: float, height: float, cell_size: float = 8.0):
+        if width <= 0 or height <= 0:
+            raise ValueError(f"invalid index bounds: {width}x{height}")
+        if cell_size <= 0:
+            raise ValueError(f"invalid cell size: {cell_size}")
+
+        self._cell = float(cell_size)
+        self._cols = max(1, int(math.ceil(width / self._cell)))
+        self._rows = max(1, int(math.ceil(height / self._cell)))
+
+        # CSR layout: markers of cell c are order[starts[c]:starts[c + 1]]
+        self._keys = np.empty(0, dtype=np.intp)
+        self._order = np.empty(0, dtype=np.intp)
+        self._starts = np.zeros(self._rows * self._cols + 1, dtype=np.intp)
+        self._x = np.empty(0, dtype=np.float32)
+        self._y = np.empty(0, dtype=np.float32)
+        self.rebuilds = 0
+        self.reorders = 0
+
+    @property
+    def cell_size(self) -> float:
+        return self._cell
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return (self._rows, self._cols)
+
+    def __len__(self) -> int:
+        return self._keys.shape[0]
+
+    def _cell_coords(self, x, y) -> Tuple[np.ndarray, np.ndarray]:
+        cx = np.clip(np.floor(np.asarray(x, dtype=np.float64) / self._cell), 0, self._cols - 1).astype(np.intp)
+        cy = np.clip(np.floor(np.asarray(y, dtype=np.float64) / self._cell), 0, self._rows - 1).astype(np.intp)
+        return cx, cy
+
+    def update(self, x: np.ndarray, y: np.ndarray) -> None:
+        
+        # the index keeps views of the caller's position arrays; queries read them directly
+        self._x, self._y = x, y
+        cx, cy = self._cell_coords(x, y)
+        keys = cy * self._cols + cx
+
+        if keys.shape[0] != self._keys.shape[0]:
+            # markers were added or removed: sort from scratch
+            self._order = np.argsort(keys, kind="stable")
+            self.rebuilds += 1
+        elif np.array_equal(keys, self._keys):
+            return
+        else:
+            # markers move a few cells per step, so the previous order is almost sorted
+            # and the stable sort over it runs close to linear time
+            self._order = self._order[np.argsort(keys[self._order], kind="stable")]
+            self.reorders += 1
+
+        self._keys = keys
+        self._starts = np.searchsorted(keys[self._order], np.arange(self._rows * self._cols + 1))
+
+    def _candidates(self, cx0: int, cx1: int, cy0: int, cy1: int) -> np.ndarray:
+        # markers in the inclusive cell block; each cell row is one contiguous run of cells.
+        # Markers outside the bounds are binned into the edge cells, so a block past
+        # an edge still reads that edge's cells
+        cx0, cx1 = min(max(cx0, 0), self._cols - 1), max(min(cx1, self._cols - 1), 0)
+        cy0, cy1 = min(max(cy0, 0), self._rows - 1), max(min(cy1, self._rows - 1), 0)
+        if cx0 > cx1 or cy0 > cy1:
+            return np.empty(0, dtype=np.intp)
+        runs = [self._order[self._starts[row * self._cols + cx0]:self._starts[row * self._cols + cx1 + 1]]
+                for row in range(cy0, cy1 + 1)]
+        return np.concatenate(runs) if len(runs) > 1 else runs[0]
+
+    def query_rect(self, x0: float, y0: float, x1: float, y1: float) -> np.ndarray:
+        
+        x0, x1 = min(x0, x1), max(x0, x1)
+        y0, y1 = min(y0, y1), max(y0, y1)
+        c = self._cell
+        candidates = self._candidates(int(math.floor(x0 / c)), int(math.floor(x1 / c)),
+                                      int(math.floor(y0 / c)), int(math.floor(y1 / c)))
+        px, py = self._x[candidates], self._y[candidates]
+        inside = (px >= x0) & (px <= x1) & (py >= y0) & (py <= y1)
+        return np.sort(candidates[inside])
+
+    def query_radius(self, x: float, y: float, radius: float) -> np.ndarray:
+        
+        c = self._cell
+        candidates = self._candidates(int(math.floor((x - radius) / c)), int(math.floor((x + radius) / c)),
+                                      int(math.floor((y - radius) / c)), int(math.floor((y + radius) / c)))
+        dx = self._x[candidates] - x
+        dy = self._y[candidates] - y
+        return np.sort(candidates[dx * dx + dy * dy <= radius * radius])
+
+    def nearest(self, x: float, y: float, max_distance: float = math.inf) -> Tuple[int, float]:
+        
+        # search square rings of cells outwards; once a hit is closer than the
+        # nearest unsearched ring, no farther ring can beat it
+        if len(self) == 0:
+            return -1, math.inf
+        c = self._cell
+        qx = int(math.floor(x / c))
+        qy = int(math.floor(y / c))
+        best, best_dist = -1, math.inf
+        limit = max(self._cols, self._rows) + max(abs(qx), abs(qy))
+        if math.isfinite(max_distance):
+            limit = min(limit, int(math.ceil(max_distance / c)) + 1)
+
+        for ring in range(limit + 1):
+            if ring == 0:
+                candidates = self._candidates(qx, qx, qy, qy)
+            else:
+                candidates = np.concatenate((
+                    self._candidates(qx - ring, qx + ring, qy - ring, qy - ring),
+                    self._candidates(qx - ring, qx + ring, qy + ring, qy + ring),
+                    self._candidates(qx - ring, qx - ring, qy - ring + 1, qy + ring - 1),
+                    self._candidates(qx + ring, qx + ring, qy - ring + 1, qy + ring - 1),
+                ))
+            if candidates.shape[0]:
+                dx = self._x[candidates] - x
+                dy = self._y[candidates] - y
+                dist = dx * dx + dy * dy
+                i = int(np.argmin(dist))
+                if dist[i] < best_dist:
+                    best, best_dist = int(candidates[i]), float(dist[i])
+            # every point in ring + 1 or beyond is at least ring * cell away
+            if best >= 0 and math.sqrt(best_dist) <= ring * c:
+                break
+
+        best_dist = math.sqrt(best_dist)
+        if best < 0 or best_dist > max_distance:
+            return -1, math.inf
+        return best, best_dist
@@ -1,5 +1,6 @@
 
 import numpy as np
+from gravitas.compute.active_tiles import active_tiles_for
 
 def add_inward_edge_vectors(grid: np.ndarray, magnitude: float = 1.0) -> None:
     
@@ -15,4 +16,8 @@ def add_inward_edge_vectors(grid: np.ndarray, magnitude: float = 1.0) -> None:
     grid[0, 0] += [magnitude, magnitude]
     grid[0, width-1] += [-magnitude, magnitude]
     grid[height-1, 0] += [magnitude, -magnitude]
-    grid[height-1, width-1] += [-magnitude, -magnitude]
\ No newline at end of file
+    grid[height-1, width-1] += [-magnitude, -magnitude]
+
+    tiles = active_tiles_for(grid)
+    if tiles is not None:
+        tiles.mark_border()
@@ -20,6 +20,8 @@ class UIManager:
         self._mouse_left_pressed = False
 
         self._selected_marker = None
+        # screen position where a left drag over empty space started a box selection
+        self._box_start = None
 
         self._mouse_middle_pressed = False
 
@@ -127,6 +129,7 @@ class UIManager:
 
                 mx, my = input_handler.get_mouse_position()
                 self._selected_marker = self.controller.handle_mouse_left_press(mx, my)
+                self._box_start = (mx, my) if self._selected_marker is None else None
             except Exception as e:
                 print(f"[error] handlermouseleftkeypressedhourexception: {e}")
 
@@ -143,6 +146,14 @@ class UIManager:
         def on_mouse_left_release():
             self._mouse_left_pressed = False
             self._selected_marker = None
+            if self._box_start is not None:
+                try:
+                    mx, my = input_handler.get_mouse_position()
+                    if (mx, my) != self._box_start:
+                        self.controller.select_markers_in_box(*self._box_start, mx, my)
+                except Exception as e:
+                    print(f"[error] box select exception: {e}")
+                self._box_start = None
 
         input_handler.register_mouse_callback(MouseMap.LEFT, MouseMap.RELEASE, on_mouse_left_release)
 
@@ -0,0 +1,215 @@
+import gc
+import time
+import pytest
+import numpy as np
+from unittest.mock import patch
+from gravitas.compute.active_tiles import ActiveTiles, active_tiles_for, track_activity, untrack_activity
+from gravitas.compute.cpu_vector_field import CPUVectorFieldCalculator
+from gravitas.compute.vector_field import VectorFieldCalculator
+from plugins.toolkit import add_inward_edge_vectors
+
+
+def sparse_positions(rng, count, width, height):
+    return np.column_stack((
+        rng.uniform(0.0, width - 1.0, count),
+        rng.uniform(0.0, height - 1.0, count),
+        rng.uniform(-1.0, 1.0, count),
+    )).astype(np.float32)
+
+
+class TestActiveTiles:
+    
+
+    def test_new_map_is_all_dirty(self):
+        
+        tiles = ActiveTiles(100, 70, 32)
+
+        assert tiles.mask.shape == (4, 3)
+        assert tiles.fraction() == 1.0
+        assert tiles.active_cells() == 100 * 70
+
+    def test_mark_points_covers_bilinear_footprint(self):
+        
+        tiles = ActiveTiles(64, 64, 16)
+        tiles.reset()
+
+        # x = 15.5 touches cells 14..17 with radius 1, which straddle tiles 0 and 1
+        tiles.mark_points([15.5], [40.0], radius=1)
+
+        assert set(zip(*np.nonzero(tiles.mask))) == {(2, 0), (2, 1)}
+
+    def test_mark_points_clamps_out_of_range(self):
+        
+        tiles = ActiveTiles(64, 64, 16)
+        tiles.reset()
+
+        tiles.mark_points([-5.0, 500.0], [-5.0, 500.0], radius=1)
+
+        assert tiles.mask[0, 0] and tiles.mask[3, 3]
+        assert tiles.count() == 2
+
+    def test_regions_are_runs_grown_by_halo(self):
+        
+        tiles = ActiveTiles(64, 64, 16)
+        tiles.reset()
+        tiles.mask[1, 1:3] = True
+        tiles.mask[3, 0] = True
+
+        assert tiles.regions() == [(16, 32, 16, 48), (48, 64, 0, 16)]
+        assert tiles.regions(halo=1) == [(15, 33, 15, 49), (47, 64, 0, 17)]
+
+    def test_clear_touches_only_dirty_tiles(self):
+        
+        grid = np.ones((64, 64, 2), dtype=np.float32)
+        tiles = ActiveTiles(64, 64, 32)
+        tiles.reset()
+        tiles.mark_rect(0, 1, 0, 1)
+
+        tiles.clear(grid)
+
+        assert np.all(grid[:32, :32] == 0.0)
+        # clean tiles are assumed zero and never written
+        assert np.all(grid[32:, :] == 1.0)
+        assert tiles.count() == 0
+
+    def test_tracking_follows_array_identity(self):
+        
+        grid = np.zeros((32, 32, 2), dtype=np.float32)
+        tiles = track_activity(grid, 16)
+
+        assert active_tiles_for(grid) is tiles
+        assert active_tiles_for(grid.copy()) is None
+        untrack_activity(grid)
+        assert active_tiles_for(grid) is None
+
+    def test_retracking_returns_existing_map(self):
+        
+        grid = np.zeros((32, 32, 2), dtype=np.float32)
+        tiles = track_activity(grid, 16)
+        tiles.reset()
+
+        assert track_activity(grid, 16) is tiles
+        assert tiles.count() == 0
+        # a different tile size replaces the map
+        assert track_activity(grid, 8) is not tiles
+        assert active_tiles_for(grid).tile_size == 8
+
+    def test_tracking_is_dropped_with_the_grid(self):
+        
+        grid = np.zeros((32, 32, 2), dtype=np.float32)
+        track_activity(grid, 16)
+        key = id(grid)
+        del grid
+        gc.collect()
+
+        from gravitas.compute import active_tiles
+        assert key not in active_tiles._tracked
+
+
+class TestSparseStencil:
+    
+
+    def setup_method(self):
+        
+        self.calculator = VectorFieldCalculator()
+        self.calculator._current_device = "cpu"
+
+    @pytest.mark.parametrize("tile_size", [16, 32])
+    def test_sparse_frames_match_dense(self, tile_size):
+        
+        rng = np.random.default_rng(3)
+        dense = np.zeros((150, 200, 2), dtype=np.float32)
+        sparse = np.zeros_like(dense)
+        tiles = track_activity(sparse, tile_size)
+        tiles.reset()
+        cpu = CPUVectorFieldCalculator()
+
+        for _ in range(4):
+            positions = sparse_positions(rng, 5, 200, 150)
+
+            dense.fill(0.0)
+            add_inward_edge_vectors(dense)
+            cpu.create_tiny_vectors_batch(dense, positions)
+            for _ in range(3):
+                cpu.update_grid_with_adjacent_sum(dense)
+
+            self.calculator.clear_grid(sparse)
+            add_inward_edge_vectors(sparse)
+            self.calculator.create_tiny_vectors_batch(sparse, positions)
+            for _ in range(3):
+                self.calculator.update_grid_with_adjacent_sum(sparse)
+
+            assert np.array_equal(sparse, dense)
+            assert tiles.fraction() < 1.0
+
+    def test_iterate_stays_sparse(self):
+        
+        rng = np.random.default_rng(4)
+        dense = np.zeros((128, 128, 2), dtype=np.float32)
+        sparse = np.zeros_like(dense)
+        tiles = track_activity(sparse, 16)
+        tiles.reset()
+        positions = sparse_positions(rng, 3, 128, 128)
+        CPUVectorFieldCalculator().create_tiny_vectors_batch(dense, positions)
+        self.calculator.create_tiny_vectors_batch(sparse, positions)
+
+        CPUVectorFieldCalculator().iterate(dense, 5, method="direct")
+        cpu = self.calculator._cpu_calculator
+        with patch.object(cpu, "update_grid_regions", wraps=cpu.update_grid_regions) as regions_step:
+            self.calculator.iterate(sparse, 5, method="direct")
+
+        assert np.array_equal(sparse, dense)
+        assert tiles.fraction() < 0.5
+        # the dirty regions are derived once, with a 5-cell halo, for all five steps
+        assert regions_step.call_count == 5
+        assert all(call.args[1] == regions_step.call_args_list[0].args[1] for call in regions_step.call_args_list)
+
+    def test_stencil_dirties_only_reached_neighbours(self):
+        
+        grid = np.zeros((64, 64, 2), dtype=np.float32)
+        tiles = track_activity(grid, 16)
+        tiles.reset()
+        self.calculator.add_vector_at_position(grid, 16.0, 16.0, 1.0, 1.0)
+        assert tiles.count() == 1
+
+        self.calculator.update_grid_with_adjacent_sum(grid)
+
+        # the value spreads one cell up and left; the diagonal tile stays clean
+        assert set(zip(*np.nonzero(tiles.mask))) == {(0, 1), (1, 0), (1, 1)}
+
+        self.calculator.add_vector_at_position(grid, 40.0, 40.0, 1.0, 0.0)
+        self.calculator.update_grid_with_adjacent_sum(grid)
+        assert tiles.mask[2, 2]
+        assert tiles.count() == 5
+
+    def test_cost_scales_with_activity(self):
+        
+        size = 1024
+        grid = np.zeros((size, size, 2), dtype=np.float32)
+        tiles = track_activity(grid, 32)
+        tiles.reset()
+        positions = sparse_positions(np.random.default_rng(5), 4, size, size)
+        untracked = np.zeros_like(grid)
+
+        def frame(target):
+            self.calculator.clear_grid(target)
+            self.calculator.create_tiny_vectors_batch(target, positions)
+            self.calculator.update_grid_with_adjacent_sum(target)
+
+        def best(target):
+            frame(target)
+            times = []
+            for _ in range(3):
+                t0 = time.perf_counter()
+                frame(target)
+                times.append(time.perf_counter() - t0)
+            return min(times)
+
+        sparse_time = best(grid)
+        dense_time = best(untracked)
+        print(f"\n1024^2 frame, 4 markers: sparse {sparse_time * 1000:.2f} ms, dense {dense_time * 1000:.2f} ms")
+        assert sparse_time < dense_time
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,58 @@
+import pytest
+from unittest.mock import Mock
+from gravitas.compute.backends import BackendRegistry
+
+
+class TestBackendRegistry:
+    
+
+    def setup_method(self):
+        
+        self.registry = BackendRegistry()
+
+    def test_factory_runs_on_first_get_only(self):
+        
+        factory = Mock(return_value=object())
+        self.registry.register("cpu", factory)
+
+        assert not self.registry.is_loaded("cpu")
+        factory.assert_not_called()
+
+        first = self.registry.get("cpu")
+        second = self.registry.get("cpu")
+
+        assert first is second
+        factory.assert_called_once()
+        assert self.registry.init_time("cpu") is not None
+
+    def test_failure_is_remembered(self):
+        
+        factory = Mock(side_effect=RuntimeError("no platform"))
+        self.registry.register("gpu", factory)
+
+        assert self.registry.get("gpu") is None
+        assert self.registry.get("gpu") is None
+        factory.assert_called_once()
+        assert self.registry.error("gpu") == "no platform"
+
+    def test_reset_cleans_up_and_retries(self):
+        
+        backend = Mock()
+        factory = Mock(return_value=backend)
+        self.registry.register("cpu", factory)
+        self.registry.get("cpu")
+
+        self.registry.reset("cpu")
+
+        backend.cleanup.assert_called_once()
+        assert not self.registry.is_loaded("cpu")
+        self.registry.get("cpu")
+        assert factory.call_count == 2
+
+    def test_unknown_backend(self):
+        
+        assert self.registry.get("tpu") is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,53 @@
+import json
+import os
+import pytest
+from gravitas.compute.cache import atomic_write, cache_dir, load_json, save_json_entry
+
+
+class TestCacheFiles:
+    
+
+    def test_cache_dir_follows_xdg(self, monkeypatch, tmp_path):
+        
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+
+        assert cache_dir() == os.path.join(str(tmp_path), "gravitas")
+        assert cache_dir("opencl") == os.path.join(str(tmp_path), "gravitas", "opencl")
+
+    def test_save_merges_entries(self, tmp_path):
+        
+        path = str(tmp_path / "nested" / "entries.json")
+        save_json_entry(path, "a", [8, 8])
+        save_json_entry(path, "b", None)
+        save_json_entry(path, "a", {"x": 1})
+
+        assert load_json(path) == {"a": {"x": 1}, "b": None}
+        assert [name for name in os.listdir(tmp_path / "nested") if name.endswith(".tmp")] == []
+
+    def test_bad_files_load_empty(self, tmp_path):
+        
+        assert load_json(str(tmp_path / "missing.json")) == {}
+        (tmp_path / "garbage.json").write_text("{not json")
+        assert load_json(str(tmp_path / "garbage.json")) == {}
+        (tmp_path / "list.json").write_text(json.dumps([1, 2]))
+        assert load_json(str(tmp_path / "list.json")) == {}
+        save_json_entry(str(tmp_path / "garbage.json"), "k", 1)
+        assert load_json(str(tmp_path / "garbage.json")) == {"k": 1}
+
+    def test_failed_write_leaves_target_and_no_temp(self, tmp_path, monkeypatch):
+        
+        path = str(tmp_path / "blob.bin")
+        atomic_write(path, b"old")
+
+        def fail(src, dst):
+            raise OSError("disk full")
+        monkeypatch.setattr(os, "replace", fail)
+        with pytest.raises(OSError):
+            atomic_write(path, b"new")
+
+        assert open(path, "rb").read() == b"old"
+        assert os.listdir(tmp_path) == ["blob.bin"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
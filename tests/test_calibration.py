@@ -0,0 +1,218 @@
+import json
+import pytest
+import numpy as np
+from unittest.mock import Mock
+from gravitas.compute.calibration import DeviceCalibrator, CALIBRATED_OPERATIONS, find_crossover
+from gravitas.compute.vector_field import VectorFieldCalculator
+
+
+class FakeBackend:
+    
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = []
+
+    def update_grid_with_adjacent_sum(self, grid):
+        self.calls.append(("update_grid_with_adjacent_sum", grid.shape[0] * grid.shape[1]))
+        return grid
+
+    def fit_vectors_at_positions_batch(self, grid, positions):
+        self.calls.append(("fit_vectors_at_positions_batch", len(positions)))
+        return np.zeros((len(positions), 2), dtype=np.float32)
+
+    def create_tiny_vectors_batch(self, grid, positions):
+        self.calls.append(("create_tiny_vectors_batch", len(positions)))
+
+
+def synthetic_measure(backend, operation, make_args):
+    # CPU cost grows with size, GPU pays a fixed launch overhead
+    grid, *rest = make_args()
+    if not rest:
+        size = grid.shape[0] * grid.shape[1]
+        return size * 1e-6 if backend.name == "cpu" else 5e-3
+    # marker operations: the GPU also pays to move the grid
+    return len(rest[0]) * 1e-6 if backend.name == "cpu" else 5e-3 + grid.size * 1e-7
+
+
+class TestFindCrossover:
+    
+
+    def test_gpu_wins_from_midpoint(self):
+        
+        assert find_crossover([10, 100, 1000], [1, 2, 3], [5, 1, 1]) == pytest.approx(np.sqrt(10 * 100))
+
+    def test_gpu_never_wins(self):
+        
+        assert find_crossover([10, 100], [1, 1], [2, 2]) is None
+
+    def test_gpu_always_wins(self):
+        
+        assert find_crossover([10, 100], [2, 2], [1, 1]) == 10
+
+    def test_only_trailing_wins_count(self):
+        
+        # a win at a small size followed by a loss is noise, not a crossover
+        assert find_crossover([10, 100, 1000], [2, 1, 3], [1, 2, 1]) == pytest.approx(np.sqrt(100 * 1000))
+
+
+class TestDeviceCalibrator:
+    
+
+    def make_calibrator(self, tmp_path):
+        
+        calibrator = DeviceCalibrator(str(tmp_path / "calibration.json"), grid_sides=(16, 64, 256),
+                                      marker_counts=(16, 1024, 65536, 1048576), marker_grid_sides=(32, 1024),
+                                      repeats=1)
+        calibrator._measure = synthetic_measure
+        return calibrator
+
+    def test_calibrate_records_crossovers(self, tmp_path):
+        
+        calibrator = self.make_calibrator(tmp_path)
+
+        crossovers = calibrator.calibrate(FakeBackend("cpu"), FakeBackend("gpu"))
+
+        assert set(crossovers) == set(CALIBRATED_OPERATIONS)
+        assert crossovers["update_grid_with_adjacent_sum"] == pytest.approx(np.sqrt(64 * 64 * 256 * 256))
+        # the crossover for marker operations moves with the grid area
+        assert crossovers["create_tiny_vectors_batch"] == {
+            str(32 * 32): pytest.approx(np.sqrt(1024 * 65536)),
+            str(1024 * 1024): pytest.approx(np.sqrt(65536 * 1048576)),
+        }
+
+    def test_choose_routes_by_size(self, tmp_path):
+        
+        calibrator = self.make_calibrator(tmp_path)
+        cpu, gpu = FakeBackend("cpu"), FakeBackend("gpu")
+
+        assert calibrator.choose("update_grid_with_adjacent_sum", 64 * 64, cpu, gpu) == "cpu"
+        assert calibrator.choose("update_grid_with_adjacent_sum", 512 * 512, cpu, gpu) == "gpu"
+        assert calibrator.choose("create_tiny_vectors_batch", 100000, cpu, gpu, cells=40 * 40) == "gpu"
+        assert calibrator.choose("create_tiny_vectors_batch", 100000, cpu, gpu, cells=900 * 900) == "cpu"
+
+    def test_untabled_marker_entries_are_recalibrated(self, tmp_path):
+        
+        calibrator = self.make_calibrator(tmp_path)
+        key = DeviceCalibrator.device_key(FakeBackend("gpu"))
+        with open(tmp_path / "calibration.json", "w") as f:
+            json.dump({key: {operation: 1000.0 for operation in CALIBRATED_OPERATIONS}}, f)
+
+        crossovers = calibrator.ensure(FakeBackend("cpu"), FakeBackend("gpu"))
+
+        assert isinstance(crossovers["create_tiny_vectors_batch"], dict)
+
+    def test_crossovers_are_cached_on_disk(self, tmp_path):
+        
+        first = self.make_calibrator(tmp_path)
+        first.calibrate(FakeBackend("cpu"), FakeBackend("gpu"))
+
+        second = self.make_calibrator(tmp_path)
+        second._measure = Mock(side_effect=AssertionError("should load from cache"))
+        crossovers = second.ensure(FakeBackend("cpu"), FakeBackend("gpu"))
+
+        assert crossovers == first.crossovers
+        with open(tmp_path / "calibration.json") as f:
+            assert len(json.load(f)) == 1
+
+    def test_failing_operation_stays_on_cpu(self, tmp_path):
+        
+        calibrator = self.make_calibrator(tmp_path)
+        gpu = FakeBackend("gpu")
+        gpu.update_grid_with_adjacent_sum = Mock(side_effect=RuntimeError("kernel missing"))
+        calibrator._measure = DeviceCalibrator._measure.__get__(calibrator)
+
+        crossovers = calibrator.calibrate(FakeBackend("cpu"), gpu)
+
+        assert crossovers["update_grid_with_adjacent_sum"] is None
+
+
+class TestAutoDevice:
+    
+
+    def test_auto_routes_each_call(self, tmp_path):
+        
+        calculator = VectorFieldCalculator()
+        cpu, gpu = FakeBackend("cpu"), FakeBackend("gpu")
+        calculator._backends = Mock()
+        calculator._backends.get.side_effect = lambda name: {"cpu": cpu, "gpu": gpu}[name]
+        calculator._calibrator = DeviceCalibrator(str(tmp_path / "calibration.json"))
+        calculator._calibrator._crossovers = {
+            "update_grid_with_adjacent_sum": 100 * 100,
+            "fit_vectors_at_positions_batch": None,
+            "create_tiny_vectors_batch": {str(8 * 8): 1000, str(1024 * 1024): None},
+        }
+        calculator._calibrator._key = DeviceCalibrator.device_key(gpu)
+        calculator._current_device = "auto"
+
+        calculator.update_grid_with_adjacent_sum(np.zeros((64, 64, 2), dtype=np.float32))
+        calculator.update_grid_with_adjacent_sum(np.zeros((128, 128, 2), dtype=np.float32))
+        calculator.fit_vectors_at_positions_batch(np.zeros((8, 8, 2), dtype=np.float32), np.zeros((5000, 2)))
+        calculator.create_tiny_vectors_batch(np.zeros((8, 8, 2), dtype=np.float32), np.zeros((5000, 3)))
+        # the same marker count on a large grid stays on the CPU
+        calculator.create_tiny_vectors_batch(np.zeros((1000, 1000, 2), dtype=np.float32), np.zeros((5000, 3)))
+
+        assert cpu.calls == [("update_grid_with_adjacent_sum", 64 * 64), ("fit_vectors_at_positions_batch", 5000),
+                             ("create_tiny_vectors_batch", 5000)]
+        assert gpu.calls == [("update_grid_with_adjacent_sum", 128 * 128), ("create_tiny_vectors_batch", 5000)]
+
+    def test_auto_alternating_backends_on_tracked_grid(self):
+        
+        from gravitas.compute.active_tiles import track_activity
+        calculator = VectorFieldCalculator()
+        if calculator._gpu_calculator is None:
+            pytest.skip("no OpenCL device")
+        rng = np.random.default_rng(2)
+        positions = np.column_stack((rng.uniform(0, 47, 30), rng.uniform(0, 31, 30),
+                                     rng.uniform(-1, 1, 30))).astype(np.float32)
+
+        def run(device, choices=()):
+            grid = np.zeros((32, 48, 2), dtype=np.float32)
+            track_activity(grid, 16)
+            calculator._current_device = device
+            calculator._calibrator = Mock()
+            calculator._calibrator.choose.side_effect = list(choices)
+            calculator.create_tiny_vectors_batch(grid, positions)
+            for _ in range(4):
+                calculator.update_grid_with_adjacent_sum(grid)
+            return grid
+
+        expected = run("cpu")
+        # splat and first step on the GPU, then the steps alternate between backends
+        mixed = run("auto", ["gpu", "gpu", "cpu", "gpu", "cpu"])
+        assert calculator._calibrator.choose.call_count == 5
+        assert np.allclose(mixed, expected, atol=1e-5)
+
+    @pytest.mark.parametrize("device,calls", [("auto", 1), ("cpu", 0)])
+    def test_app_startup_calibrates_auto_device(self, device, calls):
+        
+        from gravitas.core.app import AppCore
+        from gravitas.core.container import container
+        calculator = Mock(spec=VectorFieldCalculator)
+        calculator.current_device = device
+        container.clear()
+        container.register_singleton(VectorFieldCalculator, calculator)
+        try:
+            AppCore()
+        finally:
+            container.clear()
+
+        assert calculator.calibrate.call_count == calls
+        if calls:
+            calculator.calibrate.assert_called_once_with()
+
+    def test_auto_without_gpu_uses_cpu(self):
+        
+        calculator = VectorFieldCalculator()
+        cpu = FakeBackend("cpu")
+        calculator._backends = Mock()
+        calculator._backends.get.side_effect = lambda name: {"cpu": cpu, "gpu": None}[name]
+        calculator._current_device = "auto"
+
+        calculator.update_grid_with_adjacent_sum(np.zeros((512, 512, 2), dtype=np.float32))
+
+        assert cpu.calls == [("update_grid_with_adjacent_sum", 512 * 512)]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,120 @@
+import os
+import random
+import pytest
+import numpy as np
+from gravitas.compute.cpu_vector_field import CPUVectorFieldCalculator
+from gravitas.core.checkpoint import Checkpoint, Checkpointer, load_checkpoint, save_checkpoint
+from gravitas.core.state import StateManager
+from plugins.marker_system import MarkerStore
+
+
+def step(calculator, grid, store, rng, state):
+    # a frame that draws from both the numpy generator and Python's random module
+    kick = rng.integers(0, len(store))
+    store.vx[kick] += rng.normal(0.0, 0.5)
+    store.vy[kick] += random.uniform(-0.5, 0.5)
+    calculator.create_tiny_vectors_batch(grid, store.tiny_vector_positions())
+    calculator.update_grid_with_adjacent_sum(grid)
+    calculator.step_markers(grid, store.x, store.y, store.mag, store.vx, store.vy,
+                            dt=1.0, gravity=state.get("gravity", 0.01),
+                            speed_factor=state.get("speed_factor", 0.9), max_speed=1.0)
+
+
+def start(seed=7):
+    rng = np.random.default_rng(seed)
+    random.seed(seed)
+    store = MarkerStore()
+    store.extend(rng.random(40) * 63.0, rng.random(40) * 47.0, rng.choice([-1.0, 1.0], 40))
+    return np.zeros((48, 64, 2), dtype=np.float32), store, rng
+
+
+class TestCheckpoint:
+    
+
+    def test_round_trip(self, tmp_path):
+        
+        grid = np.random.default_rng(0).standard_normal((16, 16, 2)).astype(np.float16)
+        markers = np.arange(15, dtype=np.float32).reshape(5, 3)
+        rng = np.random.default_rng(3)
+        checkpoint = Checkpoint.capture(42, grid, markers, rng)
+        path = str(tmp_path / "state.ckpt")
+        save_checkpoint(path, checkpoint)
+
+        loaded = load_checkpoint(path)
+        assert loaded.frame == 42
+        assert loaded.grid.dtype == np.float16
+        assert np.array_equal(loaded.grid, grid)
+        assert np.array_equal(loaded.markers, markers)
+        assert loaded.state["vector_neighbor_weight"] == checkpoint.state["vector_neighbor_weight"]
+        assert [name for name in os.listdir(tmp_path)] == ["state.ckpt"]
+
+    def test_restore_rng_and_state(self):
+        
+        rng = np.random.default_rng(11)
+        random.seed(5)
+        np.random.seed(5)
+        # a private state manager, so the settings do not leak into other tests
+        state = StateManager()
+        state.set("gravity", 0.02)
+        checkpoint = Checkpoint.capture(1, np.zeros((2, 2, 2), dtype=np.float32), rng=rng, state=state)
+        expected = (rng.random(3), random.random(), np.random.random())
+
+        state.set("gravity", 0.5)
+        fresh = np.random.default_rng(0)
+        checkpoint.restore(fresh, state=state)
+
+        assert np.array_equal(fresh.random(3), expected[0])
+        assert random.random() == expected[1]
+        assert np.random.random() == expected[2]
+        assert state.get("gravity") == 0.02
+
+        with pytest.raises(ValueError):
+            checkpoint.restore(np.random.Generator(np.random.MT19937(0)))
+
+    def test_restart_replays_bit_identical(self, tmp_path):
+        
+        calculator = CPUVectorFieldCalculator()
+        path = str(tmp_path / "run.ckpt")
+        state = StateManager()
+        state.update({"gravity": 0.01, "speed_factor": 0.95})
+
+        grid, store, rng = start()
+        with Checkpointer(path, interval=10, rng=rng, state=state) as checkpointer:
+            for frame in range(1, 26):
+                step(calculator, grid, store, rng, state)
+                checkpointer.maybe_checkpoint(frame, grid, store.soa())
+            checkpointer.wait()
+            assert checkpointer.written == 2
+        reference_grid, reference_markers = grid.copy(), store.soa().copy()
+
+        # a different run in between must not leak into the restart
+        state.update({"gravity": 0.3, "speed_factor": 0.5})
+        start(seed=99)
+
+        checkpoint = load_checkpoint(path)
+        assert checkpoint.frame == 20
+        rng = np.random.default_rng()
+        checkpoint.restore(rng, state=state)
+        grid = checkpoint.grid.copy()
+        store = MarkerStore.from_soa(checkpoint.markers)
+        for frame in range(checkpoint.frame + 1, 26):
+            step(calculator, grid, store, rng, state)
+
+        assert grid.tobytes() == reference_grid.tobytes()
+        assert store.soa().tobytes() == reference_markers.tobytes()
+
+    def test_interval_zero_disables(self, tmp_path):
+        
+        path = str(tmp_path / "never.ckpt")
+        with Checkpointer(path, interval=0) as checkpointer:
+            assert not checkpointer.maybe_checkpoint(10, np.zeros((2, 2, 2), dtype=np.float32))
+        assert not os.path.exists(path)
+
+    def test_write_errors_surface(self, tmp_path):
+        
+        path = str(tmp_path / "missing" / "run.ckpt")
+        checkpointer = Checkpointer(path, interval=1)
+        checkpointer.checkpoint(1, np.zeros((2, 2, 2), dtype=np.float32))
+        with pytest.raises(RuntimeError):
+            checkpointer.wait()
+        checkpointer.close()
@@ -0,0 +1,105 @@
+import os
+import pytest
+import numpy as np
+
+cl = pytest.importorskip("pyopencl")
+
+from gravitas.compute.cl_cache import ProgramCache, default_cache_dir
+from gravitas.core.config import config_manager
+
+SOURCE = """
+__kernel void scale(__global float* data, const float factor)
+{
+    const int i = get_global_id(0);
+    data[i] *= factor;
+}
+"""
+
+
+@pytest.fixture(scope="module")
+def cl_queue():
+    try:
+        platforms = cl.get_platforms()
+    except Exception:
+        platforms = []
+    devices = [d for p in platforms for d in p.get_devices()]
+    if not devices:
+        pytest.skip("no OpenCL device available")
+    ctx = cl.Context([devices[0]])
+    return ctx, cl.CommandQueue(ctx)
+
+
+def run_scale(ctx, queue, program):
+    data = np.arange(8, dtype=np.float32)
+    buf = cl.Buffer(ctx, cl.mem_flags.READ_WRITE | cl.mem_flags.COPY_HOST_PTR, hostbuf=data)
+    program.scale(queue, data.shape, None, buf, np.float32(2.0))
+    cl.enqueue_copy(queue, data, buf)
+    return data
+
+
+class TestProgramCache:
+    
+
+    def test_second_build_loads_binary(self, cl_queue, tmp_path):
+        
+        ctx, queue = cl_queue
+        cache = ProgramCache(str(tmp_path))
+
+        first = cache.build(ctx, SOURCE)
+        second = cache.build(ctx, SOURCE)
+
+        assert (cache.misses, cache.hits) == (1, 1)
+        assert len(list(tmp_path.glob("*.bin"))) == 1
+        assert np.array_equal(run_scale(ctx, queue, first), run_scale(ctx, queue, second))
+
+    def test_key_depends_on_source_and_options(self, cl_queue):
+        
+        device = cl_queue[0].devices[0]
+
+        base = ProgramCache.cache_key(device, SOURCE)
+        assert ProgramCache.cache_key(device, SOURCE) == base
+        assert ProgramCache.cache_key(device, SOURCE + " ") != base
+        assert ProgramCache.cache_key(device, SOURCE, ["-cl-fast-relaxed-math"]) != base
+
+    def test_corrupt_binary_is_rebuilt(self, cl_queue, tmp_path):
+        
+        ctx, queue = cl_queue
+        cache = ProgramCache(str(tmp_path))
+        cache.build(ctx, SOURCE)
+        for path in tmp_path.glob("*.bin"):
+            path.write_bytes(b"not a binary")
+
+        program = cache.build(ctx, SOURCE)
+
+        assert cache.misses == 2
+        assert np.array_equal(run_scale(ctx, queue, program), np.arange(8, dtype=np.float32) * 2.0)
+        assert all(path.read_bytes() != b"not a binary" for path in tmp_path.glob("*.bin"))
+
+    def test_disabled_by_config(self, cl_queue, tmp_path, monkeypatch):
+        
+        # patched rather than set: config_manager.set would rewrite the shipped config.json
+        original = config_manager.get
+        monkeypatch.setattr(config_manager, "get",
+                            lambda key, default=None: False if key == "compute_kernel_cache" else original(key, default))
+        cache = ProgramCache(str(tmp_path))
+        cache.build(cl_queue[0], SOURCE)
+
+        assert list(tmp_path.glob("*.bin")) == []
+
+    def test_clear_removes_binaries(self, cl_queue, tmp_path):
+        
+        cache = ProgramCache(str(tmp_path))
+        cache.build(cl_queue[0], SOURCE)
+
+        assert cache.clear() == 1
+        assert list(tmp_path.glob("*.bin")) == []
+
+    def test_cache_dir_env_override(self, monkeypatch, tmp_path):
+        
+        monkeypatch.setenv("GRAVITAS_CL_CACHE_DIR", str(tmp_path))
+
+        assert default_cache_dir() == str(tmp_path)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
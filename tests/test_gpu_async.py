@@ -0,0 +1,119 @@
+import pytest
+import numpy as np
+
+cl = pytest.importorskip("pyopencl")
+
+from gravitas.compute.gpu_async import ClFuture, PinnedReadback
+from gravitas.compute.gpu_session import GPUSession
+
+
+def padded_adjacent_sum(grid, self_weight, neighbor_weight):
+    padded = np.pad(grid, ((1, 1), (1, 1), (0, 0)), mode='edge')
+    neighbors = padded[2:, 1:-1] + padded[:-2, 1:-1] + padded[1:-1, 2:] + padded[1:-1, :-2]
+    return neighbors * neighbor_weight + grid * self_weight
+
+
+@pytest.fixture(scope="module")
+def cl_queue():
+    try:
+        platforms = cl.get_platforms()
+    except Exception:
+        platforms = []
+    devices = [d for p in platforms for d in p.get_devices()]
+    if not devices:
+        pytest.skip("no OpenCL device available")
+    ctx = cl.Context([devices[0]])
+    return ctx, cl.CommandQueue(ctx)
+
+
+class TestClFuture:
+    
+
+    def test_result_waits_and_resolves_once(self, cl_queue):
+        
+        ctx, queue = cl_queue
+        data = np.arange(16, dtype=np.float32)
+        buf = cl.Buffer(ctx, cl.mem_flags.READ_WRITE | cl.mem_flags.COPY_HOST_PTR, hostbuf=data)
+        out = np.zeros_like(data)
+        calls = []
+
+        event = cl.enqueue_copy(queue, out, buf, is_blocking=False)
+        future = ClFuture([event], lambda: calls.append(1) or out)
+
+        assert np.array_equal(future.result(), data)
+        assert future.done()
+        future.result()
+        assert calls == [1]
+
+    def test_then_chains_a_transform(self, cl_queue):
+        
+        future = ClFuture([], lambda: 3).then(lambda value: value * 2)
+
+        assert future.done()
+        assert future.result() == 6
+
+
+class TestPinnedReadback:
+    
+
+    def test_reads_alternate_between_two_buffers(self, cl_queue):
+        
+        ctx, queue = cl_queue
+        first = np.full((4, 4, 2), 1.0, dtype=np.float32)
+        second = np.full((4, 4, 2), 2.0, dtype=np.float32)
+        buf_a = cl.Buffer(ctx, cl.mem_flags.READ_WRITE | cl.mem_flags.COPY_HOST_PTR, hostbuf=first)
+        buf_b = cl.Buffer(ctx, cl.mem_flags.READ_WRITE | cl.mem_flags.COPY_HOST_PTR, hostbuf=second)
+        readback = PinnedReadback(ctx, queue, (4, 4, 2))
+
+        frame_a = readback.read(buf_a)
+        frame_b = readback.read(buf_b)
+
+        # the earlier frame is untouched by the read that follows it
+        assert np.all(frame_a.result() == 1.0)
+        assert np.all(frame_b.result() == 2.0)
+        assert frame_a.result() is not frame_b.result()
+
+        frame_c = readback.read(buf_b)
+        assert frame_c.result() is frame_a.result()
+        readback.release()
+
+
+class TestSessionAsync:
+    
+
+    def test_pipelined_frames_match_blocking_steps(self, cl_queue):
+        
+        grid = np.random.default_rng(5).standard_normal((21, 30, 2)).astype(np.float32)
+        session = GPUSession(*cl_queue, width=30, height=21)
+        session.upload(grid)
+
+        expected = grid
+        frames = []
+        for _ in range(4):
+            # readback of frame N is queued before frame N+1's compute
+            session.step(1, 0.6, 0.1)
+            expected = padded_adjacent_sum(expected, 0.6, 0.1)
+            frames.append((session.download_async(), expected.copy()))
+            if len(frames) == 2:
+                future, reference = frames.pop(0)
+                assert np.allclose(future.result(), reference, atol=1e-5)
+
+        for future, reference in frames:
+            assert np.allclose(future.result(), reference, atol=1e-5)
+        session.release()
+
+    def test_download_markers_async(self, cl_queue):
+        
+        session = GPUSession(*cl_queue, width=8, height=8)
+        positions = np.array([[1.0, 2.0], [3.0, 4.0]], dtype=np.float32)
+        session.set_markers(positions)
+
+        got_positions, got_velocities = session.download_markers_async().result()
+
+        assert np.array_equal(got_positions, positions)
+        assert np.all(got_velocities == 0.0)
+        session.release()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
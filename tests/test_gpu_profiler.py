@@ -0,0 +1,164 @@
+import pytest
+import numpy as np
+
+cl = pytest.importorskip("pyopencl")
+
+from gravitas.compute.gpu_profiler import KernelProfiler
+from gravitas.compute.gpu_session import GPUSession
+
+
+@pytest.fixture(scope="module")
+def cl_queue():
+    try:
+        platforms = cl.get_platforms()
+    except Exception:
+        platforms = []
+    devices = [d for p in platforms for d in p.get_devices()]
+    if not devices:
+        pytest.skip("no OpenCL device available")
+    ctx = cl.Context([devices[0]])
+    return ctx, cl.CommandQueue(ctx, properties=cl.command_queue_properties.PROFILING_ENABLE)
+
+
+class TestKernelProfiler:
+    
+
+    def test_session_ops_are_timed(self, cl_queue):
+        
+        ctx, queue = cl_queue
+        profiler = KernelProfiler()
+        session = GPUSession(ctx, queue, 32, 24, profiler=profiler)
+        try:
+            grid = np.random.default_rng(0).standard_normal((24, 32, 2)).astype(np.float32)
+            session.upload(grid)
+            session.step(3, 1.0, 0.1)
+            session.download()
+        finally:
+            session.release()
+
+        stats = profiler.stats()
+        assert stats["adjacent_sum"]["count"] == 3
+        assert stats["session.upload"]["bytes"] == grid.nbytes
+        assert stats["session.download"]["bytes"] == grid.nbytes
+        for entry in stats.values():
+            assert entry["mean_ms"] >= 0.0
+            assert entry["p95_ms"] <= entry["max_ms"]
+            assert 0.0 <= entry["submit_ms"] <= entry["queue_ms"] + 1e-9
+
+    def test_summary_splits_compute_and_transfer(self, cl_queue):
+        
+        ctx, queue = cl_queue
+        profiler = KernelProfiler()
+        session = GPUSession(ctx, queue, 16, 16, profiler=profiler)
+        try:
+            session.upload(np.ones((16, 16, 2), dtype=np.float32))
+            session.step(1, 1.0, 0.1)
+            session.finish()
+        finally:
+            session.release()
+
+        summary = profiler.summary()
+        assert summary["compute_ms"] == pytest.approx(summary["operations"]["adjacent_sum"]["window_ms"])
+        assert summary["bytes"] == 16 * 16 * 2 * 4 * 2  # fill + upload
+
+    def test_window_bounds_samples(self, cl_queue):
+        
+        ctx, queue = cl_queue
+        profiler = KernelProfiler(window=4)
+        session = GPUSession(ctx, queue, 8, 8, profiler=profiler)
+        try:
+            session.step(10, 1.0, 0.1)
+            session.finish()
+        finally:
+            session.release()
+
+        entry = profiler.stats()["adjacent_sum"]
+        assert entry["count"] == 10
+        assert entry["window_ms"] <= entry["max_ms"] * 4 + 1e-9
+
+    def test_bytes_follow_the_window(self, cl_queue):
+        
+        ctx, queue = cl_queue
+        profiler = KernelProfiler(window=2)
+        session = GPUSession(ctx, queue, 8, 8, profiler=profiler)
+        try:
+            grid = np.ones((8, 8, 2), dtype=np.float32)
+            for _ in range(5):
+                session.upload(grid)
+            session.finish()
+        finally:
+            session.release()
+
+        entry = profiler.stats()["session.upload"]
+        assert entry["bytes"] == 2 * grid.nbytes
+        assert entry["total_bytes"] == 5 * grid.nbytes
+
+    def test_cached_summary_reuses_recent_result(self):
+        
+        profiler = KernelProfiler()
+        first = profiler.cached_summary(60.0)
+
+        assert profiler.cached_summary(60.0) is first
+        assert profiler.cached_summary(0.0) is not first
+
+    def test_unprofiled_queue_records_nothing(self, cl_queue):
+        
+        ctx, _ = cl_queue
+        profiler = KernelProfiler()
+        queue = cl.CommandQueue(ctx)
+        session = GPUSession(ctx, queue, 8, 8, profiler=profiler)
+        try:
+            session.step(2, 1.0, 0.1)
+            session.finish()
+        finally:
+            session.release()
+
+        assert profiler.stats() == {}
+
+    def test_reset(self, cl_queue):
+        
+        ctx, queue = cl_queue
+        profiler = KernelProfiler()
+        session = GPUSession(ctx, queue, 8, 8, profiler=profiler)
+        try:
+            session.step(1, 1.0, 0.1)
+            session.finish()
+        finally:
+            session.release()
+
+        assert profiler.stats()
+        profiler.reset()
+        assert profiler.stats() == {}
+
+
+class TestCalculatorProfiling:
+    
+
+    def test_publishes_profile_summary(self, cl_queue, monkeypatch):
+        
+        from gravitas.core.config import config_manager
+        from gravitas.core.events import EventType, FunctionEventHandler, event_bus
+        from gravitas.compute.gpu_vector_field import GPUVectorFieldCalculator
+
+        original = config_manager.get
+        monkeypatch.setattr(config_manager, "get",
+                            lambda key, default=None: True if key == "compute_profiling" else original(key, default))
+
+        received = []
+        handler = FunctionEventHandler(received.append)
+        event_bus.subscribe(EventType.GPU_COMPUTE_COMPLETED, handler)
+        calculator = GPUVectorFieldCalculator()
+        try:
+            if not calculator._initialized:
+                pytest.skip("OpenCL calculator unavailable")
+            grid = np.ones((16, 16, 2), dtype=np.float32)
+            calculator.update_grid_with_adjacent_sum(grid)
+            stats = calculator.profile_stats()
+        finally:
+            event_bus.unsubscribe(EventType.GPU_COMPUTE_COMPLETED, handler)
+            calculator.cleanup()
+
+        assert stats["adjacent_sum"]["count"] == 1
+        assert stats["session.upload"]["bytes"] == grid.nbytes
+        published = [e for e in received if e.data.get("operation") == "update_grid_with_adjacent_sum"]
+        assert published and "compute_ms" in published[-1].data["profile"]
@@ -0,0 +1,264 @@
+import pytest
+import numpy as np
+
+cl = pytest.importorskip("pyopencl")
+
+from gravitas.compute.gpu_session import GPUSession
+from gravitas.compute.cpu_vector_field import CPUVectorFieldCalculator
+
+
+def padded_adjacent_sum(grid, self_weight, neighbor_weight):
+    padded = np.pad(grid, ((1, 1), (1, 1), (0, 0)), mode='edge')
+    neighbors = padded[2:, 1:-1] + padded[:-2, 1:-1] + padded[1:-1, 2:] + padded[1:-1, :-2]
+    return neighbors * neighbor_weight + grid * self_weight
+
+
+@pytest.fixture(scope="module")
+def cl_queue():
+    try:
+        platforms = cl.get_platforms()
+    except Exception:
+        platforms = []
+    devices = [d for p in platforms for d in p.get_devices()]
+    if not devices:
+        pytest.skip("no OpenCL device available")
+    ctx = cl.Context([devices[0]])
+    return ctx, cl.CommandQueue(ctx)
+
+
+class TestGPUSession:
+    
+
+    def setup_method(self):
+        
+        self.grid = np.random.default_rng(0).standard_normal((19, 27, 2)).astype(np.float32)
+
+    def test_new_session_grid_is_zero(self, cl_queue):
+        
+        session = GPUSession(*cl_queue, width=8, height=4)
+
+        assert session.shape == (4, 8, 2)
+        assert np.all(session.download() == 0.0)
+        session.release()
+
+    def test_upload_download_round_trip(self, cl_queue):
+        
+        session = GPUSession(*cl_queue, width=27, height=19)
+        session.upload(self.grid)
+
+        out = np.empty_like(self.grid)
+        assert session.download(out) is out
+        assert np.array_equal(out, self.grid)
+        session.release()
+
+    def test_half_grid_round_trip(self, cl_queue):
+        
+        half = self.grid.astype(np.float16)
+        session = GPUSession(*cl_queue, width=27, height=19)
+        session.upload(half)
+
+        # resident data is float32; half targets are rounded on the device
+        assert np.array_equal(session.download(), half.astype(np.float32))
+        out = np.empty_like(half)
+        assert session.download(out) is out
+        assert np.array_equal(out, half)
+        session.release()
+
+    def test_half_grid_step_accumulates_in_float32(self, cl_queue):
+        
+        half = self.grid.astype(np.float16)
+        session = GPUSession(*cl_queue, width=27, height=19)
+        session.upload(half)
+
+        session.step(3, 0.6, 0.1)
+        out = session.download(np.empty_like(half))
+
+        expected = half.astype(np.float32)
+        for _ in range(3):
+            expected = padded_adjacent_sum(expected, 0.6, 0.1)
+        assert np.allclose(out.astype(np.float32), expected, rtol=1e-3, atol=1e-3)
+        session.release()
+
+    def test_upload_rejects_wrong_shape(self, cl_queue):
+        
+        session = GPUSession(*cl_queue, width=8, height=8)
+
+        with pytest.raises(ValueError):
+            session.upload(np.zeros((4, 8, 2), dtype=np.float32))
+        session.release()
+
+    def test_step_stays_on_device_and_matches_cpu(self, cl_queue):
+        
+        session = GPUSession(*cl_queue, width=27, height=19)
+        session.upload(self.grid)
+
+        session.step(3, 0.6, 0.1)
+
+        expected = self.grid
+        for _ in range(3):
+            expected = padded_adjacent_sum(expected, 0.6, 0.1)
+        assert np.allclose(session.download(), expected, atol=1e-5)
+        session.release()
+
+    @pytest.mark.parametrize("local_size", [(8, 8), (16, 8), (4, 16), (32, 4)])
+    def test_tiled_step_matches_untiled(self, cl_queue, local_size):
+        
+        # 27x19 is not a multiple of any local size, so partial edge groups are covered
+        untiled = GPUSession(*cl_queue, width=27, height=19)
+        untiled.local_size = None
+        tiled = GPUSession(*cl_queue, width=27, height=19)
+        tiled.local_size = local_size
+        untiled.upload(self.grid)
+        tiled.upload(self.grid)
+
+        untiled.step(4, 0.6, 0.1)
+        tiled.step(4, 0.6, 0.1)
+
+        assert np.allclose(tiled.download(), untiled.download(), atol=1e-6)
+        untiled.release()
+        tiled.release()
+
+    def test_tiled_step_is_deterministic(self, cl_queue):
+        
+        results = []
+        for _ in range(2):
+            session = GPUSession(*cl_queue, width=27, height=19)
+            session.local_size = (8, 8)
+            session.upload(self.grid)
+            session.step(5, 1.0, 0.25)
+            results.append(session.download())
+            session.release()
+
+        assert np.array_equal(results[0], results[1])
+
+    def test_map_reads_and_writes_resident_grid(self, cl_queue):
+        
+        session = GPUSession(*cl_queue, width=27, height=19)
+        session.upload(self.grid)
+
+        with session.map() as view:
+            assert np.array_equal(view, self.grid)
+            assert not view.flags.writeable
+
+        with session.map(writable=True) as view:
+            view[0, 0] = (5.0, -5.0)
+
+        assert tuple(session.download()[0, 0]) == (5.0, -5.0)
+        session.release()
+
+    def test_markers_round_trip_and_grow(self, cl_queue):
+        
+        session = GPUSession(*cl_queue, width=27, height=19, capacity=2)
+        positions = np.array([[1.0, 2.0], [3.5, 4.5], [10.0, 0.25]], dtype=np.float32)
+        velocities = np.array([[0.1, 0.2], [0.3, 0.4], [0.5, 0.6]], dtype=np.float32)
+
+        session.set_markers(positions, velocities)
+
+        got_positions, got_velocities = session.download_markers()
+        assert session.marker_count == 3
+        assert np.array_equal(got_positions, positions)
+        assert np.array_equal(got_velocities, velocities)
+        session.release()
+
+    def test_sample_markers_matches_bilinear_fit(self, cl_queue):
+        
+        session = GPUSession(*cl_queue, width=27, height=19)
+        session.upload(self.grid)
+        positions = np.array([[0.0, 0.0], [3.25, 7.75], [26.0, 18.0], [40.0, -3.0]], dtype=np.float32)
+        session.set_markers(positions)
+
+        samples = session.sample_markers()
+
+        for (x, y), (vx, vy) in zip(positions, samples):
+            x = min(max(x, 0.0), 26.0)
+            y = min(max(y, 0.0), 18.0)
+            x0, y0 = int(x), int(y)
+            x1, y1 = min(x0 + 1, 26), min(y0 + 1, 18)
+            wx, wy = x - x0, y - y0
+            expected = ((1 - wx) * (1 - wy) * self.grid[y0, x0] + wx * (1 - wy) * self.grid[y0, x1]
+                        + (1 - wx) * wy * self.grid[y1, x0] + wx * wy * self.grid[y1, x1])
+            assert np.allclose((vx, vy), expected, atol=1e-5)
+        session.release()
+
+    def test_step_markers_matches_cpu_fallback(self, cl_queue):
+        
+        rng = np.random.default_rng(3)
+        count = 257
+        x = rng.uniform(-2.0, 28.0, count).astype(np.float32)
+        y = rng.uniform(-2.0, 20.0, count).astype(np.float32)
+        vx = rng.standard_normal(count).astype(np.float32)
+        vy = rng.standard_normal(count).astype(np.float32)
+        mag = rng.uniform(0.5, 2.0, count).astype(np.float32)
+        mag[::7] = 0.0
+
+        session = GPUSession(*cl_queue, width=27, height=19)
+        session.upload(self.grid)
+        session.set_markers(np.column_stack((x, y)), np.column_stack((vx, vy)), mag)
+
+        for _ in range(3):
+            session.step_markers(dt=0.5, gravity=0.05, speed_factor=0.9, max_speed=1.5)
+            CPUVectorFieldCalculator().step_markers(self.grid, x, y, mag, vx, vy,
+                                                    dt=0.5, gravity=0.05, speed_factor=0.9, max_speed=1.5)
+
+        positions, velocities = session.download_markers()
+        assert np.allclose(positions, np.column_stack((x, y)), atol=1e-4)
+        assert np.allclose(velocities, np.column_stack((vx, vy)), atol=1e-4)
+        session.release()
+
+    def test_splat_markers_matches_cpu_scatter(self, cl_queue):
+        
+        rng = np.random.default_rng(4)
+        count = 500
+        positions = np.column_stack((
+            rng.uniform(-1.0, 28.0, count),
+            rng.uniform(-1.0, 20.0, count),
+            rng.uniform(-2.0, 2.0, count),
+        )).astype(np.float32)
+        # many markers on one cell to exercise contended atomics
+        positions[:100, :2] = (13.5, 9.25)
+
+        session = GPUSession(*cl_queue, width=27, height=19)
+        session.upload(self.grid)
+        session.set_markers(positions[:, :2], magnitudes=positions[:, 2])
+
+        session.splat_markers()
+
+        expected = self.grid.copy()
+        CPUVectorFieldCalculator().create_tiny_vectors_batch(expected, positions)
+        assert np.allclose(session.download(), expected, atol=1e-4)
+        session.release()
+
+    def test_splat_tiny_vectors_from_host_batch(self, cl_queue):
+        
+        positions = np.array([[3.5, 4.25, 1.0], [0.0, 0.0, -2.0], [26.0, 18.0, 0.5]], dtype=np.float32)
+        session = GPUSession(*cl_queue, width=27, height=19)
+
+        session.splat_tiny_vectors(positions)
+
+        expected = np.zeros((19, 27, 2), dtype=np.float32)
+        CPUVectorFieldCalculator().create_tiny_vectors_batch(expected, positions)
+        assert np.allclose(session.download(), expected, atol=1e-6)
+        session.release()
+
+    def test_splat_batches_reuse_staging_buffers(self, cl_queue):
+        
+        rng = np.random.default_rng(6)
+        session = GPUSession(*cl_queue, width=27, height=19)
+        expected = np.zeros((19, 27, 2), dtype=np.float32)
+
+        buffers = []
+        for count in (40, 10, 40, 25):
+            positions = np.column_stack((rng.uniform(0, 26, count), rng.uniform(0, 18, count),
+                                         rng.uniform(-1, 1, count))).astype(np.float32)
+            session.splat_tiny_vectors(positions)
+            CPUVectorFieldCalculator().create_tiny_vectors_batch(expected, positions)
+            buffers.append(session._splat_points_buf)
+
+        # no allocation once the first batch sized the staging pair
+        assert all(buf is buffers[0] for buf in buffers)
+        assert np.allclose(session.download(), expected, atol=1e-5)
+        session.release()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
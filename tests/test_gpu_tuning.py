@@ -0,0 +1,110 @@
+import json
+import pytest
+
+cl = pytest.importorskip("pyopencl")
+
+from gravitas.compute.gpu_tuning import WorkGroupTuner, fits_device
+
+
+class FakeEvent:
+    def wait(self):
+        pass
+
+
+class FakePlatform:
+    name = "FakeCL"
+
+
+class FakeDevice:
+    platform = FakePlatform()
+    name = "fake-device"
+    driver_version = "1.0"
+    max_work_group_size = 256
+    max_work_item_sizes = [256, 256, 64]
+    local_mem_size = 32768
+
+
+class TestWorkGroupTuner:
+    
+
+    def make_run(self, costs, calls):
+        # fake launcher: a candidate's "time" comes from a busy loop of the given length
+        def run(local_size):
+            calls.append(local_size)
+            for _ in range(costs[local_size]):
+                pass
+            return FakeEvent()
+        return run
+
+    def test_picks_fastest_candidate(self, tmp_path):
+        
+        costs = {None: 200000, (8, 8): 100000, (16, 16): 1000}
+        tuner = WorkGroupTuner(path=str(tmp_path / "wg.json"), candidates=list(costs), repeats=2)
+
+        choice = tuner.choose(FakeDevice(), "adjacent_sum_tiled", (64, 64), self.make_run(costs, []))
+
+        assert choice == (16, 16)
+
+    def test_choice_is_cached_in_memory_and_on_disk(self, tmp_path):
+        
+        path = tmp_path / "wg.json"
+        costs = {None: 1000, (8, 8): 200000}
+        calls = []
+        tuner = WorkGroupTuner(path=str(path), candidates=list(costs), repeats=1)
+
+        assert tuner.choose(FakeDevice(), "k", (32, 16), self.make_run(costs, calls)) is None
+        measured = len(calls)
+        assert tuner.choose(FakeDevice(), "k", (32, 16), self.make_run(costs, calls)) is None
+        assert len(calls) == measured
+
+        entries = json.loads(path.read_text())
+        assert list(entries.values()) == [None]
+
+        # a fresh tuner reads the file instead of measuring again
+        fresh_calls = []
+        fresh = WorkGroupTuner(path=str(path), candidates=list(costs), repeats=1)
+        assert fresh.choose(FakeDevice(), "k", (32, 16), self.make_run(costs, fresh_calls)) is None
+        assert fresh_calls == []
+
+    def test_shapes_are_tuned_separately(self, tmp_path):
+        
+        tuner = WorkGroupTuner(path=str(tmp_path / "wg.json"), candidates=[(8, 8)], repeats=1)
+        calls = []
+        run = self.make_run({(8, 8): 10}, calls)
+
+        tuner.choose(FakeDevice(), "k", (32, 32), run)
+        tuner.choose(FakeDevice(), "k", (64, 32), run)
+
+        assert len(calls) == 4
+
+    def test_unfit_candidates_are_skipped(self, tmp_path):
+        
+        calls = []
+        tuner = WorkGroupTuner(path=str(tmp_path / "wg.json"), candidates=[None, (64, 64)], repeats=1)
+
+        choice = tuner.choose(FakeDevice(), "k", (8, 8), self.make_run({None: 10, (64, 64): 0}, calls),
+                              lambda local_size: fits_device(local_size, FakeDevice()))
+
+        assert choice is None
+        assert (64, 64) not in calls
+
+
+class TestFitsDevice:
+    
+
+    def test_limits(self):
+        
+        device = FakeDevice()
+
+        assert fits_device(None, device)
+        assert fits_device((16, 16), device)
+        assert not fits_device((32, 16), device)      # 512 items > max work-group size
+        device.max_work_item_sizes = [8, 8, 1]
+        assert not fits_device((16, 8), device)
+        device.max_work_item_sizes = [256, 256, 64]
+        device.local_mem_size = 1024
+        assert not fits_device((16, 16), device)       # 18*18*8 bytes of halo tile
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -118,7 +118,9 @@ class TestGPUVectorFieldCalculator:
         # Mock result
         result = np.zeros((5, 5, 2), dtype=np.float32)
         result[1, 1] = (0.5, 0.0)  # Expected result
-        mock_enqueue_copy.side_effect = lambda queue, dest, src: dest.__setitem__(slice(None), result)
+        # Uploads are explicit copies into the mocked buffers; only the readback fills an array
+        mock_enqueue_copy.side_effect = lambda queue, dest, src: (
+            dest.__setitem__(slice(None), result) if isinstance(dest, np.ndarray) else None)
 
         vx, vy = self.calculator.sum_adjacent_vectors(grid, 1, 1)
 
@@ -148,32 +150,23 @@ class TestGPUVectorFieldCalculator:
         result = self.calculator.update_grid_with_adjacent_sum([])
         assert result == []
 
-    @patch('pyopencl.Buffer')
-    @patch('pyopencl.enqueue_nd_range_kernel')
-    @patch('pyopencl.enqueue_copy')
-    def test_update_grid_with_adjacent_sum_success(self, mock_enqueue_copy, mock_enqueue_kernel, mock_buffer):
+    def test_update_grid_with_adjacent_sum_success(self):
         
         self.calculator._initialized = True
 
-        # Mock kernel
-        mock_kernel = Mock()
-        self.calculator._kernels = {'update_grid_with_adjacent_sum': mock_kernel}
-
-        # Mock buffer
-        mock_grid_buf = Mock()
-        mock_buffer.return_value = mock_grid_buf
+        # Mock the double-buffered scratch session the stencil runs on
+        mock_session = Mock()
+        mock_session.download.side_effect = lambda out: out.fill(2.0)  # Simulate GPU processing result
+        self.calculator._get_scratch_session = Mock(return_value=mock_session)
 
         # Create test grid
         grid = np.ones((3, 3, 2), dtype=np.float32)
 
-        # Mock the copy operation to modify grid
-        def mock_copy(queue, dest, src):
-            dest.fill(2.0)  # Simulate GPU processing result
-
-        mock_enqueue_copy.side_effect = mock_copy
-
         result = self.calculator.update_grid_with_adjacent_sum(grid)
 
+        self.calculator._get_scratch_session.assert_called_once_with(3, 3)
+        mock_session.upload.assert_called_once_with(grid)
+        assert mock_session.step.call_args[0][0] == 1
         assert result is grid
         assert np.all(result == 2.0)
 
@@ -224,32 +217,25 @@ class TestGPUVectorFieldCalculator:
         # Test non-numpy grid
         self.calculator.create_tiny_vectors_batch([], [(1.0, 1.0, 1.0)])
 
-    @patch('pyopencl.Buffer')
-    @patch('pyopencl.enqueue_nd_range_kernel')
-    @patch('pyopencl.enqueue_copy')
-    def test_create_tiny_vectors_batch_success(self, mock_enqueue_copy, mock_enqueue_kernel, mock_buffer):
+    def test_create_tiny_vectors_batch_success(self):
         
         self.calculator._initialized = True
 
-        # Mock kernel
-        mock_kernel = Mock()
-        self.calculator._kernels = {'create_tiny_vectors_batch': mock_kernel}
-
-        # Mock buffers
-        mock_temp_buf = Mock()
-        mock_pos_buf = Mock()
-        mock_buffer.side_effect = [mock_temp_buf, mock_pos_buf]
+        # Mock the scratch session the scatter runs on
+        mock_session = Mock()
+        mock_session.download.side_effect = lambda out: out.__setitem__(slice(None), 1.0)
+        self.calculator._get_scratch_session = Mock(return_value=mock_session)
 
         # Create test data
         grid = np.zeros((5, 5, 2), dtype=np.float32)
         positions = [(2.0, 2.0, 1.0)]
 
-        # Mock result
-        temp_grid_flat = np.ones(50, dtype=np.float32)  # 5*5*2 = 50
-        mock_enqueue_copy.side_effect = lambda queue, dest, src: dest.__setitem__(slice(None), temp_grid_flat)
-
         self.calculator.create_tiny_vectors_batch(grid, positions)
 
+        self.calculator._get_scratch_session.assert_called_once_with(5, 5)
+        mock_session.upload.assert_called_once_with(grid)
+        mock_session.splat_tiny_vectors.assert_called_once_with(positions)
+
         # Grid should be modified
         assert not np.all(grid == 0.0)
 
@@ -373,7 +359,8 @@ class TestGPUVectorFieldCalculator:
 
         # Mock result
         results = np.array([[1.0, 1.0]], dtype=np.float32)
-        mock_enqueue_copy.side_effect = lambda queue, dest, src: dest.__setitem__(slice(None), results)
+        mock_enqueue_copy.side_effect = lambda queue, dest, src: (
+            dest.__setitem__(slice(None), results) if isinstance(dest, np.ndarray) else None)
 
         result = self.calculator.fit_vectors_at_positions_batch(grid, positions)
 
@@ -399,5 +386,153 @@ class TestGPUVectorFieldCalculator:
         assert not self.calculator._initialized
 
 
+
+class TestResidentGrid:
+    
+
+    def setup_method(self):
+        
+        self.calculator = GPUVectorFieldCalculator()
+        if not self.calculator._initialized:
+            pytest.skip("no OpenCL device")
+
+    def teardown_method(self):
+        
+        self.calculator.cleanup()
+
+    def test_tracked_grid_stays_on_device_between_calls(self):
+        
+        from gravitas.compute.active_tiles import track_activity
+        from gravitas.compute.cpu_vector_field import CPUVectorFieldCalculator
+        grid = np.zeros((32, 48, 2), dtype=np.float32)
+        tiles = track_activity(grid, 16)
+        expected = grid.copy()
+        positions = np.array([[10.0, 12.0, 1.0], [30.5, 20.25, 2.0]], dtype=np.float32)
+
+        session = self.calculator._get_scratch_session(48, 32)
+        upload = session.upload
+        session.upload = Mock(side_effect=upload)
+
+        self.calculator.create_tiny_vectors_batch(grid, positions)
+        self.calculator.update_grid_with_adjacent_sum(grid)
+        self.calculator.update_grid_with_adjacent_sum(grid)
+        assert session.upload.call_count == 1
+
+        # an announced host write sends the grid up again
+        grid[5, 5] = (1.0, 1.0)
+        tiles.mark_cells(5, 5)
+        self.calculator.update_grid_with_adjacent_sum(grid)
+        assert session.upload.call_count == 2
+
+        cpu = CPUVectorFieldCalculator()
+        cpu.create_tiny_vectors_batch(expected, positions)
+        cpu.update_grid_with_adjacent_sum(expected)
+        cpu.update_grid_with_adjacent_sum(expected)
+        expected[5, 5] = (1.0, 1.0)
+        cpu.update_grid_with_adjacent_sum(expected)
+        assert np.allclose(grid, expected, atol=1e-5)
+
+    def test_iterate_runs_all_steps_between_one_upload_and_download(self):
+        
+        from gravitas.compute.cpu_vector_field import CPUVectorFieldCalculator
+        grid = np.random.default_rng(0).standard_normal((24, 40, 2)).astype(np.float32)
+        expected = grid.copy()
+        session = self.calculator._get_scratch_session(40, 24)
+        for name in ("upload", "step", "download"):
+            setattr(session, name, Mock(side_effect=getattr(session, name)))
+
+        self.calculator.iterate(grid, 6)
+
+        assert session.upload.call_count == 1
+        assert session.download.call_count == 1
+        assert session.step.call_count == 1 and session.step.call_args[0][0] == 6
+        CPUVectorFieldCalculator().iterate(expected, 6, method="direct")
+        assert np.allclose(grid, expected, atol=1e-5)
+
+    def test_cpu_stencil_between_gpu_calls_is_not_lost(self):
+        
+        from gravitas.compute.active_tiles import track_activity
+        from gravitas.compute.vector_field import VectorFieldCalculator
+        facade = VectorFieldCalculator()
+        if facade._gpu_calculator is None:
+            pytest.skip("no OpenCL device")
+        rng = np.random.default_rng(3)
+        positions = np.column_stack((rng.uniform(0, 47, 20), rng.uniform(0, 31, 20),
+                                     rng.uniform(-1, 1, 20))).astype(np.float32)
+
+        def run(devices):
+            grid = np.zeros((32, 48, 2), dtype=np.float32)
+            track_activity(grid, 16)
+            facade._current_device = devices[0]
+            facade.create_tiny_vectors_batch(grid, positions)
+            for device in devices[1:]:
+                facade._current_device = device
+                facade.update_grid_with_adjacent_sum(grid)
+            return grid
+
+        expected = run(["cpu", "cpu", "cpu", "cpu"])
+        assert np.allclose(run(["gpu", "cpu", "gpu", "gpu"]), expected, atol=1e-5)
+        assert np.allclose(run(["gpu", "gpu", "cpu", "gpu"]), expected, atol=1e-5)
+
+    def test_step_markers_runs_fused_kernel_on_resident_grid(self):
+        
+        from gravitas.compute.active_tiles import track_activity
+        from gravitas.compute.cpu_vector_field import CPUVectorFieldCalculator
+        rng = np.random.default_rng(8)
+        grid = rng.standard_normal((24, 40, 2)).astype(np.float32)
+        track_activity(grid, 16)
+        count = 300
+        x = rng.uniform(0, 39, count).astype(np.float32)
+        y = rng.uniform(0, 23, count).astype(np.float32)
+        mag = rng.choice([-1.0, 0.0, 2.0], count).astype(np.float32)
+        vx = rng.uniform(-1, 1, count).astype(np.float32)
+        vy = rng.uniform(-1, 1, count).astype(np.float32)
+        expected = [a.copy() for a in (x, y, vx, vy)]
+
+        session = self.calculator._get_scratch_session(40, 24)
+        upload = session.upload
+        session.upload = Mock(side_effect=upload)
+        for _ in range(3):
+            self.calculator.step_markers(grid, x, y, mag, vx, vy, dt=0.5, gravity=0.02,
+                                         speed_factor=0.95, max_speed=1.5)
+            CPUVectorFieldCalculator().step_markers(grid, expected[0], expected[1], mag, expected[2], expected[3],
+                                                    dt=0.5, gravity=0.02, speed_factor=0.95, max_speed=1.5)
+
+        # the grid goes up once and stays resident across steps
+        assert session.upload.call_count == 1
+        for got, want in zip((x, y, vx, vy), expected):
+            assert np.allclose(got, want, atol=1e-4)
+
+    def test_facade_steps_markers_on_gpu(self):
+        
+        from gravitas.compute.vector_field import VectorFieldCalculator
+        facade = VectorFieldCalculator()
+        gpu = facade._gpu_calculator
+        if gpu is None:
+            pytest.skip("no OpenCL device")
+        grid = np.zeros((16, 16, 2), dtype=np.float32)
+        x, y = np.array([4.0], dtype=np.float32), np.array([5.0], dtype=np.float32)
+        mag, vx, vy = np.ones(1, np.float32), np.ones(1, np.float32), np.zeros(1, np.float32)
+
+        facade._current_device = "gpu"
+        with patch.object(gpu, "step_markers", wraps=gpu.step_markers) as step:
+            facade.step_markers(grid, x, y, mag, vx, vy, dt=1.0, gravity=0.0, speed_factor=1.0, max_speed=2.0)
+
+        assert step.call_count == 1
+        assert x[0] == pytest.approx(5.0)
+
+    def test_untracked_grid_is_always_uploaded(self):
+        
+        grid = np.zeros((16, 16, 2), dtype=np.float32)
+        session = self.calculator._get_scratch_session(16, 16)
+        upload = session.upload
+        session.upload = Mock(side_effect=upload)
+
+        self.calculator.update_grid_with_adjacent_sum(grid)
+        self.calculator.update_grid_with_adjacent_sum(grid)
+
+        assert session.upload.call_count == 2
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
@@ -0,0 +1,180 @@
+import pytest
+import numpy as np
+from unittest.mock import Mock
+from gravitas.core.app import GridManager
+from gravitas.core.state import state_manager
+from gravitas.core.events import event_bus, EventType
+
+
+class TestGridManager:
+    
+
+    def setup_method(self):
+        
+        self.state_manager = state_manager
+        self.event_bus = event_bus
+        self.grid_manager = GridManager(self.state_manager, self.event_bus)
+
+    def test_grid_property_is_read_only_view(self):
+        
+        live = self.grid_manager.init_grid(64, 64)
+        view = self.grid_manager.grid
+
+        assert not view.flags.writeable
+        assert np.shares_memory(view, live)
+        with pytest.raises(ValueError):
+            view[0, 0, 0] = 1.0
+
+        live[3, 4] = (5.0, 6.0)
+        assert tuple(self.grid_manager.grid[3, 4]) == (5.0, 6.0)
+
+    def test_snapshot_is_detached(self):
+        
+        self.grid_manager.init_grid(8, 8)
+        snapshot = self.grid_manager.snapshot()
+
+        with self.grid_manager.borrow() as grid:
+            grid[1, 1] = (1.0, 1.0)
+
+        assert snapshot.flags.writeable
+        assert np.all(snapshot == 0.0)
+        assert self.grid_manager.grid[1, 1, 0] == 1.0
+
+    def test_borrow_writes_live_grid_and_marks_tiles(self):
+        
+        self.grid_manager.init_grid(64, 64)
+        self.grid_manager.active_tiles.reset()
+        self.state_manager.set("grid_updated", False)
+
+        with self.grid_manager.borrow() as grid:
+            grid[40, 50] = (2.0, 3.0)
+
+        assert self.state_manager.get("grid_updated") == True
+        assert self.grid_manager.active_tiles.count() == self.grid_manager.active_tiles.mask.size
+        self.grid_manager.clear_grid()
+        assert np.all(self.grid_manager.grid == 0.0)
+
+        with self.grid_manager.borrow(writable=False) as grid:
+            assert not grid.flags.writeable
+
+    def test_retracking_live_grid_keeps_manager_and_stencil_in_sync(self):
+        
+        from gravitas.compute.active_tiles import active_tiles_for, track_activity
+        grid = self.grid_manager.init_grid(64, 64)
+        track_activity(grid)
+
+        assert self.grid_manager.active_tiles is active_tiles_for(grid)
+        self.grid_manager.update_cells((1.0, 1.0), np.array([40]), np.array([50]))
+        assert active_tiles_for(grid).count() == 1
+        self.grid_manager.clear_grid()
+        assert np.all(self.grid_manager.grid == 0.0)
+
+    def test_borrow_without_grid(self):
+        
+        with self.grid_manager.borrow() as grid:
+            assert grid is None
+        assert self.grid_manager.snapshot() is None
+
+    def test_update_cells_with_index_arrays(self):
+        
+        self.grid_manager.init_grid(64, 64)
+        events = []
+        handler = Mock()
+        handler.handle.side_effect = events.append
+        self.event_bus.subscribe(EventType.GRID_UPDATED, handler)
+        try:
+            ys = np.array([3, 40, 7, 99])
+            xs = np.array([5, 10, 60, 0])
+            values = np.array([[1.0, 2.0], [3.0, 4.0], [5.0, 6.0], [7.0, 8.0]])
+            written = self.grid_manager.update_cells(values, ys, xs)
+        finally:
+            self.event_bus.unsubscribe(EventType.GRID_UPDATED, handler)
+
+        grid = self.grid_manager.grid
+        assert written == 3
+        assert tuple(grid[40, 10]) == (3.0, 4.0)
+        assert tuple(grid[7, 60]) == (5.0, 6.0)
+        assert events[-1].data == {"region": (3, 41, 5, 61), "count": 3}
+
+    def test_update_cells_with_mask(self):
+        
+        self.grid_manager.init_grid(32, 32)
+        mask = np.zeros((32, 32), dtype=bool)
+        mask[10:12, 4:20] = True
+
+        assert self.grid_manager.update_cells((0.5, -0.5), mask=mask) == 32
+        grid = self.grid_manager.grid
+        assert np.all(grid[mask] == (0.5, -0.5))
+        assert np.all(grid[~mask] == 0.0)
+
+        full = np.ones((32, 32, 2), dtype=np.float32)
+        self.grid_manager.update_cells(full * 2.0, mask=mask)
+        assert np.all(self.grid_manager.grid[mask] == 2.0)
+
+        self.grid_manager.clear_grid()
+        assert np.all(self.grid_manager.grid == 0.0)
+
+        with pytest.raises(ValueError):
+            self.grid_manager.update_cells((1.0, 1.0), mask=np.ones((4, 4), dtype=bool))
+
+    def test_load_grid_memory_mapped(self, tmp_path):
+        
+        path = str(tmp_path / "field.npy")
+        data = np.random.default_rng(0).standard_normal((48, 64, 2)).astype(np.float32)
+        np.save(path, data)
+
+        assert self.grid_manager.load_grid(path, mmap_mode="r+")
+        assert self.grid_manager.is_mapped
+        with self.grid_manager.borrow() as grid:
+            grid[5, 6] = (9.0, 9.0)
+        self.grid_manager.flush()
+
+        assert tuple(np.load(path)[5, 6]) == (9.0, 9.0)
+        assert self.grid_manager.save_grid(path)
+        assert not self.grid_manager.load_grid(path, mmap_mode="w")
+
+    def test_read_only_mapping_refuses_writes(self, tmp_path):
+        
+        path = str(tmp_path / "field.npy")
+        data = np.ones((32, 32, 2), dtype=np.float32)
+        np.save(path, data)
+
+        assert self.grid_manager.load_grid(path, mmap_mode="r")
+        assert self.grid_manager.is_read_only
+        assert self.grid_manager.update_cells((5.0, 5.0), np.array([1]), np.array([1])) == 0
+        self.grid_manager.clear_grid()
+        with self.grid_manager.borrow() as grid:
+            assert not grid.flags.writeable
+
+        assert np.all(np.load(path) == 1.0)
+        assert np.all(self.grid_manager.grid == 1.0)
+
+    def test_create_grid_file_and_step_in_bands(self, tmp_path):
+        
+        from gravitas.compute.cpu_vector_field import CPUVectorFieldCalculator
+
+        path = str(tmp_path / "huge.npy")
+        assert self.grid_manager.create_grid_file(path, 40, 30)
+        self.grid_manager.update_cells((1.0, -1.0), [15], [20])
+
+        calculator = CPUVectorFieldCalculator()
+        with self.grid_manager.borrow() as grid:
+            expected = calculator.update_grid_with_adjacent_sum(np.array(grid))
+            calculator.update_grid_in_bands(grid, band_rows=7)
+
+        on_disk = np.load(path)
+        assert np.allclose(on_disk, expected, atol=1e-6)
+        assert on_disk[15, 21, 0] != 0.0
+
+    def test_plain_load_keeps_loaded_array(self, tmp_path):
+        
+        path = str(tmp_path / "plain.npy")
+        np.save(path, np.ones((8, 8, 2), dtype=np.float32))
+
+        assert self.grid_manager.load_grid(path)
+        assert not self.grid_manager.is_mapped
+        assert np.all(self.grid_manager.grid == 1.0)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,168 @@
+import time
+import pytest
+import numpy as np
+from gravitas.compute.cpu_vector_field import CPUVectorFieldCalculator
+from plugins.integrators import (INTEGRATORS, Integrator, MidpointRK2, SemiImplicitEuler, VelocityVerlet,
+                                 frame_speed, get_integrator, substep_count)
+
+
+def spring_grid(size, k):
+    # linear restoring field towards the centre; bilinear sampling reproduces it exactly
+    ys, xs = np.mgrid[0:size, 0:size].astype(np.float32)
+    centre = (size - 1) / 2.0
+    return np.stack((-k * (xs - centre), -k * (ys - centre)), axis=-1), centre
+
+
+def markers(x, y, vx=0.0, vy=0.0):
+    x = np.array(x, dtype=np.float32)
+    y = np.array(y, dtype=np.float32)
+    return (x, y, np.ones_like(x), np.full_like(x, vx), np.full_like(y, vy))
+
+
+class TestIntegrators:
+    
+
+    def setup_method(self):
+        
+        self.calculator = CPUVectorFieldCalculator()
+
+    def test_registry_and_config_lookup(self):
+        
+        assert set(INTEGRATORS) >= {"euler", "verlet", "rk2"}
+        assert isinstance(get_integrator("verlet"), VelocityVerlet)
+        assert isinstance(get_integrator(), SemiImplicitEuler)
+        with pytest.raises(ValueError):
+            get_integrator("leapfrog4")
+        with pytest.raises(TypeError):
+            Integrator()
+
+    @pytest.mark.parametrize("dt", [0.5, 1.0, 2.0])
+    def test_euler_single_step_matches_fused_step(self, dt):
+        
+        rng = np.random.default_rng(0)
+        grid = rng.standard_normal((32, 32, 2)).astype(np.float32)
+        x, y = rng.uniform(1, 30, 50).astype(np.float32), rng.uniform(1, 30, 50).astype(np.float32)
+        mag = rng.uniform(0.5, 2.0, 50).astype(np.float32)
+        mag[:5] = 0.0
+        vx, vy = rng.uniform(-0.5, 0.5, 50).astype(np.float32), rng.uniform(-0.5, 0.5, 50).astype(np.float32)
+        fused = [a.copy() for a in (x, y, mag, vx, vy)]
+
+        # one substep at every dt, so both paths take exactly one euler step of length dt
+        substeps = SemiImplicitEuler().advance(self.calculator, grid, x, y, mag, vx, vy, dt=dt, gravity=0.05,
+                                               speed_factor=0.9, max_speed=1.0, cfl=1.0, max_substeps=1)
+        self.calculator.step_markers(grid, *fused, dt=dt, gravity=0.05, speed_factor=0.9, max_speed=1.0)
+
+        assert substeps == 1
+        for ours, theirs in zip((x, y, vx, vy), (fused[0], fused[1], fused[3], fused[4])):
+            assert np.allclose(ours, theirs, atol=1e-6)
+
+    def test_substep_count_follows_cfl(self):
+        
+        assert substep_count(3.0, 1.0, cfl=1.0, max_substeps=8) == 3
+        assert substep_count(3.0, 1.0, cfl=0.5, max_substeps=8) == 6
+        assert substep_count(3.0, 1.0, cfl=0.5, max_substeps=4) == 4
+        assert substep_count(1.0, 4.0, cell_size=2.0, cfl=1.0, max_substeps=8) == 2
+        assert substep_count(0.0, 1.0) == 1
+
+    def test_frame_speed_includes_acceleration_and_clamp(self):
+        
+        vx = np.array([0.5, -3.0], dtype=np.float32)
+        zeros = np.zeros(2, dtype=np.float32)
+        ax = np.array([0.0, 2.0], dtype=np.float32)
+
+        assert frame_speed(vx, zeros, zeros, zeros, 1.0) == pytest.approx(3.0)
+        # a marker at rest still gets substeps when the field will accelerate it
+        assert frame_speed(zeros, zeros, ax, zeros, 2.0) == pytest.approx(4.0)
+        # clamped velocities never move further than max_speed * dt
+        assert frame_speed(vx, zeros, ax, zeros, 1.0, max_speed=1.0) == 1.0
+
+    @pytest.mark.parametrize("integrator,tolerance", [(SemiImplicitEuler(), 0.5), (VelocityVerlet(), 0.05),
+                                                       (MidpointRK2(), 0.05)])
+    def test_orbit_accuracy(self, integrator, tolerance):
+        
+        # one period of a spring with omega = 0.25, 40 steps per period
+        k = 0.0625
+        grid, centre = spring_grid(64, k)
+        x, y, mag, vx, vy = markers([centre + 10.0], [centre])
+        period = 2.0 * np.pi / np.sqrt(k)
+        steps = 40
+        for _ in range(steps):
+            integrator.advance(self.calculator, grid, x, y, mag, vx, vy, dt=period / steps, gravity=0.0,
+                               speed_factor=1.0, max_speed=100.0, cfl=100.0, max_substeps=1)
+
+        error = np.hypot(x[0] - (centre + 10.0), y[0] - centre)
+        assert error < tolerance * 10.0
+
+    @pytest.mark.parametrize("name", ["euler", "verlet", "rk2"])
+    def test_substepping_keeps_large_frames_stable(self, name):
+        
+        # omega * dt = 2.5 is past every integrator's stability limit without substeps
+        k = 0.25
+        grid, centre = spring_grid(64, k)
+        integrator = get_integrator(name)
+
+        def run(max_substeps):
+            x, y, mag, vx, vy = markers([centre + 10.0], [centre])
+            peak = 0.0
+            for _ in range(20):
+                integrator.advance(self.calculator, grid, x, y, mag, vx, vy, dt=5.0, gravity=0.0, speed_factor=1.0,
+                                   max_speed=100.0, cfl=1.0, max_substeps=max_substeps)
+                peak = max(peak, abs(float(x[0]) - centre))
+            return peak
+
+        assert run(64) < 11.0
+        assert run(1) > 20.0
+
+    def test_marker_system_uses_configured_integrator(self):
+        
+        from unittest.mock import Mock
+        from gravitas.core.state import StateManager
+        from plugins.marker_system import MarkerSystem
+
+        app_core = Mock()
+        app_core.state_manager = StateManager()
+        app_core.state_manager.set("cell_size", 4.0)
+        grid, centre = spring_grid(32, 0.1)
+        system = MarkerSystem(app_core)
+        system.vector_calculator = self.calculator
+        system.integrator = MidpointRK2()
+        system.add_marker(centre + 5.0, centre)
+        expected = markers([centre + 5.0], [centre])
+
+        system.update_markers(grid, dt=2.0, gravity=0.0, speed_factor=1.0)
+        MidpointRK2().advance(self.calculator, grid, *expected, dt=2.0, gravity=0.0, speed_factor=1.0,
+                              max_speed=4.0, cell_size=4.0)
+
+        assert system.markers.x[0] == pytest.approx(float(expected[0][0]))
+        assert system.markers.vx[0] == pytest.approx(float(expected[3][0]))
+
+
+class TestIntegratorBenchmark:
+    
+
+    @pytest.mark.parametrize("name", ["euler", "verlet", "rk2"])
+    def test_cost_per_simulated_second(self, name):
+        
+        calculator = CPUVectorFieldCalculator()
+        grid, centre = spring_grid(256, 0.01)
+        rng = np.random.default_rng(1)
+        count = 20000
+        x, y, mag, vx, vy = markers(rng.uniform(60, 196, count), rng.uniform(60, 196, count))
+        integrator = get_integrator(name)
+
+        dt, frames = 2.0, 20
+        t0 = time.perf_counter()
+        substeps = 0
+        for _ in range(frames):
+            substeps += integrator.advance(calculator, grid, x, y, mag, vx, vy, dt=dt, gravity=0.0, speed_factor=1.0,
+                                           max_speed=10.0, cfl=1.0, max_substeps=8)
+        elapsed = time.perf_counter() - t0
+
+        per_second = elapsed / (frames * dt)
+        print(f"\n{name}: {per_second * 1000:.2f} ms per simulated second, {count} markers, "
+              f"{substeps / frames:.1f} substeps/frame, {integrator.samples_per_step} samples/substep")
+        assert np.all(np.isfinite(x)) and np.all(np.isfinite(vx))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
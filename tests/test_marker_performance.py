@@ -73,3 +73,4 @@ def test_marker_update_performance(setup_performance_test):
         print(f"eachmarkerfittime: {fit_time/count:.6f}s")
 
     print("\n=== performancetestdone ===")
+
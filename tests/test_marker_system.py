@@ -0,0 +1,119 @@
+import pytest
+import numpy as np
+from unittest.mock import Mock
+from gravitas.core.state import StateManager
+from plugins.marker_system import MarkerSystem, MarkerStore, MarkerView
+
+
+class TestMarkerStore:
+    
+
+    def test_add_and_fields(self):
+        
+        store = MarkerStore(capacity=2)
+        store.add(1.0, 2.0, 3.0, 4.0, 5.0)
+        store.add(6.0, 7.0)
+
+        assert len(store) == 2
+        assert store.x.dtype == np.float32
+        assert store.x.flags.c_contiguous
+        assert np.array_equal(store.x, [1.0, 6.0])
+        assert np.array_equal(store.mag, [3.0, 1.0])
+        assert np.array_equal(store.positions(), [[1.0, 2.0], [6.0, 7.0]])
+
+    def test_capacity_grows_geometrically(self):
+        
+        store = MarkerStore(capacity=1)
+        capacities = set()
+        for i in range(1000):
+            store.add(float(i), float(i))
+            capacities.add(store.capacity)
+
+        assert len(store) == 1000
+        assert len(capacities) <= 11
+        assert store.x[999] == 999.0
+
+    def test_swap_remove(self):
+        
+        store = MarkerStore()
+        for i in range(4):
+            store.add(float(i), 0.0)
+
+        store.remove(1)
+
+        assert len(store) == 3
+        assert np.array_equal(store.x, [0.0, 3.0, 2.0])
+
+        with pytest.raises(IndexError):
+            store.remove(3)
+
+    def test_view_is_dict_compatible(self):
+        
+        store = MarkerStore()
+        store.add(1.0, 2.0, 0.5)
+
+        view = store[0]
+        assert isinstance(view, MarkerView)
+        assert view["x"] == 1.0
+        assert view == {"x": 1.0, "y": 2.0, "mag": 0.5, "vx": 0.0, "vy": 0.0}
+
+        view["vx"] = 3.0
+        assert store.vx[0] == 3.0
+
+        with pytest.raises(KeyError):
+            view["z"]
+
+    def test_from_dicts_round_trip(self):
+        
+        markers = [{"x": 1.0, "y": 2.0, "mag": 1.0, "vx": 0.0, "vy": 0.5}]
+
+        store = MarkerStore.from_dicts(markers)
+
+        assert store.to_list() == markers
+
+
+class TestMarkerSystem:
+    
+
+    def setup_method(self):
+        
+        self.app_core = Mock()
+        self.app_core.state_manager = StateManager()
+        self.marker_system = MarkerSystem(self.app_core)
+
+    def test_markers_shared_with_state_manager(self):
+        
+        self.marker_system.add_marker(1.0, 2.0)
+
+        assert self.app_core.state_manager.get("markers") is self.marker_system.markers
+
+    def test_update_markers_whole_array(self):
+        
+        grid = np.zeros((10, 10, 2), dtype=np.float32)
+        grid[:, :, 0] = 0.5
+        self.marker_system.add_marker(2.0, 2.0, mag=1.0)
+        self.marker_system.add_marker(5.0, 5.0, mag=2.0)
+        self.marker_system.add_marker(9.0, 9.0, mag=1.0, vx=5.0)
+
+        self.marker_system.update_markers(grid, dt=1.0, gravity=0.1, speed_factor=0.5)
+
+        store = self.marker_system.markers
+        assert np.allclose(store.x, [2.5, 5.25, 9.0])
+        assert np.allclose(store.y, [2.0, 5.0, 9.0])
+        assert np.allclose(store.vx, [0.25, 0.125, 0.5])
+        assert np.allclose(store.vy, [0.05, 0.05, 0.05])
+
+    def test_update_markers_adopts_restored_snapshot(self):
+        
+        self.marker_system.add_marker(1.0, 1.0)
+        snapshot = self.app_core.state_manager.create_snapshot()
+        self.marker_system.markers.x[0] = 4.0
+
+        self.app_core.state_manager.restore_snapshot(snapshot)
+        self.marker_system.update_markers(np.zeros((8, 8, 2), dtype=np.float32), gravity=0.0)
+
+        assert self.marker_system.markers.x[0] == 1.0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
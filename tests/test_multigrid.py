@@ -0,0 +1,149 @@
+import time
+import pytest
+import numpy as np
+from gravitas.compute.multigrid import MultigridSolver
+from gravitas.compute.stencil import SpectralStencil, _dct, _idct
+from gravitas.compute.cpu_vector_field import CPUVectorFieldCalculator
+from gravitas.compute.vector_field import VectorFieldCalculator
+
+
+def padded_adjacent_sum(grid, self_weight, neighbor_weight):
+    padded = np.pad(grid, ((1, 1), (1, 1), (0, 0)), mode='edge')
+    neighbors = padded[2:, 1:-1] + padded[:-2, 1:-1] + padded[1:-1, 2:] + padded[1:-1, :-2]
+    return neighbors * neighbor_weight + grid * self_weight
+
+
+def iterate_to_convergence(source, self_weight, neighbor_weight, steps):
+    field = source.copy()
+    for _ in range(steps):
+        field = padded_adjacent_sum(field, self_weight, neighbor_weight) + source
+    return field
+
+
+def spectral_steady_state(source, self_weight, neighbor_weight):
+    # (I - A)^-1 is diagonal in the DCT-II basis, like A itself
+    h, w = source.shape[0], source.shape[1]
+    symbol = SpectralStencil().gain(h, w, self_weight, neighbor_weight, 1)
+    planes = np.moveaxis(source, 2, 0)
+    coefficients = np.swapaxes(_dct(np.swapaxes(_dct(planes), -1, -2)), -1, -2)
+    denominator = 1.0 - symbol
+    safe = np.where(np.abs(denominator) > 1e-12, denominator, 1.0)
+    coefficients = np.where(np.abs(denominator) > 1e-12, coefficients / safe, 0.0)
+    planes = np.swapaxes(_idct(np.swapaxes(_idct(coefficients), -1, -2)), -1, -2)
+    return np.moveaxis(planes, 0, 2)
+
+
+class TestMultigridSolver:
+    
+
+    @pytest.mark.parametrize("shape", [(1, 1, 2), (1, 40, 2), (37, 53, 2), (64, 64, 2)])
+    @pytest.mark.parametrize("weights", [(0.0, 0.2), (0.5, 0.1)])
+    def test_matches_stencil_run_to_convergence(self, shape, weights):
+        
+        source = np.random.default_rng(0).standard_normal(shape)
+        expected = iterate_to_convergence(source, *weights, steps=400)
+
+        result = MultigridSolver(tolerance=1e-10).solve(source, *weights)
+
+        assert np.allclose(result, expected, atol=1e-7)
+
+    def test_mean_preserving_weights_solve_mean_free_part(self):
+        
+        source = np.random.default_rng(1).standard_normal((24, 19, 2)) + 3.0
+        solver = MultigridSolver(tolerance=1e-10)
+
+        result = solver.solve(source, 0.0, 0.25)
+
+        # the mean would grow forever under the stencil; the rest settles
+        assert np.allclose(result.mean(axis=(0, 1)), 0.0, atol=1e-12)
+        assert np.allclose(result, spectral_steady_state(source, 0.0, 0.25), atol=1e-7)
+
+    def test_matches_spectral_closed_form_on_odd_grid(self):
+        
+        source = np.random.default_rng(2).standard_normal((129, 75, 2))
+
+        result = MultigridSolver(tolerance=1e-10).solve(source, 0.1, 0.2)
+
+        assert np.allclose(result, spectral_steady_state(source, 0.1, 0.2), atol=1e-7)
+
+    def test_v_cycles_do_not_grow_with_grid_size(self):
+        
+        rng = np.random.default_rng(3)
+        solver = MultigridSolver(tolerance=1e-6)
+        cycles = []
+        for size in (32, 128, 512):
+            solver.solve(rng.standard_normal((size, size, 2)), 0.0, 0.25)
+            assert solver.last_residual <= 1e-6
+            cycles.append(solver.last_cycles)
+        assert cycles[-1] <= cycles[0] + 2
+
+    @pytest.mark.parametrize("weights", [(1.0, 0.1), (0.0, 0.3), (-0.5, 0.25), (0.5, 0.0)])
+    def test_rejects_weights_without_steady_state(self, weights):
+        
+        with pytest.raises(ValueError):
+            MultigridSolver().solve(np.ones((8, 8, 2)), *weights)
+
+    def test_zero_source_gives_zero_field(self):
+        
+        solver = MultigridSolver()
+
+        result = solver.solve(np.zeros((16, 16, 2), dtype=np.float32), 0.0, 0.2)
+
+        assert not result.any()
+        assert solver.last_cycles == 0
+
+    def test_faster_than_iterating_the_stencil(self):
+        
+        source = np.random.default_rng(4).standard_normal((256, 256, 2)).astype(np.float32)
+        solver = MultigridSolver(tolerance=1e-4)
+
+        t0 = time.perf_counter()
+        solver.solve(source, 0.0, 0.25)
+        solve_time = time.perf_counter() - t0
+
+        # the slowest mode decays by ~1 - (pi / 256)^2 / 2 per step; reaching 1e-4
+        # takes tens of thousands of steps, so time a fixed slice of them
+        stencil = CPUVectorFieldCalculator()._stencil
+        field = source.copy()
+        t0 = time.perf_counter()
+        for _ in range(1000):
+            field = stencil.apply(field, 0.0, 0.25)
+        stencil_time = time.perf_counter() - t0
+        print(f"\n256^2 steady state: multigrid {solve_time * 1000:.1f} ms, 1000 stencil steps {stencil_time * 1000:.1f} ms")
+        assert solve_time < stencil_time
+
+
+class TestCalculatorSteadyState:
+    
+
+    def test_cpu_calculator_uses_state_weights(self, monkeypatch):
+        
+        calculator = CPUVectorFieldCalculator()
+        weights = {"vector_self_weight": 0.0, "vector_neighbor_weight": 0.2}
+        monkeypatch.setattr(calculator._state_manager, "get", lambda key, default=None: weights.get(key, default))
+        grid = np.random.default_rng(5).standard_normal((20, 30, 2)).astype(np.float32)
+        expected = iterate_to_convergence(grid.astype(np.float64), 0.0, 0.2, steps=400)
+
+        result = calculator.solve_steady_state(grid, tolerance=1e-8)
+
+        assert result is grid
+        assert result.dtype == np.float32
+        assert np.allclose(result, expected, atol=1e-4)
+
+    def test_facade_marks_tracked_grid_dense(self):
+        
+        calculator = VectorFieldCalculator()
+        calculator._current_device = "cpu"
+        grid = np.zeros((64, 64, 2), dtype=np.float32)
+        tiles = calculator.track_activity(grid, 16)
+        calculator.clear_grid(grid)
+        calculator.add_vector_at_position(grid, 10.0, 10.0, 1.0, 0.0)
+
+        calculator.solve_steady_state(grid)
+
+        assert tiles.fraction() == 1.0
+        assert grid[60, 60, 0] != 0.0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
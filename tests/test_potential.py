@@ -0,0 +1,144 @@
+import time
+import pytest
+import numpy as np
+from gravitas.compute.potential import PotentialField, kernel_array, splat_density
+from gravitas.compute.cpu_vector_field import CPUVectorFieldCalculator
+
+
+def direct_field(height, width, x, y, mass, softening):
+    # O(cells * markers) reference: central difference of the summed softened 1/r potential
+    ys, xs = np.mgrid[-1:height + 1, -1:width + 1].astype(np.float64)
+    density = splat_density(height, width, x, y, mass)
+    potential = np.zeros_like(xs)
+    for cy, cx in zip(*np.nonzero(density)):
+        potential += density[cy, cx] / np.sqrt((xs - cx) ** 2 + (ys - cy) ** 2 + softening ** 2)
+    fx = -0.5 * (potential[1:-1, 2:] - potential[1:-1, :-2])
+    fy = -0.5 * (potential[2:, 1:-1] - potential[:-2, 1:-1])
+    return np.stack((fx, fy), axis=-1)
+
+
+class TestPotentialField:
+    
+
+    def test_splat_conserves_mass(self):
+        
+        rng = np.random.default_rng(0)
+        x = rng.uniform(0, 39, 50)
+        y = rng.uniform(0, 29, 50)
+        mass = rng.uniform(0.5, 2.0, 50)
+
+        density = splat_density(30, 40, x, y, mass)
+
+        assert density.shape == (30, 40)
+        assert density.sum() == pytest.approx(mass.sum())
+
+    @pytest.mark.parametrize("shape", [(24, 32), (17, 9)])
+    def test_matches_direct_sum(self, shape):
+        
+        h, w = shape
+        rng = np.random.default_rng(1)
+        x = rng.uniform(0, w - 1, 6)
+        y = rng.uniform(0, h - 1, 6)
+        mass = rng.uniform(-1.0, 1.0, 6)
+
+        result = PotentialField().field(splat_density(h, w, x, y, mass), "inverse_r", 1.5)
+
+        assert result.shape == (h, w, 2)
+        assert np.allclose(result, direct_field(h, w, x, y, mass, 1.5), atol=1e-10)
+
+    def test_field_points_away_from_positive_mass(self):
+        
+        density = splat_density(32, 32, [16.0], [16.0], [1.0])
+
+        field = PotentialField().field(density, "gaussian", 4.0)
+
+        assert field[16, 24, 0] > 0 and field[16, 8, 0] < 0
+        assert field[24, 16, 1] > 0 and field[8, 16, 1] < 0
+        assert abs(field[16, 16]).max() < 1e-12
+
+    def test_custom_kernel_matches_builtin(self):
+        
+        gaussian = kernel_array(16, 16, "gaussian", 3.0)
+        # the same kernel as a centred 31x31 user array
+        centred = np.fft.fftshift(gaussian)[1:, 1:]
+        potential = PotentialField()
+        potential.set_custom_kernel(centred)
+        density = splat_density(16, 16, [3.2, 11.7], [5.5, 9.1], [1.0, -0.5])
+
+        assert np.allclose(potential.field(density, "custom"), potential.field(density, "gaussian", 3.0))
+
+    def test_custom_kernel_required(self):
+        
+        with pytest.raises(ValueError):
+            PotentialField().field(np.zeros((8, 8)), "custom")
+
+    def test_spectrum_is_cached_per_shape(self):
+        
+        potential = PotentialField(max_cached=2)
+
+        first = potential.spectrum(16, 8, "inverse_r", 2.0)
+        assert potential.spectrum(16, 8, "inverse_r", 2.0) is first
+        assert potential.spectrum(16, 8, "inverse_r", 3.0) is not first
+
+        potential.spectrum(16, 9, "inverse_r", 2.0)
+        assert potential.spectrum(16, 8, "inverse_r", 2.0) is not first
+
+    def test_cost_does_not_follow_marker_count(self):
+        
+        rng = np.random.default_rng(2)
+        calculator = CPUVectorFieldCalculator()
+        grid = np.zeros((256, 256, 2), dtype=np.float32)
+
+        def best(count):
+            positions = np.column_stack((rng.uniform(0, 255, count), rng.uniform(0, 255, count),
+                                         np.ones(count))).astype(np.float32)
+            calculator.add_potential_field(grid, positions, "inverse_r", 2.0, 1.0)
+            times = []
+            for _ in range(3):
+                t0 = time.perf_counter()
+                calculator.add_potential_field(grid, positions, "inverse_r", 2.0, 1.0)
+                times.append(time.perf_counter() - t0)
+            return min(times)
+
+        few, many = best(10), best(20000)
+        print(f"\n256^2 potential field: 10 markers {few * 1000:.1f} ms, 20000 markers {many * 1000:.1f} ms")
+        assert many < few * 3
+
+
+class TestPotentialFieldMode:
+    
+
+    def test_calculator_adds_scaled_field(self):
+        
+        calculator = CPUVectorFieldCalculator()
+        grid = np.ones((20, 30, 2), dtype=np.float32)
+        positions = np.array([[10.0, 12.0, 2.0]], dtype=np.float32)
+        expected = PotentialField().field(splat_density(20, 30, [10.0], [12.0], [2.0]), "gaussian", 2.0)
+
+        calculator.add_potential_field(grid, positions, "gaussian", 2.0, -0.5)
+
+        assert grid.dtype == np.float32
+        assert np.allclose(grid, 1.0 - 0.5 * expected, atol=1e-6)
+
+    def test_marker_system_uses_potential_mode(self, monkeypatch):
+        
+        from unittest.mock import Mock
+        from gravitas.core.state import StateManager
+        from plugins.marker_system import MarkerSystem
+
+        app_core = Mock()
+        app_core.state_manager = StateManager()
+        app_core.config_manager.get = lambda key, default=None: "potential" if key == "field_mode" else default
+        markers = MarkerSystem(app_core)
+        monkeypatch.setattr(markers.vector_calculator, "_current_device", "cpu")
+        markers.add_marker(20.0, 20.0, 1.0)
+        grid = np.zeros((40, 40, 2), dtype=np.float32)
+
+        markers.update_field_and_markers(grid, dt=1.0, gravity=0.0, speed_factor=1.0)
+
+        # the potential reaches well beyond the four splat neighbours
+        assert grid[20, 35, 0] > 0.0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,107 @@
+import time
+import pytest
+import numpy as np
+from gravitas.compute.cpu_vector_field import CPUVectorFieldCalculator
+from gravitas.core.recorder import RecordingReader, SimulationRecorder
+from plugins.marker_system import MarkerStore
+
+
+def simulate(frames, shape=(64, 96, 2), seed=0):
+    rng = np.random.default_rng(seed)
+    calculator = CPUVectorFieldCalculator()
+    grid = np.zeros(shape, dtype=np.float32)
+    store = MarkerStore()
+    store.extend(rng.random(50) * (shape[1] - 1), rng.random(50) * (shape[0] - 1))
+    for _ in range(frames):
+        calculator.create_tiny_vectors_batch(grid, store.tiny_vector_positions())
+        calculator.update_grid_with_adjacent_sum(grid)
+        store.x[:] = np.clip(store.x + rng.normal(0.0, 0.5, len(store)), 0.0, shape[1] - 1.0)
+        yield grid, store
+
+
+class TestSimulationRecorder:
+    
+
+    @pytest.mark.parametrize("codec", ["zlib", "lzma"])
+    def test_round_trip_with_random_access(self, tmp_path, codec):
+        
+        path = str(tmp_path / "run.grec")
+        expected = []
+        with SimulationRecorder(path, (64, 96, 2), codec=codec, keyframe_interval=4) as recorder:
+            for grid, store in simulate(11):
+                recorder.record(grid, store.soa())
+                expected.append((grid.copy(), store.soa().copy()))
+
+        with RecordingReader(path) as reader:
+            assert len(reader) == 11
+            assert reader.codec == codec
+            for frame in (10, 0, 5, 4, 7):
+                grid, markers = reader.read(frame)
+                assert np.array_equal(grid, expected[frame][0])
+                assert np.array_equal(markers, expected[frame][1])
+            assert [frame for frame, _, _ in reader] == list(range(11))
+            with pytest.raises(IndexError):
+                reader.read(11)
+
+    def test_deltas_are_smaller_than_keyframes(self, tmp_path):
+        
+        path = str(tmp_path / "run.grec")
+        grid = np.random.default_rng(1).standard_normal((128, 128, 2)).astype(np.float32)
+        expected = []
+        with SimulationRecorder(path, grid.shape, keyframe_interval=10) as recorder:
+            for _ in range(5):
+                recorder.record(grid)
+                expected.append(grid.copy())
+                grid[60:64, 60:64] += 1.0
+
+        with RecordingReader(path) as reader:
+            lengths = reader._index["length"]
+            assert lengths[1:].max() < lengths[0] / 10
+            assert np.array_equal(reader.read(4)[0], expected[4])
+            assert reader.read(4)[1] is None
+
+    def test_unclosed_recording_is_rescanned(self, tmp_path):
+        
+        path = str(tmp_path / "crash.grec")
+        recorder = SimulationRecorder(path, (8, 8, 2), keyframe_interval=3)
+        for i in range(5):
+            recorder.record(np.full((8, 8, 2), float(i), dtype=np.float32))
+        recorder.flush()
+        recorder.record(np.full((8, 8, 2), 5.0, dtype=np.float32))
+        recorder._queue.join()
+        recorder._file.flush()
+        # simulate a torn write after the last complete frame
+        with open(path, "ab") as f:
+            f.write(b"\x01\x02\x03")
+
+        with RecordingReader(path) as reader:
+            assert len(reader) == 6
+            assert np.all(reader.read(5)[0] == 5.0)
+        recorder.close()
+
+    def test_record_does_not_block_on_compression(self, tmp_path):
+        
+        path = str(tmp_path / "fast.grec")
+        grid = np.random.default_rng(2).standard_normal((512, 512, 2)).astype(np.float32)
+        with SimulationRecorder(path, grid.shape, codec="lzma", queue_frames=32) as recorder:
+            start = time.perf_counter()
+            for _ in range(8):
+                recorder.record(grid)
+            enqueue = time.perf_counter() - start
+            start = time.perf_counter()
+        total = enqueue + time.perf_counter() - start
+
+        print(f"\n[recorder] 8 frames of 512x512: {enqueue * 1e3:.1f} ms in record(), {total * 1e3:.1f} ms to drain")
+        assert enqueue < total / 2
+
+    def test_rejects_wrong_shape_and_codec(self, tmp_path):
+        
+        with pytest.raises(ValueError):
+            SimulationRecorder(str(tmp_path / "bad.grec"), (4, 4, 2), codec="bz2")
+        with SimulationRecorder(str(tmp_path / "shape.grec"), (4, 4, 2)) as recorder:
+            with pytest.raises(ValueError):
+                recorder.record(np.zeros((5, 4, 2), dtype=np.float32))
+        with open(str(tmp_path / "junk.grec"), "wb") as f:
+            f.write(b"not a recording")
+        with pytest.raises(ValueError):
+            RecordingReader(str(tmp_path / "junk.grec"))
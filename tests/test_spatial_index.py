@@ -0,0 +1,186 @@
+import time
+import pytest
+import numpy as np
+from unittest.mock import Mock, patch
+from gravitas.core.state import StateManager
+from plugins.marker_system import MarkerSystem
+from plugins.spatial_index import SpatialHash
+
+
+def scatter(n, width, height, seed=0):
+    rng = np.random.default_rng(seed)
+    x = (rng.random(n) * (width - 1)).astype(np.float32)
+    y = (rng.random(n) * (height - 1)).astype(np.float32)
+    return x, y
+
+
+class TestSpatialHash:
+    
+
+    def test_queries_match_brute_force(self):
+        
+        x, y = scatter(3000, 200, 120)
+        index = SpatialHash(200, 120, cell_size=7.0)
+        index.update(x, y)
+        rng = np.random.default_rng(1)
+
+        for qx, qy in rng.random((50, 2)) * [200, 120]:
+            dist = np.hypot(x - qx, y - qy)
+            found, found_dist = index.nearest(qx, qy)
+            assert found_dist == pytest.approx(dist.min(), abs=1e-4)
+            assert dist[found] == pytest.approx(dist.min(), abs=1e-4)
+
+            assert np.array_equal(index.query_radius(qx, qy, 9.5), np.flatnonzero(dist <= 9.5))
+
+            x1, y1 = qx + 23.0, qy - 11.0
+            inside = (x >= min(qx, x1)) & (x <= max(qx, x1)) & (y >= min(qy, y1)) & (y <= max(qy, y1))
+            assert np.array_equal(index.query_rect(qx, qy, x1, y1), np.flatnonzero(inside))
+
+    def test_nearest_respects_max_distance(self):
+        
+        index = SpatialHash(64, 64, cell_size=4.0)
+        index.update(np.array([10.0, 50.0], dtype=np.float32), np.array([10.0, 50.0], dtype=np.float32))
+
+        assert index.nearest(13.0, 14.0, 5.0) == (0, pytest.approx(5.0))
+        assert index.nearest(20.0, 20.0, 5.0) == (-1, float("inf"))
+        assert index.nearest(63.0, 63.0)[0] == 1
+
+    def test_markers_outside_bounds_are_found(self):
+        
+        # the bounds lag the grid: markers and queries past the edge still match brute force
+        x, y = scatter(1000, 640, 480, seed=7)
+        index = SpatialHash(128, 128, cell_size=8.0)
+        index.update(x, y)
+
+        for qx, qy in ((320.0, 240.0), (600.0, 20.0), (-30.0, 400.0), (64.0, 64.0)):
+            dist = np.hypot(x - qx, y - qy)
+            assert index.nearest(qx, qy)[0] == int(np.argmin(dist))
+            assert np.array_equal(index.query_radius(qx, qy, 40.0), np.flatnonzero(dist <= 40.0))
+            inside = (x >= qx - 50.0) & (x <= qx + 50.0) & (y >= qy - 50.0) & (y <= qy + 50.0)
+            assert np.array_equal(index.query_rect(qx - 50.0, qy - 50.0, qx + 50.0, qy + 50.0),
+                                  np.flatnonzero(inside))
+
+    def test_empty_index(self):
+        
+        index = SpatialHash(32, 32)
+        index.update(np.empty(0, dtype=np.float32), np.empty(0, dtype=np.float32))
+
+        assert index.nearest(5.0, 5.0) == (-1, float("inf"))
+        assert index.query_radius(5.0, 5.0, 10.0).shape == (0,)
+        assert index.query_rect(0.0, 0.0, 31.0, 31.0).shape == (0,)
+
+    def test_incremental_update_after_moves(self):
+        
+        x, y = scatter(2000, 128, 128, seed=2)
+        index = SpatialHash(128, 128, cell_size=8.0)
+        index.update(x, y)
+        assert index.rebuilds == 1
+
+        index.update(x, y)
+        assert index.reorders == 0
+
+        rng = np.random.default_rng(3)
+        for _ in range(5):
+            x += rng.normal(0.0, 2.0, x.shape).astype(np.float32)
+            y += rng.normal(0.0, 2.0, y.shape).astype(np.float32)
+            np.clip(x, 0.0, 127.0, out=x)
+            np.clip(y, 0.0, 127.0, out=y)
+            index.update(x, y)
+
+            inside = (x >= 30.0) & (x <= 70.0) & (y >= 10.0) & (y <= 50.0)
+            assert np.array_equal(index.query_rect(30.0, 10.0, 70.0, 50.0), np.flatnonzero(inside))
+
+        assert index.rebuilds == 1
+        assert index.reorders == 5
+
+    def test_invalid_bounds(self):
+        
+        with pytest.raises(ValueError):
+            SpatialHash(0, 10)
+        with pytest.raises(ValueError):
+            SpatialHash(10, 10, cell_size=0.0)
+
+
+class TestMarkerPicking:
+    
+
+    def setup_method(self):
+        
+        self.app_core = Mock()
+        self.app_core.state_manager = StateManager()
+        self.grid = np.zeros((480, 640, 2), dtype=np.float32)
+        self.marker_system = MarkerSystem(self.app_core)
+
+    def test_click_picks_nearest_within_threshold(self):
+        
+        self.marker_system.add_marker(100.0, 100.0)
+        self.marker_system.add_marker(104.0, 100.0)
+
+        picked = self.marker_system.find_nearest_marker(103.0, 101.0, 5.0)
+        assert picked.index == 1
+        assert self.marker_system.find_nearest_marker(200.0, 200.0, 5.0) is None
+
+    def test_index_follows_marker_steps(self):
+        
+        self.marker_system.add_marker(100.0, 100.0, vx=1.0)
+        self.grid[...] = 0.0
+        for _ in range(20):
+            self.marker_system.update_markers(self.grid, dt=1.0, gravity=0.0, speed_factor=1.0)
+
+        x = self.marker_system.markers.x[0]
+        assert x > 110.0
+        assert self.marker_system.find_nearest_marker(x, 100.0, 1.0) is not None
+        assert self.marker_system.find_nearest_marker(100.0, 100.0, 1.0) is None
+
+    def test_queries_reuse_index_until_markers_change(self):
+        
+        x, y = scatter(1000, 640, 480, seed=6)
+        self.marker_system.markers.extend(x, y)
+        self.marker_system.update_markers(self.grid, dt=1.0, gravity=0.0, speed_factor=1.0)
+
+        with patch.object(SpatialHash, "update", autospec=True, side_effect=SpatialHash.update) as update:
+            for i in range(10):
+                self.marker_system.find_nearest_marker(10.0 + i * 6.0, 240.0, 5.0)
+                self.marker_system.markers_in_rect(0.0, 0.0, 100.0, 100.0)
+            assert update.call_count == 0
+
+            self.marker_system.add_marker(320.0, 240.0)
+            assert self.marker_system.find_nearest_marker(320.0, 240.0, 0.5).index == 1000
+            self.marker_system.markers[1000]["x"] = 500.0
+            assert self.marker_system.find_nearest_marker(500.0, 240.0, 0.5).index == 1000
+            self.marker_system.remove_marker(1000)
+            assert self.marker_system.find_nearest_marker(500.0, 240.0, 0.1) is None
+            assert update.call_count == 3
+
+            self.marker_system.update_markers(self.grid, dt=1.0, gravity=0.0, speed_factor=1.0)
+            self.marker_system.find_nearest_marker(320.0, 240.0, 5.0)
+            assert update.call_count == 4
+
+    def test_box_select(self):
+        
+        x, y = scatter(500, 640, 480, seed=4)
+        self.marker_system.markers.extend(x, y)
+
+        selected = self.marker_system.markers_in_rect(250.0, 200.0, 50.0, 80.0)
+        inside = (x >= 50.0) & (x <= 250.0) & (y >= 80.0) & (y <= 200.0)
+        assert np.array_equal(selected, np.flatnonzero(inside))
+
+        near = self.marker_system.markers_in_radius(320.0, 240.0, 40.0)
+        assert np.array_equal(near, np.flatnonzero(np.hypot(x - 320.0, y - 240.0) <= 40.0))
+
+    def test_pick_among_many_markers_is_fast(self):
+        
+        x, y = scatter(50000, 640, 480, seed=5)
+        self.marker_system.markers.extend(x, y)
+        self.marker_system.find_nearest_marker(320.0, 240.0, 5.0)
+
+        start = time.perf_counter()
+        for i in range(100):
+            picked = self.marker_system.find_nearest_marker(10.0 + i * 6.0, 240.0, 5.0)
+        per_click = (time.perf_counter() - start) / 100
+
+        qx = 10.0 + 99 * 6.0
+        dist = np.hypot(x - qx, y - 240.0)
+        assert picked is not None and picked.index == int(np.argmin(dist))
+        print(f"\n[spatial_index] 50k markers: {per_click * 1e3:.3f} ms per click")
+        assert per_click < 0.02
@@ -0,0 +1,73 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import pytest
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+STARTUP_SCRIPT = r"""
+import json
+import sys
+import time
+
+start = time.perf_counter()
+import gravitas.compute.vector_field as vector_field
+import_time = time.perf_counter() - start
+opencl_after_import = "pyopencl" in sys.modules
+
+from gravitas.core.config import config_manager
+config_manager.set("compute_device", "cpu")
+vector_field.vector_calculator.set_device("cpu")
+
+start = time.perf_counter()
+grid = vector_field.create_vector_grid(64, 64)
+vector_field.update_grid_with_adjacent_sum(grid)
+first_call_time = time.perf_counter() - start
+
+print(json.dumps({
+    "import_time": import_time,
+    "first_call_time": first_call_time,
+    "opencl_after_import": opencl_after_import,
+    "opencl_after_cpu_work": "pyopencl" in sys.modules,
+    "loaded": sorted(vector_field.vector_calculator.backends.loaded()),
+}))
+"""
+
+
+def run_startup():
+    # config_manager.set() saves the file, so the script gets a throwaway copy
+    with tempfile.TemporaryDirectory() as tmp:
+        config_path = os.path.join(tmp, "config.json")
+        shutil.copy(os.path.join(ROOT, "config.json"), config_path)
+        env = dict(os.environ, GRAVITAS_CONFIG=config_path)
+        result = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT], cwd=ROOT, env=env,
+                                capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_import_does_not_touch_opencl():
+    
+    stats = run_startup()
+
+    assert not stats["opencl_after_import"]
+    assert not stats["opencl_after_cpu_work"]
+    assert stats["loaded"] == ["cpu"]
+
+
+def test_startup_benchmark():
+    
+    runs = [run_startup() for _ in range(3)]
+    import_time = min(r["import_time"] for r in runs)
+    first_call_time = min(r["first_call_time"] for r in runs)
+
+    print("\n=== startup benchmark ===")
+    print(f"import gravitas.compute.vector_field: {import_time * 1000:.1f} ms")
+    print(f"first CPU update_grid_with_adjacent_sum (backend init included): {first_call_time * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-s"])
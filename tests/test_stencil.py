@@ -0,0 +1,130 @@
+import pytest
+import numpy as np
+from gravitas.compute.stencil import TiledStencil, SpectralStencil
+
+
+def padded_adjacent_sum(grid, self_weight, neighbor_weight):
+    padded = np.pad(grid, ((1, 1), (1, 1), (0, 0)), mode='edge')
+    neighbors = padded[2:, 1:-1] + padded[:-2, 1:-1] + padded[1:-1, 2:] + padded[1:-1, :-2]
+    return neighbors * neighbor_weight + grid * self_weight
+
+
+class TestTiledStencil:
+    
+
+    @pytest.mark.parametrize("shape", [(1, 1, 2), (1, 9, 2), (7, 1, 2), (3, 3, 2), (97, 33, 2)])
+    @pytest.mark.parametrize("workers", [1, 4])
+    def test_matches_padded_reference(self, shape, workers):
+        
+        grid = np.random.default_rng(0).standard_normal(shape).astype(np.float32)
+        stencil = TiledStencil(workers=workers, min_band_rows=8)
+
+        result = stencil.apply(grid.copy(), 0.2, 0.15)
+
+        assert np.allclose(result, padded_adjacent_sum(grid, 0.2, 0.15), atol=1e-6)
+        stencil.shutdown()
+
+    def test_bands_cover_all_rows(self):
+        
+        stencil = TiledStencil(workers=4, min_band_rows=8)
+
+        bands = stencil._bands(100)
+
+        assert len(bands) == 4
+        assert bands[0][0] == 0 and bands[-1][1] == 100
+        assert all(bands[i][1] == bands[i + 1][0] for i in range(len(bands) - 1))
+
+    def test_small_grid_stays_single_band(self):
+        
+        stencil = TiledStencil(workers=8, min_band_rows=64)
+
+        assert stencil._bands(100) == [(0, 100)]
+
+    def test_buffers_are_reused(self):
+        
+        stencil = TiledStencil(workers=1)
+        grid = np.ones((16, 16, 2), dtype=np.float32)
+
+        stencil.apply(grid, 0.0, 0.25)
+        back = stencil.buffers(grid.shape, grid.dtype)[0]
+        stencil.apply(grid, 0.0, 0.25)
+
+        assert stencil.buffers(grid.shape, grid.dtype)[0] is back
+
+    def test_step_rejects_aliased_buffers(self):
+        
+        stencil = TiledStencil(workers=1)
+        grid = np.zeros((4, 4, 2), dtype=np.float32)
+
+        with pytest.raises(ValueError):
+            stencil.step(grid, grid, 0.0, 0.25)
+
+    def test_workers_zero_means_cpu_count(self):
+        
+        stencil = TiledStencil(workers=0)
+
+        assert stencil.workers >= 1
+
+    @pytest.mark.parametrize("iterations", [0, 1, 2, 7])
+    def test_iterate_matches_repeated_apply(self, iterations):
+        
+        grid = np.random.default_rng(1).standard_normal((40, 23, 2)).astype(np.float32)
+        stencil = TiledStencil(workers=2, min_band_rows=8)
+
+        expected = grid.copy()
+        for _ in range(iterations):
+            expected = padded_adjacent_sum(expected, 0.6, 0.1)
+        result = grid.copy()
+        returned = stencil.iterate(result, iterations, 0.6, 0.1)
+
+        assert returned is result
+        assert np.allclose(result, expected, atol=1e-5)
+        stencil.shutdown()
+
+
+    @pytest.mark.parametrize("band_rows", [1, 5, 16, 200])
+    def test_banded_matches_padded_reference(self, band_rows):
+        
+        grid = np.random.default_rng(2).standard_normal((37, 19, 2)).astype(np.float32)
+        stencil = TiledStencil(workers=1)
+        bands = []
+
+        result = grid.copy()
+        stencil.apply_banded(result, 0.3, 0.2, band_rows, lambda y0, y1: bands.append((y0, y1)))
+
+        assert np.allclose(result, padded_adjacent_sum(grid, 0.3, 0.2), atol=1e-6)
+        assert bands[0][0] == 0 and bands[-1][1] == 37
+        assert all(bands[i][1] == bands[i + 1][0] for i in range(len(bands) - 1))
+
+
+class TestSpectralStencil:
+    
+
+    @pytest.mark.parametrize("shape", [(1, 1, 2), (5, 7, 2), (64, 33, 2), (17, 1, 2)])
+    @pytest.mark.parametrize("iterations", [1, 5, 40])
+    def test_matches_direct_iteration(self, shape, iterations):
+        
+        grid = np.random.default_rng(2).standard_normal(shape).astype(np.float32)
+        expected = grid.copy()
+        for _ in range(iterations):
+            expected = padded_adjacent_sum(expected, 0.6, 0.1)
+
+        result = SpectralStencil().iterate(grid.copy(), iterations, 0.6, 0.1)
+
+        assert result.dtype == np.float32
+        assert np.allclose(result, expected, atol=1e-5)
+
+    def test_gain_is_cached_per_shape(self):
+        
+        spectral = SpectralStencil(max_cached=2)
+
+        first = spectral.gain(8, 4, 0.6, 0.1, 10)
+        assert spectral.gain(8, 4, 0.6, 0.1, 10) is first
+
+        spectral.gain(8, 5, 0.6, 0.1, 10)
+        spectral.gain(8, 6, 0.6, 0.1, 10)
+        assert spectral.gain(8, 4, 0.6, 0.1, 10) is not first
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
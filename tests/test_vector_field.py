@@ -1,6 +1,8 @@
+import time
 import pytest
 import numpy as np
 from gravitas.compute.vector_field import VectorFieldCalculator
+from gravitas.compute.cpu_vector_field import CPUVectorFieldCalculator
 
 
 class TestVectorFieldCalculator:
@@ -73,6 +75,117 @@ class TestVectorFieldCalculator:
         assert isinstance(vx, float)
         assert isinstance(vy, float)
 
+    def test_fit_vectors_at_positions_batch_matches_scalar(self):
+        
+        rng = np.random.default_rng(0)
+        grid = rng.standard_normal((16, 24, 2)).astype(np.float32)
+        positions = np.column_stack((
+            rng.uniform(-2.0, 26.0, 200),
+            rng.uniform(-2.0, 18.0, 200),
+        )).astype(np.float32)
+
+        fitted = self.calculator.fit_vectors_at_positions_batch(grid, positions)
+
+        assert isinstance(fitted, np.ndarray)
+        assert fitted.shape == (200, 2)
+        expected = [self.calculator.fit_vector_at_position(grid, x, y) for x, y in positions]
+        assert np.allclose(fitted, expected, atol=1e-5)
+
+    def test_fit_vectors_at_positions_batch_empty(self):
+        
+        grid = self.calculator.create_vector_grid(5, 5)
+
+        fitted = self.calculator.fit_vectors_at_positions_batch(grid, [])
+
+        assert fitted.shape == (0, 2)
+
+    def test_create_tiny_vectors_batch_matches_scalar(self):
+        
+        rng = np.random.default_rng(1)
+        positions = np.column_stack((
+            rng.uniform(-3.0, 34.0, 500),
+            rng.uniform(-3.0, 22.0, 500),
+            rng.uniform(-2.0, 2.0, 500),
+        )).astype(np.float32)
+
+        batch_grid = self.calculator.create_vector_grid(32, 20)
+        scalar_grid = self.calculator.create_vector_grid(32, 20)
+
+        self.calculator.create_tiny_vectors_batch(batch_grid, positions)
+        for x, y, mag in positions:
+            self.calculator.create_tiny_vector(scalar_grid, float(x), float(y), float(mag))
+
+        assert np.allclose(batch_grid, scalar_grid, atol=1e-4)
+
+    def test_create_tiny_vectors_batch_sparse_matches_dense(self):
+        
+        positions = [(10.25, 12.5, 1.0), (10.25, 12.5, -0.5), (300.0, 200.0, 2.0)]
+
+        sparse_grid = self.calculator.create_vector_grid(256, 256)
+        dense_grid = self.calculator.create_vector_grid(4, 4)
+
+        self.calculator.create_tiny_vectors_batch(sparse_grid, positions)
+        self.calculator.create_tiny_vectors_batch(dense_grid, [(2.5, 1.5, 1.0)] * 8)
+
+        expected = self.calculator.create_vector_grid(256, 256)
+        for x, y, mag in positions:
+            self.calculator.create_tiny_vector(expected, x, y, mag)
+        assert np.allclose(sparse_grid, expected, atol=1e-5)
+
+        expected = self.calculator.create_vector_grid(4, 4)
+        for _ in range(8):
+            self.calculator.create_tiny_vector(expected, 2.5, 1.5, 1.0)
+        assert np.allclose(dense_grid, expected, atol=1e-5)
+
+    def test_add_vectors_at_positions_batch_matches_scalar(self):
+        
+        positions = [(1.5, 2.25), (4.0, 4.0), (-1.0, 7.0)]
+        vectors = [(1.0, -1.0), (0.5, 2.0), (3.0, 0.0)]
+
+        batch_grid = self.calculator.create_vector_grid(5, 5)
+        scalar_grid = self.calculator.create_vector_grid(5, 5)
+
+        self.calculator.add_vectors_at_positions_batch(batch_grid, positions, vectors)
+        for (x, y), (vx, vy) in zip(positions, vectors):
+            self.calculator.add_vector_at_position(scalar_grid, x, y, vx, vy)
+
+        assert np.allclose(batch_grid, scalar_grid, atol=1e-6)
+
+
+
+class TestCreateTinyVectorsBatchBenchmark:
+    
+
+    def test_batch_speedup_over_scalar_loop(self):
+        
+        calculator = CPUVectorFieldCalculator()
+        rng = np.random.default_rng(2)
+        size, count, scalar_count = 128, 10000, 2000
+        positions = np.column_stack((rng.uniform(0, size - 1, count), rng.uniform(0, size - 1, count),
+                                     rng.uniform(0.5, 1.5, count))).astype(np.float32)
+        grid = np.zeros((size, size, 2), dtype=np.float32)
+
+        def best(run, repeats):
+            times = []
+            for _ in range(repeats):
+                t0 = time.perf_counter()
+                run()
+                times.append(time.perf_counter() - t0)
+            return min(times)
+
+        # per-marker cost; the scalar loop runs on a subset to keep the test short
+        def scalar():
+            for x, y, mag in positions[:scalar_count]:
+                calculator.create_tiny_vector(grid, x, y, mag)
+
+        scalar_time = best(scalar, 2) / scalar_count
+        batch_time = best(lambda: calculator.create_tiny_vectors_batch(grid, positions), 5) / count
+
+        speedup = scalar_time / batch_time
+        print(f"\ncreate_tiny_vectors_batch: {speedup:.0f}x over the scalar loop, {count} markers on {size}^2")
+        # the target is 50x; the floor leaves room for noisy shared runners
+        assert speedup >= 25.0
+
 
 if __name__ == "__main__":
     pytest.main([__file__])